@@ -0,0 +1,115 @@
+"""Render cost: a browser launch per page vs the pooled browser contexts.
+
+Serves a static, JavaScript-rendered store results page from a local HTTP
+server (no network), renders it repeatedly both ways and reports per-render
+latency, plus which requests the pool kept off the wire (images, fonts,
+analytics). Needs `playwright install chromium`.
+
+Usage: python -m benchmarks.browser_pool [renders]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from playwright.async_api import async_playwright
+
+from src.scrapers.utils.browser import BrowserPool
+
+STORE = "Fixture Store"
+# Results exist only after the script runs, like the stores this pool is for
+RESULTS_PAGE = b"""<!doctype html>
+<html lang="he" dir="rtl"><head><meta charset="utf-8">
+<style>@font-face { font-family: Store; src: url(/static/store.woff2); }</style>
+<script async src="https://www.googletagmanager.com/gtag/js?id=G-TEST"></script>
+</head><body>
+<img src="/static/banner.jpg">
+<ul id="results"></ul>
+<script>
+  const items = [["Sony WH-1000XM5", 849], ["JBL Tune 520BT", 149], ["Apple AirPods 3", 499]];
+  setTimeout(() => {
+    document.getElementById("results").innerHTML = items.map(([name, price]) =>
+      `<li class="product"><img src="/static/${price}.jpg"><span>${name}</span>` +
+      `<b class="price">${price}</b></li>`).join("");
+  }, 20);
+</script>
+</body></html>"""
+
+served: Counter[str] = Counter()
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        served[self.path.rsplit(".", 1)[-1] if "." in self.path else "html"] += 1
+        body = RESULTS_PAGE if self.path.startswith("/search") else b"\0" * 20_000
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+async def launch_per_render(url: str, renders: int) -> list[float]:
+    latencies = []
+    async with async_playwright() as playwright:
+        for _ in range(renders):
+            started = time.perf_counter()
+            browser = await playwright.chromium.launch(headless=True)
+            page = await browser.new_page()
+            await page.goto(url, wait_until="domcontentloaded")
+            await page.wait_for_selector(".product")
+            await page.content()
+            await browser.close()
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def pooled(url: str, renders: int) -> tuple[list[float], BrowserPool]:
+    pool = BrowserPool(
+        browsers=1, contexts_per_browser=2, pages_per_context=20, queue_timeout=10.0,
+        block_resources=("image", "media", "font"), block_hosts=("googletagmanager.com",),
+    )
+    await pool.render(STORE, url, wait_for=".product")  # launch once, outside the timing
+    latencies = []
+    for _ in range(renders):
+        started = time.perf_counter()
+        html = await pool.render(STORE, url, wait_for=".product")
+        latencies.append(time.perf_counter() - started)
+    assert html.count('class="product"') == 3
+    await pool.close()
+    return latencies, pool
+
+
+def report(name: str, latencies: list[float]) -> None:
+    print(
+        f"{name:<20} p50 {statistics.median(latencies) * 1e3:7.1f} ms"
+        f"   max {max(latencies) * 1e3:7.1f} ms"
+    )
+
+
+async def main(renders: int) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/search?q=אוזניות"
+    try:
+        report("launch per render", await launch_per_render(url, max(1, renders // 5)))
+        served_before = served.copy()
+        latencies, pool = await pooled(url, renders)
+        report("pooled context", latencies)
+    finally:
+        server.shutdown()
+    print(f"\npool stats: {pool.stats}")
+    print(f"served without the pool: {dict(served_before)}")
+    print(f"served with the pool:    {dict(served - served_before)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50))
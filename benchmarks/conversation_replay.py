@@ -0,0 +1,102 @@
+"""Replay recorded Shufi conversations: LLM call rate and turn latency per policy.
+
+Each conversation is replayed turn by turn against a SalesAgent whose LLM is
+a stub with realistic latency (lognormal, median ~1.2 s). Conversations run
+concurrently; turns within one conversation are sequential. Compares the
+old behaviour (LLM on every reply) with the default auto policy.
+
+Usage: python -m benchmarks.conversation_replay [median_llm_seconds]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+os.environ["ANTHROPIC_API_KEY"] = ""  # the stub below replaces the model
+
+from langchain_core.messages import AIMessage  # noqa: E402
+
+from src.agents.budget import BudgetGovernor  # noqa: E402
+from src.agents.policy import LLM, ResponsePolicy  # noqa: E402
+from src.agents.sales_agent import SalesAgent  # noqa: E402
+from src.agents.session import ConvState, InMemorySessionStore  # noqa: E402
+
+# Typical traffic: mostly clean slot filling, some chat, questions and objections
+CONVERSATIONS: list[list[str]] = [
+    ["היי", "אוזניות", "סוני", "עד 500", "איכות"],
+    ["אייפון 15 פרו", "חיפה"],
+    ["טלפון", "סמסונג", "2000", "מחיר"],
+    ["שלום", "מחשב נייד", "לנובו", "עד 3500", "איכות"],
+    ["טלוויזיה", "lg", "5000", "מותג"],
+    ["שואב אבק", "dyson", "עד 3000", "איכות"],
+    ["אוזניות", "לא יודע, מה אתה ממליץ?", "jbl", "300", "מחיר"],
+    ["אייפון 15 פרו", "אני גר ליד הים בקריית ביאליק ליד הקניון הגדול"],
+    ["מה דעתך על הבחירות?", "טוב, טלפון", "שיאומי", "1000", "מחיר"],
+    ["מקרר", "בוש", "זה יקר לי, יש משהו זול יותר?", "4000", "מחיר"],
+    ["galaxy ultra", "תל אביב"],
+    ["אהלן", "מה אתה יודע לעשות בעצם", "רמקול", "jbl", "400", "איכות"],
+]
+
+
+class StubLLM:
+    def __init__(self, median: float) -> None:
+        self.median = median
+        self.calls = 0
+
+    async def ainvoke(self, messages: list) -> AIMessage:
+        self.calls += 1
+        await asyncio.sleep(random.lognormvariate(0, 0.35) * self.median)
+        return AIMessage(
+            content="בשמחה! מה עוד חשוב לך?",
+            usage_metadata={"input_tokens": 400, "output_tokens": 60, "total_tokens": 460},
+        )
+
+
+async def replay(policy: ResponsePolicy, median: float) -> tuple[int, int, list[float]]:
+    governor = BudgetGovernor(
+        daily_budget_usd=1e9, warning_threshold=0.8, block_threshold=0.95,
+        max_concurrency=1000, queue_timeout=60.0,
+    )
+    agent = SalesAgent(sessions=InMemorySessionStore(600, 10_000), governor=governor, policy=policy)
+    llm = StubLLM(median)
+    agent._llm = llm
+    latencies: list[float] = []
+
+    async def conversation(user_id: int, turns: list[str]) -> None:
+        for text in turns:
+            started = time.perf_counter()
+            await agent.handle_message(user_id, text)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(conversation(i, turns) for i, turns in enumerate(CONVERSATIONS)))
+    return llm.calls, len(latencies), latencies
+
+
+def report(name: str, calls: int, turns: int, latencies: list[float]) -> None:
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(
+        f"{name:<10} llm calls {calls:>2}/{turns} ({calls / turns:4.0%})   "
+        f"p50 {_fmt(p50):>9}   p95 {_fmt(p95):>9}"
+    )
+
+
+def _fmt(seconds: float) -> str:
+    return f"{seconds * 1e3:.0f} ms" if seconds >= 0.001 else f"{seconds * 1e6:.0f} us"
+
+
+async def main(median: float) -> None:
+    random.seed(7)
+    always = ResponsePolicy({state: LLM for state in ConvState})
+    report("always", *await replay(always, median))
+    report("auto", *await replay(ResponsePolicy(), median))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 1.2))
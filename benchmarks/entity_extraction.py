@@ -0,0 +1,130 @@
+"""Micro-benchmark: single-pass entity automaton vs the old per-set keyword scans.
+
+The legacy functions below are the pre-automaton sales_agent helpers, kept
+here verbatim for comparison. Each "message" runs what one IDLE turn plus
+_smart_extract used to run.
+
+Usage: python -m benchmarks.entity_extraction [iterations]
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+import timeit
+
+from src.agents.entities import (
+    BRANDS,
+    GENERIC_CATEGORIES,
+    GREETINGS,
+    ISRAELI_CITIES,
+    OFF_TOPIC,
+    PRICE_WORDS,
+    VOCABULARY,
+    KeywordAutomaton,
+    extract_entities,
+)
+
+MESSAGES = [
+    "היי",
+    "אייפון 15 פרו",
+    "אני מחפש אוזניות בלוטוס טובות",
+    "טלפון סמסונג עד 2000 באזור תל אביב",
+    "משהו זול, אני גר בראשון לציון",
+    "מה דעתך על הבחירות?",
+    "שואב אבק dyson v15 ultra למשלוח לבאר שבע",
+    "אני רוצה מחשב נייד לעבודה, תקציב של בערך 3,500 שקל ועדיפות לאיכות",
+]
+
+
+def _legacy_is_specific_product(text: str) -> bool:
+    lower = text.lower()
+    has_brand = any(b in lower for b in BRANDS)
+    has_number = bool(re.search(r"\d", text))
+    has_model_word = any(w in lower for w in ("פרו", "pro", "max", "ultra", "plus", "lite", "mini"))
+    return has_brand and (has_number or has_model_word)
+
+
+def _legacy_is_generic_product(text: str) -> bool:
+    lower = text.lower().strip()
+    return any(cat in lower for cat in GENERIC_CATEGORIES)
+
+
+def _legacy_extract_budget(text: str) -> str | None:
+    m = re.search(r"(\d[\d,]*)", text)
+    return m.group(1).replace(",", "") if m else None
+
+
+def _legacy_has_brand(text: str) -> str | None:
+    lower = text.lower()
+    for brand in BRANDS:
+        if brand in lower:
+            return brand
+    return None
+
+
+def _legacy_has_location(text: str) -> str | None:
+    lower = text.lower().strip()
+    for city in ISRAELI_CITIES:
+        if city in lower:
+            return city
+    return None
+
+
+def _legacy_chat_kind(text: str) -> str:
+    lower = text.lower().strip()
+    if any(g in lower for g in GREETINGS):
+        return "greeting"
+    if any(w in lower for w in OFF_TOPIC):
+        return "off_topic"
+    if any(w in lower for w in PRICE_WORDS):
+        return "price"
+    return ""
+
+
+def legacy(text: str) -> tuple:
+    return (
+        _legacy_is_specific_product(text),
+        _legacy_is_generic_product(text),
+        _legacy_extract_budget(text),
+        _legacy_has_brand(text),
+        _legacy_has_location(text),
+        _legacy_chat_kind(text),
+    )
+
+
+def automaton(text: str) -> tuple:
+    found = extract_entities(text)
+    return (
+        found.is_specific_product,
+        found.is_generic_product,
+        found.budget,
+        found.brand,
+        found.location,
+        found.has("greeting"),
+    )
+
+
+def _per_message_us(fn, iterations: int) -> float:
+    seconds = timeit.timeit(lambda: [fn(m) for m in MESSAGES], number=iterations)
+    return seconds / (iterations * len(MESSAGES)) * 1e6
+
+
+def main(iterations: int) -> None:
+    print("current vocabulary")
+    for name, fn in (("legacy scans", legacy), ("automaton", automaton)):
+        print(f"  {name:<14} {_per_message_us(fn, iterations):8.2f} us/message")
+
+    # Legacy cost grows with keyword count; the automaton's only with text length
+    for extra in (1_000, 10_000):
+        brands = BRANDS | {f"brand{i}" for i in range(extra)}
+        grown = KeywordAutomaton({**VOCABULARY, "brand": brands})
+        print(f"vocabulary + {extra} brands")
+        scans = _per_message_us(lambda t: any(b in t.lower() for b in brands), iterations // 10)
+        scanned = _per_message_us(lambda t: grown.scan(t.lower()), iterations // 10)
+        print(f"  {'legacy scans':<14} {scans:8.2f} us/message (brand check only)")
+        print(f"  {'automaton':<14} {scanned:8.2f} us/message (all kinds)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
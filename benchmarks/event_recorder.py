@@ -0,0 +1,108 @@
+"""Analytics events: an INSERT awaited per event vs the write-behind recorder.
+
+Measures what recording costs the handler, i.e. the time between calling
+it and being free to answer the user:
+
+1. direct: one awaited transaction per event (what a handler would pay
+   writing inline)
+2. EventRecorder.emit(): append to the buffer; batches are written by the
+   worker in the background, and the final flush is timed separately
+3. database down: the writer fails every batch; emit() stays as cheap,
+   and the buffer stays bounded (failed and dropped are counted)
+
+The tables in the target database are DROPPED and recreated: point it at
+a scratch database. Defaults to a temporary SQLite file.
+
+Usage: python -m benchmarks.event_recorder [dsn] [events]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database.models import Base, UserEvent
+from src.database.repositories.events import KIND_SEARCH, EventRepository, EventRow
+from src.database.session import create_db_engine, create_schema
+from src.monitoring.events import EventRecorder
+
+
+def row(i: int) -> EventRow:
+    return (KIND_SEARCH, 1000 + i % 50, f"אוזניות {i % 30}", 5, None, datetime.now(UTC))
+
+
+def report(name: str, latencies: list[float]) -> None:
+    latencies = sorted(latencies)
+    print(
+        f"  {name:<22} p50 {statistics.median(latencies) * 1e6:9.1f} µs"
+        f"   p99 {latencies[int(len(latencies) * 0.99) - 1] * 1e6:9.1f} µs"
+    )
+
+
+async def main(dsn: str, events: int) -> None:
+    engine = create_db_engine(dsn)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await create_schema(engine)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def write(rows: list[EventRow]) -> None:
+        async with sessions() as session, session.begin():
+            await EventRepository(session).append(rows)
+
+    print(f"{engine.dialect.name}: {events} search events, time spent in the handler")
+    direct = []
+    for i in range(events // 10):
+        started = time.perf_counter()
+        await write([row(i)])
+        direct.append(time.perf_counter() - started)
+    report("awaited INSERT", direct)
+
+    recorder = EventRecorder(write, batch_size=500, flush_interval=0.5)
+    emitted = []
+    for i in range(events):
+        started = time.perf_counter()
+        recorder.emit(row(i))
+        emitted.append(time.perf_counter() - started)
+        if i % 100 == 0:
+            await asyncio.sleep(0)  # handlers yield between updates
+    report("EventRecorder.emit", emitted)
+    started = time.perf_counter()
+    await recorder.aclose()
+    print(f"  final flush {(time.perf_counter() - started) * 1e3:.1f} ms, {recorder.stats}")
+    async with sessions() as session:
+        stored = await session.scalar(select(func.count()).select_from(UserEvent))
+    print(f"  rows in user_events: {stored}")
+
+    async def down(rows: list[EventRow]) -> None:
+        raise ConnectionRefusedError("database down")
+
+    print("\ndatabase down:")
+    recorder = EventRecorder(down, max_queue=1000, batch_size=500, flush_interval=0.05)
+    emitted = []
+    for i in range(events):
+        started = time.perf_counter()
+        recorder.emit(row(i))
+        emitted.append(time.perf_counter() - started)
+    report("EventRecorder.emit", emitted)
+    await recorder.aclose()
+    print(f"  buffered at most 1000, {recorder.stats}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    default = f"sqlite+aiosqlite:///{Path(tempfile.mkdtemp()) / 'event_recorder.sqlite3'}"
+    asyncio.run(
+        main(
+            sys.argv[1] if len(sys.argv) > 1 else default,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 5000,
+        )
+    )
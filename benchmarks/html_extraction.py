@@ -0,0 +1,167 @@
+"""Store page extraction: selectolax (what we ship) vs lxml, BeautifulSoup and Scrapy selectors.
+
+Generates fixture results pages shaped like Israeli store search pages
+(inline scripts and styles, navigation, 48 product cards with Hebrew
+names, prices and dimensions, a footer) and extracts the same fields with
+each parser. Then checks event loop stalls on a very large page: parsed
+inline vs through extract_async (process pool).
+
+Usage: python -m benchmarks.html_extraction [cards]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import sys
+import time
+import timeit
+
+import parsel
+from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
+
+from src.scrapers.utils.extract import (
+    SelectorSpec,
+    close_parse_pool,
+    extract,
+    extract_async,
+    get_parse_pool,
+)
+
+SPEC = SelectorSpec(
+    item="div.product-card",
+    name="a.title",
+    price=".price",
+    url="a.title",
+    dimensions="li.dims",
+    address=".store-info .address",
+)
+
+# lxml with XPath compiled once, the closest alternative to the spec above
+_ITEM = etree.XPath('//div[contains(concat(" ", @class, " "), " product-card ")]')
+_NAME = etree.XPath('string(.//a[contains(@class, "title")])')
+_HREF = etree.XPath('string(.//a[contains(@class, "title")]/@href)')
+_PRICE = etree.XPath('string(.//span[contains(@class, "price")])')
+_DIMS = etree.XPath('string(.//li[contains(@class, "dims")])')
+_ADDRESS = etree.XPath('string(//div[@class="store-info"]/span[@class="address"])')
+
+
+def fixture_page(cards: int, seed: int = 22) -> str:
+    rng = random.Random(seed)
+    body = "".join(
+        f'<div class="product-card" data-sku="{i}">'
+        f'<a class="title" href="/item/{i}">אוזניות Sony WH-1000XM{i % 6} שחור</a>'
+        f'<div class="meta"><span class="badge">חדש</span><span class="price">'
+        f'<span class="currency">₪</span>{rng.randint(90, 5000):,}.90</span></div>'
+        f'<ul class="specs"><li class="dims">מידות: {rng.randint(5, 150)}x{rng.randint(5, 90)}'
+        f'x{rng.randint(5, 60)} ס"מ</li><li>משקל 1.2 ק"ג</li></ul>'
+        f'<p class="desc">{"טקסט שיווקי ארוך " * 30}</p></div>'
+        for i in range(cards)
+    )
+    return (
+        f'<html lang="he"><head><script>{"var x = 1;" * 5000}</script>'
+        f'<style>{".a {color: red}" * 3000}</style></head><body>'
+        f'<nav>{"<a href=#>קטגוריה</a>" * 300}</nav>'
+        f'<div class="store-info"><span class="address">הרצל 12, חיפה</span></div>'
+        f"<main>{body}</main><footer>{'<p>footer</p>' * 200}</footer></body></html>"
+    )
+
+
+def with_lxml(html: str) -> list:
+    tree = lxml_html.fromstring(html)
+    _ADDRESS(tree)
+    return [(_NAME(c), _HREF(c), _PRICE(c), _DIMS(c)) for c in _ITEM(tree)]
+
+
+def with_bs4(html: str) -> list:
+    soup = BeautifulSoup(html, "lxml")
+    soup.select_one(".store-info .address").get_text()
+    return [
+        (
+            card.select_one("a.title").get_text(),
+            card.select_one("a.title")["href"],
+            card.select_one(".price").get_text(),
+            card.select_one("li.dims").get_text(),
+        )
+        for card in soup.select("div.product-card")
+    ]
+
+
+def with_parsel(html: str) -> list:
+    selector = parsel.Selector(text=html)
+    selector.css(".store-info .address::text").get()
+    return [
+        (
+            card.css("a.title::text").get(),
+            card.css("a.title::attr(href)").get(),
+            "".join(card.css(".price ::text").getall()),
+            card.css("li.dims::text").get(),
+        )
+        for card in selector.css("div.product-card")
+    ]
+
+
+def per_call_ms(fn, html: str, number: int) -> float:
+    return min(timeit.repeat(lambda: fn(html), number=number, repeat=3)) / number * 1e3
+
+
+async def max_loop_stall(parse) -> float:
+    """Longest gap between 1 ms ticks of the event loop while parse() runs."""
+    worst = 0.0
+    done = False
+
+    async def ticker() -> None:
+        nonlocal worst
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            worst = max(worst, now - last)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    await parse()
+    done = True
+    await task
+    return worst
+
+
+async def stalls(html: str) -> None:
+    async def inline() -> None:
+        extract(SPEC, html)
+
+    get_parse_pool().submit(int).result()  # workers spawned before timing
+    print(f"\nlarge page ({len(html) / 1e6:.1f} MB), longest event loop stall:")
+    inline_stall = await max_loop_stall(inline)
+    pooled_stall = await max_loop_stall(lambda: extract_async(SPEC, html))
+    print(f"  extract() inline        {inline_stall * 1e3:6.1f} ms")
+    print(f"  extract_async (pool)    {pooled_stall * 1e3:6.1f} ms")
+    close_parse_pool()
+
+
+def main(cards: int) -> None:
+    html = fixture_page(cards)
+    page = extract(SPEC, html)
+    assert len(page.items) == cards and page.address == "הרצל 12, חיפה"
+    print(f"results page: {len(html.encode()) // 1024} KB, {cards} cards")
+    print(f"  sample: {page.items[0]}")
+
+    baseline = None
+    for name, fn in (
+        ("selectolax (extract)", lambda h: extract(SPEC, h)),
+        ("lxml + compiled XPath", with_lxml),
+        ("Scrapy selectors (parsel)", with_parsel),
+        ("BeautifulSoup (lxml)", with_bs4),
+    ):
+        ms = per_call_ms(fn, html, 20)
+        baseline = baseline or ms
+        print(f"  {name:<26} {ms:7.2f} ms  ({ms / baseline:4.1f}x)")
+
+    asyncio.run(stalls(fixture_page(cards * 40)))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 48)
@@ -0,0 +1,146 @@
+"""Offer ingestion: a round trip per offer vs the batched repositories.
+
+Generates search-sized batches of offers (16 stores x PRODUCTS models, a
+fifth of the prices changing between searches) and writes each search in
+one transaction, two ways:
+
+1. row by row: per offer, insert the product, look up its id and current
+   price, upsert the offer, insert a history row if the price moved
+2. save_offers(): multi-row INSERT ... ON CONFLICT in batches, and COPY
+   for the price history on PostgreSQL
+
+The tables in the target database are DROPPED and recreated: point it at
+a scratch database. Defaults to a temporary SQLite file.
+
+Usage: python -m benchmarks.offer_ingest [dsn] [searches]
+  e.g. python -m benchmarks.offer_ingest postgresql+asyncpg://user:pw@localhost/scratch
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from src.database.models import Base, PriceHistory, Product, StoreOffer
+from src.database.repositories.base import insert
+from src.database.repositories.offers import save_offers
+from src.database.session import create_db_engine, create_schema
+from src.scrapers.ranking import model_key
+from src.scrapers.spiders.fixture import FIXTURE_STORES
+
+PRODUCTS = 40
+CHANGED = 0.2
+
+
+def search_offers(rng: random.Random, prices: dict[tuple[int, str], float]) -> list[dict]:
+    """One search's offers; about CHANGED of the known prices move."""
+    offers = []
+    for product in range(PRODUCTS):
+        for store, domain, _ in FIXTURE_STORES:
+            key = (product, store)
+            if key not in prices or rng.random() < CHANGED:
+                prices[key] = round(rng.uniform(80, 5000), 2)
+            offers.append({
+                "name": f"Sony WH-1000XM{product} שחור",
+                "source": store,
+                "price": prices[key],
+                "url": f"https://{domain}/item/{product}",
+                "size": "S",
+                "delivery_days": "1-2 ימים",
+            })
+    return offers
+
+
+async def row_by_row(session: AsyncSession, offers: list[dict]) -> None:
+    seen_at = datetime.now(UTC)
+    for offer in offers:
+        key = model_key(offer)
+        await session.execute(
+            insert(session, Product)
+            .values(model_key=key, name=offer["name"], size=offer["size"])
+            .on_conflict_do_nothing(index_elements=[Product.model_key])
+        )
+        product_id = await session.scalar(select(Product.id).where(Product.model_key == key))
+        old = await session.scalar(
+            select(StoreOffer.price).where(
+                StoreOffer.product_id == product_id, StoreOffer.store == offer["source"]
+            )
+        )
+        row = {
+            "product_id": product_id,
+            "store": offer["source"],
+            "price": offer["price"],
+            "url": offer["url"],
+            "delivery_days": offer["delivery_days"],
+            "seen_at": seen_at,
+        }
+        stmt = insert(session, StoreOffer).values(**row)
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[StoreOffer.product_id, StoreOffer.store],
+                set_={"price": stmt.excluded.price, "seen_at": stmt.excluded.seen_at},
+            )
+        )
+        if old != offer["price"]:
+            await session.execute(
+                insert(session, PriceHistory).values(
+                    product_id=product_id,
+                    store=offer["source"],
+                    price=offer["price"],
+                    recorded_at=seen_at,
+                )
+            )
+
+
+async def run(engine: AsyncEngine, write, searches: int) -> tuple[list[float], int]:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await create_schema(engine)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    rng = random.Random(24)
+    prices: dict[tuple[int, str], float] = {}
+    latencies = []
+    for _ in range(searches):
+        offers = search_offers(rng, prices)
+        started = time.perf_counter()
+        async with sessions() as session, session.begin():
+            await write(session, offers)
+        latencies.append(time.perf_counter() - started)
+    async with sessions() as session:
+        history = await session.scalar(select(func.count()).select_from(PriceHistory))
+    return latencies, history
+
+
+async def main(dsn: str, searches: int) -> None:
+    engine = create_db_engine(dsn)
+    print(f"{engine.dialect.name}: {searches} searches x {PRODUCTS * len(FIXTURE_STORES)} offers")
+    baseline = None
+    for name, write in (("row by row", row_by_row), ("save_offers", save_offers)):
+        latencies, history = await run(engine, write, searches)
+        first, rest = latencies[0], latencies[1:]
+        median = statistics.median(rest)
+        baseline = baseline or median
+        print(
+            f"  {name:<12} first {first * 1e3:7.1f} ms   then p50 {median * 1e3:7.1f} ms"
+            f"  ({baseline / median:4.1f}x)   history rows {history}"
+        )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    default = f"sqlite+aiosqlite:///{Path(tempfile.mkdtemp()) / 'offer_ingest.sqlite3'}"
+    asyncio.run(
+        main(
+            sys.argv[1] if len(sys.argv) > 1 else default,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+        )
+    )
@@ -0,0 +1,104 @@
+"""Search latency with and without the background price refresher.
+
+Replays a Zipf-distributed query stream (a few queries searched a lot, a
+long tail searched rarely) against the fixture stores through SearchCache,
+on a compressed clock: cache TTLs of seconds instead of minutes. Each
+search is recorded like the Telegram handler does. Reports latency
+percentiles after a warm-up, how searches were served, and the
+refresher's per-store work.
+
+Usage: python -m benchmarks.price_refresh [seconds]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+from src.cache.refresher import PriceRefresher
+from src.cache.search_cache import SearchCache
+from src.scrapers.engine import SearchEngine, SearchResult
+from src.scrapers.spiders.fixture import build_fixture_adapters
+
+QUERIES = 120
+ZIPF_S = 1.1
+SEARCHES_PER_SECOND = 60
+WARMUP = 10.0
+# Anything slower waited for at least one store
+LIVE = 0.05
+TTL = 3.0
+STALE_TTL = 1.0
+
+
+def percentile(values: list[float], q: float) -> float:
+    return sorted(values)[int(len(values) * q) - 1]
+
+
+async def run(seconds: float, refresh: bool) -> None:
+    engine = SearchEngine(
+        build_fixture_adapters(),
+        global_concurrency=512,
+        per_store_concurrency=64,
+        store_timeout=2.5,
+        deadline=3.0,
+    )
+
+    async def loader(query: str, location: str) -> SearchResult:
+        return await engine.search(query, location)
+
+    cache = SearchCache(None, loader, ttl=TTL, stale_ttl=STALE_TTL)
+    refresher = PriceRefresher(
+        cache, engine, tick_seconds=0.5, half_life=30.0, min_score=2.0, top_queries=120,
+        refresh_at=0.7, store_budget=3600.0,
+    )
+    if refresh:
+        refresher.start()
+
+    rng = random.Random(23)
+    weights = [1 / (rank + 1) ** ZIPF_S for rank in range(QUERIES)]
+    latencies: list[float] = []
+
+    async def search(query: str) -> None:
+        refresher.record(query)
+        started = time.perf_counter()
+        await cache.get_or_fetch(query)
+        if time.perf_counter() - began > WARMUP:
+            latencies.append(time.perf_counter() - started)
+
+    began = time.perf_counter()
+    tasks = []
+    while time.perf_counter() - began < seconds:
+        query = f"אוזניות {rng.choices(range(QUERIES), weights)[0]}"
+        tasks.append(asyncio.create_task(search(query)))
+        await asyncio.sleep(rng.expovariate(SEARCHES_PER_SECOND))
+    await asyncio.gather(*tasks)
+    await refresher.close()
+
+    stats = cache.stats
+    name = "with refresher" if refresh else "cache only"
+    print(
+        f"{name:<15} p50 {statistics.median(latencies) * 1e3:6.1f} ms"
+        f"   p95 {percentile(latencies, 0.95) * 1e3:6.1f} ms"
+        f"   p99 {percentile(latencies, 0.99) * 1e3:6.1f} ms"
+        f"   ({len(latencies)} searches after warm-up,"
+        f" {sum(t > LIVE for t in latencies) / len(latencies):.1%} scraped live)"
+    )
+    print(
+        f"{'':<15} hits {stats.local_hits}  stale {stats.stale_hits}  misses {stats.misses}"
+        f"  coalesced {stats.coalesced}  fan-outs {stats.fetches}"
+    )
+    if refresh:
+        print(f"{'':<15} refresher {refresher.stats.snapshot()}")
+
+
+async def main(seconds: float) -> None:
+    await run(seconds, refresh=False)
+    print()
+    await run(seconds, refresh=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 60.0))
@@ -0,0 +1,101 @@
+"""Rate limiter cost: GCRA (one float per user) vs the old timestamp-list middleware.
+
+The legacy check below is the pre-GCRA RateLimitMiddleware logic, kept here
+verbatim for comparison. Each of N synthetic users sends a few messages;
+reports per-message time and the memory held once all users have been seen.
+
+Usage: python -m benchmarks.rate_limit [users]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gc
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+
+from src.telegram.middleware.rate_limit import InMemoryRateLimiter
+
+MAX_REQUESTS = 15
+WINDOW_SECONDS = 60.0
+MESSAGES_PER_USER = 3
+
+
+class LegacyLimiter:
+    def __init__(self) -> None:
+        # {user_id: list of timestamps}
+        self._requests: dict[int, list[float]] = {}
+
+    async def allow(self, user_id: int) -> bool:
+        now = time.monotonic()
+
+        # Clean old entries
+        if user_id in self._requests:
+            self._requests[user_id] = [
+                t for t in self._requests[user_id]
+                if now - t < WINDOW_SECONDS
+            ]
+        else:
+            self._requests[user_id] = []
+
+        if len(self._requests[user_id]) >= MAX_REQUESTS:
+            return False
+
+        self._requests[user_id].append(now)
+        return True
+
+
+async def run(limiter: LegacyLimiter | InMemoryRateLimiter, users: int) -> float:
+    started = time.perf_counter()
+    for _ in range(MESSAGES_PER_USER):
+        for user_id in range(users):
+            await limiter.allow(user_id)
+    return time.perf_counter() - started
+
+
+async def measure(
+    name: str, make: Callable[[], LegacyLimiter | InMemoryRateLimiter], users: int
+) -> None:
+    elapsed = await run(make(), users)
+
+    gc.collect()
+    tracemalloc.start()
+    limiter = make()
+    await run(limiter, users)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_message = elapsed / (users * MESSAGES_PER_USER) * 1e6
+    print(f"{name:<8} {per_message:6.2f} us/message   {current / 2**20:7.1f} MiB held")
+
+
+async def measure_sweep(users: int) -> None:
+    """Idle users cost nothing once the sweeper has run."""
+    limiter = InMemoryRateLimiter(MAX_REQUESTS, window=0.5, sweep_interval=60.0)
+    await run(limiter, users)
+    before = len(limiter)
+    await asyncio.sleep(0.6)
+    started = time.perf_counter()
+    await limiter._sweep()
+    elapsed = time.perf_counter() - started
+    print(f"sweep    {before:,} -> {len(limiter):,} users in {elapsed:.2f}s (after idle)")
+
+
+async def check_limit() -> None:
+    limiter = InMemoryRateLimiter(MAX_REQUESTS, WINDOW_SECONDS, sweep_interval=60.0)
+    allowed = [await limiter.allow(1) for _ in range(MAX_REQUESTS + 5)]
+    assert allowed == [True] * MAX_REQUESTS + [False] * 5, allowed
+
+
+async def main(users: int) -> None:
+    await check_limit()
+    print(f"{users:,} users x {MESSAGES_PER_USER} messages")
+    await measure("legacy", LegacyLimiter, users)
+    await measure("gcra", lambda: InMemoryRateLimiter(MAX_REQUESTS, WINDOW_SECONDS, 60.0), users)
+    await measure_sweep(users)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000))
@@ -0,0 +1,49 @@
+"""Offline load test for the multi-store search engine.
+
+Runs concurrent searches against the fixture stores, with a couple of stores
+made artificially slow, and reports latency percentiles and store coverage.
+
+Usage: python -m benchmarks.search_load [concurrent_searches]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import statistics
+import sys
+import time
+
+from src.scrapers.engine import SearchEngine
+from src.scrapers.spiders.fixture import build_fixture_adapters
+
+SLOW_STORES = {"Amazon IL": 8.0, "Home Center": 5.0}
+
+
+async def main(concurrent: int) -> None:
+    engine = SearchEngine(
+        build_fixture_adapters(latency_overrides=SLOW_STORES),
+        global_concurrency=4096,
+        per_store_concurrency=256,
+        store_timeout=2.5,
+        deadline=3.0,
+    )
+
+    async def one() -> tuple[float, int]:
+        started = time.monotonic()
+        result = await engine.search("אייפון 15 פרו")
+        return time.monotonic() - started, len(result.stores) - len(result.timed_out)
+
+    runs = await asyncio.gather(*(one() for _ in range(concurrent)))
+    latencies = sorted(r[0] for r in runs)
+    answered = [r[1] for r in runs]
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0]
+    print(f"stores:     {len(engine.stores)} ({len(SLOW_STORES)} slow)")
+    print(f"searches:   {concurrent}")
+    print(f"p50:        {statistics.median(latencies):.3f}s")
+    print(f"p95:        {p95:.3f}s")
+    print(f"max:        {latencies[-1]:.3f}s")
+    print(f"answered:   {min(answered)}-{max(answered)} stores per search")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
@@ -0,0 +1,121 @@
+"""Bytes per in-memory Shufi session: the old layout vs the compact one.
+
+Builds N synthetic sessions (mixed stages, 0-10 history messages of Hebrew
+text) in three layouts and measures each with tracemalloc:
+
+- legacy: plain dataclass + list of LangChain HumanMessage/AIMessage
+- compact: slotted UserSession with a (role, text) tuple history
+- zlib: compact sessions as stored with SESSION_COMPRESS=true
+
+Usage: python -m benchmarks.session_memory [sessions]
+"""
+
+from __future__ import annotations
+
+import gc
+import random
+import sys
+import time
+import tracemalloc
+import zlib
+from dataclasses import dataclass, field
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from src.agents.session import AI, HUMAN, ConvState, UserSession, dump_session, load_session
+
+USER_TEXTS = ["היי", "אוזניות", "סוני", "עד 500", "איכות", "מה אתה ממליץ?", "זה יקר לי", "חיפה"]
+AI_TEXTS = [
+    "יופי, אוזניות! יש לי גישה ל-15+ חנויות.\nאיזה מותג או דגם מעניין אותך?",
+    "מה התקציב שלך לאוזניות של סוני? ככה אוכל למצוא בדיוק מה שמתאים.",
+    "מה הכי חשוב לך? איכות, מחיר נמוך, או מותג מסוים?",
+    "אני מתמחה רק בקניות והשוואת מחירים.\nמה תרצה לחפש?",
+]
+
+
+@dataclass
+class LegacySession:
+    state: ConvState = ConvState.IDLE
+    product_query: str = ""
+    brand: str = ""
+    budget: str = ""
+    priority: str = ""
+    location: str = ""
+    is_specific: bool = False
+    messages: list[BaseMessage] = field(default_factory=list)
+
+
+def _copy(text: str) -> str:
+    # A fresh string per session, as text arriving from Telegram would be
+    return (text + " ")[:-1]
+
+
+def synthetic(rng: random.Random) -> tuple[dict, list[tuple[str, str]]]:
+    slots = {
+        "state": rng.choice(list(ConvState)),
+        "product_query": _copy(rng.choice(USER_TEXTS)),
+        "brand": _copy("סוני") if rng.random() < 0.5 else "",
+        "budget": _copy("500") if rng.random() < 0.3 else "",
+    }
+    history = [
+        (HUMAN, _copy(rng.choice(USER_TEXTS))) if i % 2 == 0 else (AI, _copy(rng.choice(AI_TEXTS)))
+        for i in range(rng.randint(0, 10))
+    ]
+    return slots, history
+
+
+def legacy(slots: dict, history: list[tuple[str, str]]) -> LegacySession:
+    return LegacySession(
+        **slots,
+        messages=[
+            HumanMessage(content=text) if role == HUMAN else AIMessage(content=text)
+            for role, text in history
+        ],
+    )
+
+
+def compact(slots: dict, history: list[tuple[str, str]]) -> UserSession:
+    session = UserSession(**slots)
+    for role, text in history:
+        session.add_message(role, text)
+    return session
+
+
+def compressed(slots: dict, history: list[tuple[str, str]]) -> bytes:
+    return zlib.compress(dump_session(compact(slots, history)))
+
+
+def measure(build, count: int) -> tuple[float, list]:
+    """Traced bytes per session, text included (every layout gets the same sessions)."""
+    rng = random.Random(19)
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    built = [build(*synthetic(rng)) for _ in range(count)]
+    gc.collect()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Exclude the list holding the sessions
+    return (used - base - sys.getsizeof(built)) / count, built
+
+
+def main(count: int) -> None:
+    results = {}
+    for name, build in (("legacy", legacy), ("compact", compact), ("zlib", compressed)):
+        per_session, built = measure(build, count)
+        results[name] = per_session
+        total_mib = per_session * count / 2**20
+        print(f"{name:<8} {per_session:8.0f} bytes/session  ({total_mib:6.1f} MiB)")
+        if name == "zlib":
+            started = time.perf_counter()
+            for raw in built[:10_000]:
+                zlib.compress(dump_session(load_session(zlib.decompress(raw))))
+            round_trip = (time.perf_counter() - started) / min(count, 10_000) * 1e6
+        del built
+    print(f"\ncompact: {results['legacy'] / results['compact']:.1f}x smaller than legacy")
+    print(f"zlib:    {results['legacy'] / results['zlib']:.1f}x smaller than legacy")
+    print(f"zlib load + store per message: {round_trip:.1f} us")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
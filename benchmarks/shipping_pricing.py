@@ -0,0 +1,75 @@
+"""Benchmark: vectorized batch shipping pricing vs one offer at a time.
+
+Two views: the pure array core (total_costs on NumPy arrays, what a columnar
+offer pipeline pays) and the dict path (price_offers on offer dicts, which
+also pays for reading/writing Python dicts).
+
+Usage: python -m benchmarks.shipping_pricing
+"""
+
+from __future__ import annotations
+
+import random
+import timeit
+
+import numpy as np
+
+from src.logistics.pricing import (
+    SIZE_CLASSES,
+    price_offers,
+    shipping_cost,
+    size_codes,
+    total_costs,
+)
+
+
+def _offers(n: int) -> list[dict]:
+    rng = random.Random(n)
+    return [
+        {
+            "price": round(rng.uniform(50, 5000), 2),
+            "distance_km": rng.uniform(0, 120),
+            "size": rng.choice(SIZE_CLASSES),
+        }
+        for _ in range(n)
+    ]
+
+
+def _one_at_a_time(offers: list[dict]) -> None:
+    for offer in offers:
+        offer["shipping_cost"] = shipping_cost(offer["distance_km"], offer["size"])
+        offer["total_cost"] = offer["price"] + offer["shipping_cost"]
+
+
+def _row(label: str, n: int, scalar: float, batch: float) -> None:
+    print(
+        f"{label:<6} {n:>7} offers   scalar {scalar * 1e3:8.3f} ms"
+        f"   batch {batch * 1e3:8.3f} ms   x{scalar / batch:.1f}"
+    )
+
+
+def main() -> None:
+    for n in (50, 500, 5_000, 100_000):
+        offers = _offers(n)
+        number = max(1, 200_000 // n)
+
+        prices = np.array([o["price"] for o in offers])
+        distances = np.array([o["distance_km"] for o in offers])
+        sizes = [o["size"] for o in offers]
+        codes = size_codes(sizes)
+        rows = list(zip(prices.tolist(), distances.tolist(), sizes))
+
+        def scalar_arrays() -> list[float]:
+            return [p + shipping_cost(d, s) for p, d, s in rows]
+
+        scalar = timeit.timeit(scalar_arrays, number=number) / number
+        batch = timeit.timeit(lambda: total_costs(prices, distances, codes), number=number) / number
+        _row("arrays", n, scalar, batch)
+
+        scalar = timeit.timeit(lambda: _one_at_a_time(offers), number=number) / number
+        batch = timeit.timeit(lambda: price_offers(offers), number=number) / number
+        _row("dicts", n, scalar, batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Store fetch layer against a local mock store that throttles.
+
+The mock store (local HTTP server, no network) answers a search in ~40 ms
+plus 10 ms per request already in flight, and returns 429 above
+CAPACITY concurrent requests. Three runs:
+
+1. fixed concurrency (plain pooled client, N at once) vs the AIMD limit:
+   429s taken, throughput, where the limit settled
+2. a store that always answers 429: how long a search spends on it
+   once its circuit breaker opens
+3. repeated identical requests: how many come back 304 (ETag)
+
+Usage: python -m benchmarks.store_fetch [requests]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from src.scrapers.utils.fetch import FetchError, StoreFetcher
+
+CAPACITY = 6
+CLIENT_CONCURRENCY = 32
+
+_lock = threading.Lock()
+_in_flight = 0
+
+
+class MockStore(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        global _in_flight
+        if self.path.startswith("/blocked"):
+            return self._answer(429)
+        with _lock:
+            _in_flight += 1
+            load = _in_flight
+        try:
+            if load > CAPACITY:
+                return self._answer(429)
+            time.sleep(0.04 + 0.01 * load)
+            etag = '"catalog-v1"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._answer(304, etag=etag)
+            self._answer(200, b'{"offers": []}', etag=etag)
+        finally:
+            with _lock:
+                _in_flight -= 1
+
+    def _answer(self, status: int, body: bytes = b"", etag: str | None = None) -> None:
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def fetcher() -> StoreFetcher:
+    return StoreFetcher(http2=False, timeout=5.0, max_concurrency=CLIENT_CONCURRENCY)
+
+
+async def fixed(base: str, requests: int) -> tuple[float, int]:
+    limit = asyncio.Semaphore(CLIENT_CONCURRENCY)
+    throttled = 0
+    async with httpx.AsyncClient() as client:
+
+        async def one(i: int) -> None:
+            nonlocal throttled
+            async with limit:
+                response = await client.get(f"{base}/search", params={"q": i})
+                throttled += response.status_code == 429
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+    return time.perf_counter() - started, throttled
+
+
+async def adaptive(base: str, requests: int) -> tuple[float, int, list[int]]:
+    store = fetcher()
+    throttled = 0
+    limits: list[int] = []
+
+    async def one(i: int) -> None:
+        nonlocal throttled
+        try:
+            await store.get(f"{base}/search", params={"q": i})
+        except FetchError:
+            throttled += 1
+        limits.append(store.limit(base))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    await store.close()
+    return elapsed, throttled, limits
+
+
+async def blocked(base: str, searches: int) -> tuple[float, Counter[str]]:
+    store = fetcher()
+    outcomes: Counter[str] = Counter()
+    started = time.perf_counter()
+    for _ in range(searches):
+        try:
+            await store.get(f"{base}/blocked")
+        except FetchError as e:
+            outcomes[type(e).__name__] += 1
+    elapsed = time.perf_counter() - started
+    await store.close()
+    return elapsed, outcomes
+
+
+async def conditional(base: str, repeats: int) -> int:
+    store = fetcher()
+    for _ in range(repeats):
+        response = await store.get(f"{base}/search", params={"q": "אוזניות"})
+        assert response.status_code == 200
+    not_modified = store.stats()["127.0.0.1"].not_modified
+    await store.close()
+    return not_modified
+
+
+async def main(requests: int) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockStore)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    try:
+        elapsed, throttled = await fixed(base, requests)
+        ok = requests - throttled
+        print(f"fixed {CLIENT_CONCURRENCY:<3} ok {ok:4}/{requests}  {ok / elapsed:4.0f} ok/s")
+        elapsed, throttled, limits = await adaptive(base, requests)
+        ok = requests - throttled
+        print(f"AIMD      ok {ok:4}/{requests}  {ok / elapsed:4.0f} ok/s", end="   ")
+        print(f"limit {limits[0]} -> {limits[-1]} (max {max(limits)}, server capacity {CAPACITY})")
+
+        elapsed, outcomes = await blocked(base, 50)
+        print(f"\nalways-429 store, 50 searches: {elapsed * 1e3:.0f} ms total, {dict(outcomes)}")
+        print(f"ETag revalidation, 20 repeats: {await conditional(base, 20)} answered 304")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 600))
@@ -0,0 +1,85 @@
+"""Telegram API calls per search: per-product layout vs compact layout.
+
+Drives the search handler's presentation step against a fake chat that
+counts sendMessage / editMessageText calls. The fake chat answers the 3rd
+send with a flood wait, to show the send queue waiting it out.
+
+Usage: python -m benchmarks.telegram_sends
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("CACHE_ENABLED", "false")
+
+from aiogram.exceptions import TelegramRetryAfter  # noqa: E402
+
+from src.agents.sales_agent import SearchRequest  # noqa: E402
+from src.config import get_settings  # noqa: E402
+from src.telegram.handlers import search  # noqa: E402
+from src.telegram.outbox import get_outbox  # noqa: E402
+
+FLOOD_AT_SEND = 3
+FLOOD_WAIT = 1
+
+
+class FakeChat:
+    def __init__(self) -> None:
+        self.sends = 0
+        self.edits = 0
+        self.floods = 0
+
+    def message(self) -> FakeMessage:
+        return FakeMessage(self)
+
+
+class FakeMessage:
+    def __init__(self, chat: FakeChat) -> None:
+        self._chat = chat
+        self.chat = SimpleNamespace(id=1)
+        self.text = ""
+
+    async def answer(self, text: str, reply_markup: object = None) -> FakeMessage:
+        self._chat.sends += 1
+        if self._chat.sends == FLOOD_AT_SEND and not self._chat.floods:
+            self._chat.floods += 1
+            raise TelegramRetryAfter(method=None, message="Flood control", retry_after=FLOOD_WAIT)
+        sent = FakeMessage(self._chat)
+        sent.text = text
+        return sent
+
+    async def edit_text(self, text: str, reply_markup: object = None) -> None:
+        self._chat.edits += 1
+
+
+async def run(stream: bool, compact: bool) -> None:
+    os.environ["TELEGRAM_STREAM_RESULTS"] = str(stream).lower()
+    os.environ["TELEGRAM_COMPACT_RESULTS"] = str(compact).lower()
+    get_settings.cache_clear()
+
+    chat = FakeChat()
+    started = time.monotonic()
+    products = await search._present(chat.message(), SearchRequest("אוזניות", "חיפה"))
+    elapsed = time.monotonic() - started
+    layout = "compact" if compact else "per-product"
+    mode = "stream" if stream else "batch"
+    print(
+        f"{layout:<12} {mode:<7} results={len(products)} sends={chat.sends:<2} "
+        f"edits={chat.edits:<2} flood_waits={chat.floods} {elapsed:.2f}s"
+    )
+
+
+async def main() -> None:
+    for stream in (False, True):
+        for compact in (False, True):
+            await run(stream, compact)
+    stats = get_outbox().stats
+    print(f"send queue: sent={stats.sent} retried={stats.retried} failed={stats.failed}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,228 @@
+"""LLM budget governor -- daily spend tracking and automatic degradation.
+
+Every LLM call's input/output tokens (from the response usage_metadata) are
+priced and added to today's totals (Israel date): in memory, and in Redis
+when LLM_BUDGET_BACKEND=redis so all workers share one budget.
+
+Against settings.daily_budget_usd:
+- below budget_warning_threshold: LLM on every turn
+- from the warning threshold: LLM only for open chat, where the rule-based
+  reply is weakest; structured questions use the fallback templates
+- from budget_block_threshold: no LLM calls at all
+
+A semaphore caps concurrent calls (LLM_MAX_CONCURRENCY). A turn that cannot
+get a slot within LLM_QUEUE_TIMEOUT uses the fallback instead of waiting.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from enum import Enum
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from langchain_core.messages import AIMessage
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.cache.client import get_redis
+from src.config import get_settings
+from src.monitoring.discord_logger import log_budget_alert
+from src.monitoring.metrics import LLM_COST_USD, LLM_DEGRADED, LLM_TOKENS
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "llm_budget:v1:"
+# Other workers' spend is picked up at least this often
+SYNC_INTERVAL = 30.0
+_TZ = ZoneInfo("Asia/Jerusalem")
+
+# USD per 1M tokens (input, output)
+MODEL_PRICES: dict[str, tuple[float, float]] = {
+    "claude-sonnet-4-6": (3.0, 15.0),
+    "claude-opus-4-6": (15.0, 75.0),
+    "claude-haiku-4-5": (1.0, 5.0),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+DEFAULT_PRICE = MODEL_PRICES["claude-sonnet-4-6"]
+
+_INPUT_TOKENS = LLM_TOKENS.labels(direction="input")
+_OUTPUT_TOKENS = LLM_TOKENS.labels(direction="output")
+_DEGRADED_BUDGET = LLM_DEGRADED.labels(reason="budget")
+_DEGRADED_BUSY = LLM_DEGRADED.labels(reason="busy")
+
+
+class BudgetLevel(Enum):
+    OK = "ok"
+    WARNING = "warning"
+    BLOCKED = "blocked"
+
+
+@dataclass
+class DailyUsage:
+    day: str
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+
+
+def _today() -> str:
+    return datetime.now(_TZ).date().isoformat()
+
+
+class BudgetGovernor:
+    """Decides whether a turn may use the LLM, and accounts for the calls that do."""
+
+    def __init__(
+        self,
+        *,
+        daily_budget_usd: float,
+        warning_threshold: float,
+        block_threshold: float,
+        max_concurrency: int,
+        queue_timeout: float,
+        redis: Redis | None = None,
+    ) -> None:
+        self._budget = daily_budget_usd
+        self._warning_at = daily_budget_usd * warning_threshold
+        self._block_at = daily_budget_usd * block_threshold
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._queue_timeout = queue_timeout
+        self._redis = redis
+        self._usage = DailyUsage(_today())
+        # Spend across all workers, as of the last Redis read or write
+        self._shared_cost = 0.0
+        self._synced_at = 0.0
+        self._alerted = BudgetLevel.OK
+
+    @property
+    def usage(self) -> DailyUsage:
+        self._roll_day()
+        return self._usage
+
+    @property
+    def spent_usd(self) -> float:
+        self._roll_day()
+        return max(self._usage.cost_usd, self._shared_cost)
+
+    def level(self) -> BudgetLevel:
+        spent = self.spent_usd
+        if spent >= self._block_at:
+            return BudgetLevel.BLOCKED
+        if spent >= self._warning_at:
+            return BudgetLevel.WARNING
+        return BudgetLevel.OK
+
+    async def allows(self, essential: bool) -> bool:
+        """May this turn call the LLM? Non-essential turns stop at the warning threshold."""
+        await self._maybe_sync()
+        level = self.level()
+        allowed = level is BudgetLevel.OK or (level is BudgetLevel.WARNING and essential)
+        if not allowed:
+            _DEGRADED_BUDGET.inc()
+        return allowed
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[bool]:
+        """Hold one concurrency slot; yields False if none frees up within queue_timeout."""
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self._queue_timeout)
+        except TimeoutError:
+            _DEGRADED_BUSY.inc()
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            self._slots.release()
+
+    async def record(self, response: AIMessage, model: str) -> None:
+        """Account for one completed call."""
+        usage = response.usage_metadata
+        input_tokens = usage["input_tokens"] if usage else 0
+        output_tokens = usage["output_tokens"] if usage else 0
+        price_in, price_out = MODEL_PRICES.get(model, DEFAULT_PRICE)
+        cost = (input_tokens * price_in + output_tokens * price_out) / 1_000_000
+
+        self._roll_day()
+        self._usage.calls += 1
+        self._usage.input_tokens += input_tokens
+        self._usage.output_tokens += output_tokens
+        self._usage.cost_usd += cost
+        _INPUT_TOKENS.inc(input_tokens)
+        _OUTPUT_TOKENS.inc(output_tokens)
+        LLM_COST_USD.inc(cost)
+
+        await self._redis_add(input_tokens, output_tokens, cost)
+        await self._maybe_alert()
+
+    def _roll_day(self) -> None:
+        today = _today()
+        if self._usage.day != today:
+            logger.info("LLM usage for %s: %s", self._usage.day, asdict(self._usage))
+            self._usage = DailyUsage(today)
+            self._shared_cost = 0.0
+            self._alerted = BudgetLevel.OK
+
+    async def _redis_add(self, input_tokens: int, output_tokens: int, cost: float) -> None:
+        if self._redis is None:
+            return
+        key = f"{KEY_PREFIX}{self._usage.day}"
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.hincrbyfloat(key, "cost_usd", cost)
+                pipe.hincrby(key, "calls", 1)
+                pipe.hincrby(key, "input_tokens", input_tokens)
+                pipe.hincrby(key, "output_tokens", output_tokens)
+                pipe.expire(key, 2 * 86400)
+                total, *_ = await pipe.execute()
+        except RedisError:
+            logger.warning("LLM budget update failed", exc_info=True)
+            return
+        self._shared_cost = float(total)
+        self._synced_at = time.monotonic()
+
+    async def _maybe_sync(self) -> None:
+        if self._redis is None or time.monotonic() - self._synced_at < SYNC_INTERVAL:
+            return
+        self._roll_day()
+        self._synced_at = time.monotonic()
+        try:
+            total = await self._redis.hget(f"{KEY_PREFIX}{self._usage.day}", "cost_usd")
+        except RedisError:
+            logger.warning("LLM budget read failed", exc_info=True)
+            return
+        self._shared_cost = float(total or 0.0)
+
+    async def _maybe_alert(self) -> None:
+        level = self.level()
+        if level is BudgetLevel.OK or level is self._alerted:
+            return
+        self._alerted = level
+        logger.warning("LLM budget %s: $%.2f of $%.2f", level.value, self.spent_usd, self._budget)
+        await log_budget_alert(level.value, self.spent_usd, self._budget)
+
+
+def create_budget_governor() -> BudgetGovernor:
+    settings = get_settings()
+    return BudgetGovernor(
+        daily_budget_usd=settings.daily_budget_usd,
+        warning_threshold=settings.budget_warning_threshold,
+        block_threshold=settings.budget_block_threshold,
+        max_concurrency=settings.llm.llm_max_concurrency,
+        queue_timeout=settings.llm.llm_queue_timeout,
+        redis=get_redis() if settings.llm.llm_budget_backend == "redis" else None,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_budget_governor() -> BudgetGovernor:
+    """Cached singleton shared by every SalesAgent in the process."""
+    return create_budget_governor()
@@ -0,0 +1,240 @@
+"""Single-pass keyword entity extraction for Shufi.
+
+All vocabularies (brands, categories, cities, greetings, ...) are compiled
+once at import into one Aho-Corasick automaton. A message is scanned once
+and every hit comes back with its kind and span.
+
+Matching rules:
+- Whole words only: a hit must not be glued to other letters. Digits do
+  count as a boundary, so "iphone15" still finds "iphone".
+- Hebrew prefix letters (ב/ל/מ/ה/ו/ש, up to 3, e.g. "ושבתל אביב") may precede a hit.
+- Categories also accept the plural suffixes ים/ות ("טלפונים"). Hebrew final
+  letters (ך ם ן ף ץ) are folded to their regular forms before matching.
+- When several hits of a kind exist, the longest wins, then the leftmost,
+  so the result never depends on set iteration order.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import deque
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+
+BRANDS = {
+    "אייפון", "iphone", "סמסונג", "samsung", "galaxy", "גלקסי",
+    "שיאומי", "xiaomi", "redmi", "poco", "וואווי", "huawei",
+    "sony", "סוני", "jbl", "bose", "apple", "אפל",
+    "lg", "אל ג'י", "lenovo", "לנובו", "dell", "דל",
+    "asus", "אסוס", "hp", "acer", "איסר",
+    "dyson", "דייסון", "philips", "פיליפס", "bosch", "בוש",
+    "nikon", "ניקון", "canon", "קנון", "gopro",
+    "nintendo", "נינטנדו", "playstation", "ps5", "xbox",
+    "airpods", "אירפודס", "macbook", "מקבוק", "ipad", "אייפד",
+}
+
+GENERIC_CATEGORIES = {
+    "טלפון", "פלאפון", "נייד", "סלולרי",
+    "אוזניות", "אוזניה", "רמקול", "רמקולים",
+    "טלוויזיה", "טלויזיה", "מסך", "מחשב", "לפטופ",
+    "מקרר", "מכונת כביסה", "מדיח", "מייבש", "תנור", "מיקרוגל",
+    "שואב אבק", "מזגן", "מאוורר",
+    "מצלמה", "שעון חכם", "טאבלט",
+    "קונסולה", "משחק", "אופניים", "קורקינט",
+}
+
+ISRAELI_CITIES = {
+    "תל אביב", "ירושלים", "חיפה", "באר שבע", "אשדוד", "אשקלון",
+    "נתניה", "חולון", "בת ים", "רמת גן", "פתח תקווה", "ראשון לציון",
+    "הרצליה", "רעננה", "כפר סבא", "הוד השרון", "רחובות", "נס ציונה",
+    "לוד", "רמלה", "מודיעין", "עפולה", "נצרת", "טבריה", "אילת",
+    "קריית שמונה", "קריית גת", "דימונה", "ערד", "צפת",
+    "מרכז", "צפון", "דרום", "שרון", "גוש דן", "שפלה", "נגב",
+}
+
+GREETINGS = {"היי", "הי", "שלום", "בוקר טוב", "ערב טוב", "מה נשמע", "מה קורה", "אהלן"}
+OFF_TOPIC = {"פוליטיקה", "ממשלה", "דת", "אלוהים", "בחירות", "מלחמה", "כדורגל"}
+PRICE_WORDS = {"יקר", "זול", "מחיר", "עולה", "עולות", "עולים", "תקציב", "כסף"}
+MODEL_WORDS = {"פרו", "pro", "max", "ultra", "plus", "lite", "mini"}
+
+BRAND = "brand"
+CATEGORY = "category"
+CITY = "city"
+GREETING = "greeting"
+OFF_TOPIC_WORD = "off_topic"
+PRICE_WORD = "price"
+MODEL_WORD = "model"
+
+VOCABULARY: dict[str, set[str]] = {
+    BRAND: BRANDS,
+    CATEGORY: GENERIC_CATEGORIES,
+    CITY: ISRAELI_CITIES,
+    GREETING: GREETINGS,
+    OFF_TOPIC_WORD: OFF_TOPIC,
+    PRICE_WORD: PRICE_WORDS,
+    MODEL_WORD: MODEL_WORDS,
+}
+
+HEBREW_PREFIXES = frozenset("בלמהוש")
+MAX_PREFIX_LETTERS = 3
+# Position-preserving: same length in and out, so spans stay valid
+_FOLD_FINALS = str.maketrans("ךםןףץ", "כמנפצ")
+PLURAL_SUFFIXES: dict[str, tuple[str, ...]] = {
+    CATEGORY: tuple(s.translate(_FOLD_FINALS) for s in ("ים", "ות")),
+}
+
+_NUMBER = re.compile(r"\d[\d,]*")
+
+
+@dataclass(frozen=True, slots=True)
+class Match:
+    kind: str
+    keyword: str
+    start: int
+    end: int
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over (kind, keyword) pairs."""
+
+    def __init__(self, vocabulary: Mapping[str, Iterable[str]]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[str, str]]] = [[]]
+
+        for kind, keywords in vocabulary.items():
+            for keyword in keywords:
+                self._add(kind, keyword.lower())
+        self._link()
+
+    def _add(self, kind: str, keyword: str) -> None:
+        node = 0
+        for char in keyword.translate(_FOLD_FINALS):
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((kind, keyword))
+
+    def _link(self) -> None:
+        """Breadth-first fail links, then fold them into a full transition table.
+
+        Outputs are merged along fail links and every (node, char) transition is
+        precomputed, so scanning is one dict lookup per character.
+        """
+        alphabet = set().union(*(edges.keys() for edges in self._goto))
+        order = []
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+        # Parents come before children in BFS order, so fail targets are complete
+        self._delta: list[dict[str, int]] = [dict(self._goto[0])] + [{}] * (len(self._goto) - 1)
+        for node in order:
+            fallback = self._delta[self._fail[node]]
+            self._delta[node] = {
+                char: self._goto[node].get(char, fallback.get(char, 0)) for char in alphabet
+            }
+            # Drop transitions back to the root; .get(char, 0) covers them
+            self._delta[node] = {c: n for c, n in self._delta[node].items() if n}
+
+    def scan(self, text: str) -> list[Match]:
+        """All whole-word hits in text (already lowercased), in end-position order."""
+        delta, out = self._delta, self._out
+        text = text.translate(_FOLD_FINALS)
+        matches: list[Match] = []
+        node = 0
+        for end, char in enumerate(text, 1):
+            node = delta[node].get(char, 0)
+            if not out[node]:
+                continue
+            for kind, keyword in out[node]:
+                start = end - len(keyword)
+                if not _starts_word(text, start):
+                    continue
+                stop = _ends_word(text, end, PLURAL_SUFFIXES.get(kind, ()))
+                if stop is not None:
+                    matches.append(Match(kind, keyword, start, stop))
+        return matches
+
+
+def _starts_word(text: str, start: int) -> bool:
+    i = start
+    while i > 0 and start - i < MAX_PREFIX_LETTERS and text[i - 1] in HEBREW_PREFIXES:
+        if i - 1 == 0 or not text[i - 2].isalpha():
+            return True
+        i -= 1
+    return start == 0 or not text[start - 1].isalpha()
+
+
+def _ends_word(text: str, end: int, suffixes: tuple[str, ...]) -> int | None:
+    """End of the word if the hit ends one (optionally via a suffix), else None."""
+    if end == len(text) or not text[end].isalpha():
+        return end
+    for suffix in suffixes:
+        stop = end + len(suffix)
+        if text.startswith(suffix, end) and (stop == len(text) or not text[stop].isalpha()):
+            return stop
+    return None
+
+
+@dataclass(frozen=True, slots=True)
+class Entities:
+    """Everything found in one message."""
+
+    text: str
+    matches: tuple[Match, ...]
+
+    def has(self, kind: str) -> bool:
+        return any(m.kind == kind for m in self.matches)
+
+    def best(self, kind: str) -> str | None:
+        """Longest keyword of kind, ties broken by leftmost position."""
+        hits = [m for m in self.matches if m.kind == kind]
+        if not hits:
+            return None
+        return min(hits, key=lambda m: (-len(m.keyword), m.start)).keyword
+
+    @property
+    def brand(self) -> str | None:
+        return self.best(BRAND)
+
+    @property
+    def location(self) -> str | None:
+        return self.best(CITY)
+
+    @property
+    def budget(self) -> str | None:
+        """First number in the text ('עד 1,500' -> '1500')."""
+        m = _NUMBER.search(self.text)
+        return m.group(0).replace(",", "") if m else None
+
+    @property
+    def is_specific_product(self) -> bool:
+        """Brand plus a model number or model word ("אייפון 15", "galaxy ultra")."""
+        return self.has(BRAND) and (self.budget is not None or self.has(MODEL_WORD))
+
+    @property
+    def is_generic_product(self) -> bool:
+        return self.has(CATEGORY)
+
+
+_AUTOMATON = KeywordAutomaton(VOCABULARY)
+
+
+def extract_entities(text: str) -> Entities:
+    """Scan text once for every vocabulary kind."""
+    return Entities(text=text, matches=tuple(_AUTOMATON.scan(text.lower())))
@@ -0,0 +1,67 @@
+"""Response policy -- does this turn need the LLM, or is a template enough?
+
+Most turns are clean slot filling ("סמסונג", "עד 2000", "חיפה"): the state
+machine already knows the next question and _fallback_question has it, so a
+model call only adds 1-2 s and cost. The LLM is kept for turns a template
+can't answer well: questions, objections, off-topic and free-form text.
+
+Modes per ConvState (the state the reply is asking about), overridable with
+LLM_REPLY_MODES='{"ASKING_BRAND": "llm"}':
+- auto: decide per turn (default)
+- llm: always call the LLM (the old behaviour)
+- template: never call the LLM
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from src.agents.entities import GREETING, OFF_TOPIC_WORD, PRICE_WORD, Entities
+from src.agents.session import ConvState
+from src.config import get_settings
+
+AUTO = "auto"
+LLM = "llm"
+TEMPLATE = "template"
+MODES = frozenset({AUTO, LLM, TEMPLATE})
+
+# Longer answers are treated as free-form text, not a slot value
+MAX_SLOT_WORDS = 6
+
+
+@dataclass(frozen=True)
+class ResponsePolicy:
+    modes: dict[ConvState, str] = field(default_factory=dict)
+
+    def needs_llm(self, state: ConvState, found: Entities, filled: bool) -> bool:
+        """filled: this turn gave the state machine something (a product or a slot value)."""
+        mode = self.modes.get(state, AUTO)
+        if mode != AUTO:
+            return mode == LLM
+        if _is_free_form(found):
+            return True
+        if filled:
+            return False
+        # Nothing understood: only a bare greeting has a good template
+        return not found.has(GREETING)
+
+
+def _is_free_form(found: Entities) -> bool:
+    return (
+        "?" in found.text
+        or found.has(OFF_TOPIC_WORD)
+        or found.has(PRICE_WORD)  # "יקר לי" -- objections get a real answer
+        or len(found.text.split()) > MAX_SLOT_WORDS
+    )
+
+
+def create_response_policy() -> ResponsePolicy:
+    """Policy from LLM_REPLY_MODES; unknown states or modes are configuration errors."""
+    modes: dict[ConvState, str] = {}
+    for name, mode in get_settings().llm.llm_reply_modes.items():
+        if mode not in MODES:
+            raise ValueError(f"LLM_REPLY_MODES: unknown mode {mode!r} for {name}")
+        if name not in ConvState.__members__:
+            raise ValueError(f"LLM_REPLY_MODES: unknown state {name!r}")
+        modes[ConvState[name]] = mode
+    return ResponsePolicy(modes)
@@ -0,0 +1,77 @@
+"""Memoized LLM replies for context-free turns.
+
+A turn with no conversation history is answered from the system prompt,
+the collected slots and the user's text alone, so the same opening ("מה
+אתה יודע לעשות?") gets the same kind of reply for everyone. Replies are
+kept per (prompt version, normalized text, slot snapshot): the first
+`variants` calls for a key go to the LLM and fill a small pool, later
+ones pick from it at random so a repeated opening doesn't read canned.
+
+Keys expire after a TTL; the least recently used are evicted first.
+"""
+
+from __future__ import annotations
+
+import random
+from collections.abc import Hashable
+from dataclasses import dataclass
+
+from src.cache.lru import LRUCache
+from src.config import get_settings
+from src.monitoring.metrics import LLM_REPLY_CACHE
+
+_HIT = LLM_REPLY_CACHE.labels(result="hit")
+_MISS = LLM_REPLY_CACHE.labels(result="miss")
+
+_TRIM = " .,!?־"
+
+
+def normalize_text(text: str) -> str:
+    """Case, spacing and trailing punctuation don't change the reply."""
+    return " ".join(text.lower().split()).strip(_TRIM)
+
+
+@dataclass
+class ReplyCacheStats:
+    hits: int = 0
+    misses: int = 0
+    stored: int = 0
+
+
+class ReplyCache:
+    """LRU + TTL pool of reply variants per key."""
+
+    def __init__(self, max_entries: int, ttl: float, variants: int) -> None:
+        self._entries: LRUCache[Hashable, list[str]] = LRUCache(max_entries)
+        self._ttl = ttl
+        self._variants = variants
+        self.stats = ReplyCacheStats()
+
+    def get(self, key: Hashable) -> str | None:
+        """A stored variant, or None while the key's pool is still filling."""
+        replies = self._entries.get(key)
+        if replies is None or len(replies) < self._variants:
+            self.stats.misses += 1
+            _MISS.inc()
+            return None
+        self.stats.hits += 1
+        _HIT.inc()
+        return random.choice(replies)
+
+    def add(self, key: Hashable, reply: str) -> None:
+        replies = self._entries.get(key)
+        if replies is None:
+            replies = []
+            self._entries.set(key, replies, ttl=self._ttl)
+        if len(replies) < self._variants:
+            replies.append(reply)
+            self.stats.stored += 1
+
+
+def create_reply_cache() -> ReplyCache:
+    llm = get_settings().llm
+    return ReplyCache(
+        max_entries=llm.llm_reply_cache_size,
+        ttl=llm.llm_reply_cache_ttl,
+        variants=llm.llm_reply_variants,
+    )
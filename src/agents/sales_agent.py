@@ -8,23 +8,67 @@ Conversation flow:
 - Generic product ("טלפון") -> asks brand -> budget -> priority -> search
 - Specific product ("אייפון 15 פרו") -> asks location -> search
 - Smart: detects budget/brand info even if given in wrong step
+- Clean slot-filling turns get a template reply; the LLM answers only
+  free-form turns (see agents/policy.py)
+- Replies to context-free turns (no history yet) are memoized, see
+  agents/reply_cache.py
+- LLM replies can be streamed: handle_message(on_delta=...) receives the
+  text so far after every chunk
 """
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
-import re
-from collections import defaultdict
-from dataclasses import dataclass, field
-from enum import Enum, auto
+import time
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
 
 from langchain_anthropic import ChatAnthropic
-from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
-
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    SystemMessage,
+)
+
+from src.agents.budget import BudgetGovernor, get_budget_governor
+from src.agents.entities import (
+    GREETING,
+    OFF_TOPIC_WORD,
+    PRICE_WORD,
+    Entities,
+    extract_entities,
+)
+from src.agents.policy import ResponsePolicy, create_response_policy
+from src.agents.reply_cache import ReplyCache, create_reply_cache, normalize_text
+from src.agents.session import (
+    AI,
+    HUMAN,
+    ConvState,
+    SessionStore,
+    UserSession,
+    create_session_store,
+)
 from src.config import get_settings
+from src.monitoring.metrics import AGENT_SECONDS, LLM_FIRST_TOKEN_SECONDS
 
 logger = logging.getLogger(__name__)
 
+_LLM_PATH = AGENT_SECONDS.labels(path="llm")
+_RULES_PATH = AGENT_SECONDS.labels(path="rules")
+# Set when the current turn called the LLM (per asyncio task)
+_llm_called: ContextVar[bool] = ContextVar("llm_called", default=False)
+
+# Receives the reply text so far while the LLM streams it
+OnDelta = Callable[[str], Awaitable[None]]
+# True while the caller still holds the user's lock (HeldLock.still_held)
+StillHeld = Callable[[], Awaitable[bool]]
+_on_delta: ContextVar[OnDelta | None] = ContextVar("on_delta", default=None)
+
 SYSTEM_PROMPT = """\
 אתה "שופי", סוכן מכירות חכם של SmartShopper.
 
@@ -41,177 +85,138 @@ SYSTEM_PROMPT = """\
 
 אתה עוזר ללקוחות למצוא מוצרים מ-15+ חנויות ישראליות כולל משלוח עם שיליחויות בע"מ."""
 
-# --- Detection helpers ---
-
-BRANDS = {
-    "אייפון", "iphone", "סמסונג", "samsung", "galaxy", "גלקסי",
-    "שיאומי", "xiaomi", "redmi", "poco", "וואווי", "huawei",
-    "sony", "סוני", "jbl", "bose", "apple", "אפל",
-    "lg", "אל ג'י", "lenovo", "לנובו", "dell", "דל",
-    "asus", "אסוס", "hp", "acer", "איסר",
-    "dyson", "דייסון", "philips", "פיליפס", "bosch", "בוש",
-    "nikon", "ניקון", "canon", "קנון", "gopro",
-    "nintendo", "נינטנדו", "playstation", "ps5", "xbox",
-    "airpods", "אירפודס", "macbook", "מקבוק", "ipad", "אייפד",
-}
-
-GENERIC_CATEGORIES = {
-    "טלפון", "פלאפון", "נייד", "סלולרי",
-    "אוזניות", "אוזניה", "רמקול", "רמקולים",
-    "טלוויזיה", "טלויזיה", "מסך", "מחשב", "לפטופ",
-    "מקרר", "מכונת כביסה", "מדיח", "מייבש", "תנור", "מיקרוגל",
-    "שואב אבק", "מזגן", "מאוורר",
-    "מצלמה", "שעון חכם", "טאבלט",
-    "קונסולה", "משחק", "אופניים", "קורקינט",
-}
-
-ISRAELI_CITIES = {
-    "תל אביב", "ירושלים", "חיפה", "באר שבע", "אשדוד", "אשקלון",
-    "נתניה", "חולון", "בת ים", "רמת גן", "פתח תקווה", "ראשון לציון",
-    "הרצליה", "רעננה", "כפר סבא", "הוד השרון", "רחובות", "נס ציונה",
-    "לוד", "רמלה", "מודיעין", "עפולה", "נצרת", "טבריה", "אילת",
-    "קריית שמונה", "קריית גת", "דימונה", "ערד", "צפת",
-    "מרכז", "צפון", "דרום", "שרון", "גוש דן", "שפלה", "נגב",
-}
-
-_GREETINGS = {"היי", "הי", "שלום", "בוקר טוב", "ערב טוב", "מה נשמע", "מה קורה", "אהלן"}
-_OFF_TOPIC = {"פוליטיקה", "ממשלה", "דת", "אלוהים", "בחירות", "מלחמה", "כדורגל"}
-_PRICE_WORDS = {"יקר", "זול", "מחיר", "עולה", "עולות", "עולים", "תקציב", "כסף"}
-
-MAX_HISTORY = 10
-
-
-def _is_specific_product(text: str) -> bool:
-    lower = text.lower()
-    has_brand = any(b in lower for b in BRANDS)
-    has_number = bool(re.search(r"\d", text))
-    has_model_word = any(w in lower for w in ("פרו", "pro", "max", "ultra", "plus", "lite", "mini"))
-    return has_brand and (has_number or has_model_word)
-
-
-def _is_generic_product(text: str) -> bool:
-    lower = text.lower().strip()
-    return any(cat in lower for cat in GENERIC_CATEGORIES)
-
-
-def _extract_budget(text: str) -> str | None:
-    """Extract a budget number from text like 'עד 1500', 'משהו עד 2000', '1500'."""
-    m = re.search(r"(\d[\d,]*)", text)
-    return m.group(1).replace(",", "") if m else None
-
-
-def _has_brand(text: str) -> str | None:
-    """Extract brand name from text."""
-    lower = text.lower()
-    for brand in BRANDS:
-        if brand in lower:
-            return brand
-    return None
-
-
-def _has_location(text: str) -> str | None:
-    """Extract city/area from text."""
-    lower = text.lower().strip()
-    for city in ISRAELI_CITIES:
-        if city in lower:
-            return city
-    return None
-
-
-def _fallback_chat(text: str) -> str:
-    lower = text.lower().strip()
-    if any(g in lower for g in _GREETINGS):
+MODEL = "claude-sonnet-4-6"
+# Part of every reply cache key: editing the prompt or model retires old replies
+PROMPT_VERSION = hashlib.sha256(f"{MODEL}\n{SYSTEM_PROMPT}".encode()).hexdigest()[:12]
+# Warm-up turns run under this id so they never touch a real user's search
+_WARM_USER_ID = -1
+
+
+def _fallback_chat(found: Entities) -> str:
+    if found.has(GREETING):
         return "היי! אני שופי, העוזר האישי שלך לקניות.\nאני סורק 15+ חנויות ומוצא לך את העסקאות הכי טובות. מה נחפש?"
-    if any(w in lower for w in _OFF_TOPIC):
+    if found.has(OFF_TOPIC_WORD):
         return "אני מתמחה רק בקניות והשוואת מחירים.\nמה תרצה לחפש?"
-    if any(w in lower for w in _PRICE_WORDS):
+    if found.has(PRICE_WORD):
         return "אני אמצא לך בדיוק מה שאתה צריך במחיר שמתאים לך!\nאיזה מוצר מעניין אותך?"
     return "אני כאן כדי לעזור לך למצוא את המוצר המושלם.\nספר לי מה אתה מחפש?"
 
 
 # --- Conversation state machine ---
 
-class ConvState(Enum):
-    IDLE = auto()
-    ASKING_BRAND = auto()
-    ASKING_BUDGET = auto()
-    ASKING_PRIORITY = auto()
-    ASKING_LOCATION = auto()
-
-
-@dataclass
-class UserSession:
-    state: ConvState = ConvState.IDLE
-    product_query: str = ""
-    brand: str = ""
-    budget: str = ""
-    priority: str = ""
+@dataclass(frozen=True)
+class SearchRequest:
+    """What to search for once Shufi has collected enough info."""
+
+    query: str
     location: str = ""
+    # Specific model ("אייפון 15 פרו") -> compare stores; generic -> compare products
     is_specific: bool = False
-    messages: list[BaseMessage] = field(default_factory=list)
 
 
 class SalesAgent:
     """Shufi -- conversational sales agent with smart intent detection."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        sessions: SessionStore | None = None,
+        governor: BudgetGovernor | None = None,
+        policy: ResponsePolicy | None = None,
+        replies: ReplyCache | None = None,
+    ) -> None:
         settings = get_settings()
         api_key = settings.llm.anthropic_api_key
 
         self._llm: ChatAnthropic | None = None
         if api_key and not api_key.startswith("sk-ant-your-"):
             self._llm = ChatAnthropic(
-                model="claude-sonnet-4-6",
+                model=MODEL,
                 api_key=api_key,
                 max_tokens=256,
                 temperature=0.7,
             )
 
-        self._sessions: dict[int, UserSession] = defaultdict(UserSession)
+        self._sessions = sessions if sessions is not None else create_session_store()
+        self._governor = governor or get_budget_governor()
+        self._policy = policy or create_response_policy()
+        self._replies = replies or create_reply_cache()
+        self._search_requests: dict[int, SearchRequest] = {}
 
     @property
     def available(self) -> bool:
         return self._llm is not None
 
-    async def handle_message(self, user_id: int, text: str) -> tuple[str, bool]:
-        """Process message through state machine. Returns (response, should_search)."""
-        session = self._sessions[user_id]
+    async def handle_message(
+        self,
+        user_id: int,
+        text: str,
+        on_delta: OnDelta | None = None,
+        still_held: StillHeld | None = None,
+    ) -> tuple[str, bool]:
+        """Process message through state machine. Returns (response, should_search).
+
+        With on_delta, an LLM reply is streamed: on_delta gets the text so far
+        after every chunk. The returned response is always the final text --
+        it may be a template if the stream failed part way. With still_held,
+        the session is only written if the user's lock is still ours.
+        """
+        started = time.perf_counter()
+        _llm_called.set(False)
+        _on_delta.set(on_delta)
+        session = await self._sessions.get(user_id)
+        response, should_search = await self._step(user_id, session, text)
+        if still_held is not None and not await still_held():
+            # The lock lapsed and another worker has this user now; its session wins
+            logger.warning("User lock lost mid-turn for user %s, session not saved", user_id)
+        # A search ends the conversation -- the next message starts fresh
+        elif should_search:
+            await self._sessions.delete(user_id)
+        else:
+            await self._sessions.save(user_id, session)
+        path = _LLM_PATH if _llm_called.get() else _RULES_PATH
+        path.observe(time.perf_counter() - started)
+        return response, should_search
+
+    async def _step(self, user_id: int, session: UserSession, text: str) -> tuple[str, bool]:
+        found = extract_entities(text)
 
         # --- IDLE: detect what the user wants ---
         if session.state == ConvState.IDLE:
-            if _is_specific_product(text):
+            if found.is_specific_product:
                 session.product_query = text
                 session.is_specific = True
                 # Check if location is already in the text
-                loc = _has_location(text)
+                loc = found.location
                 if loc:
                     session.location = loc
-                    self._reset_session(user_id)
+                    self._start_search(user_id, text, loc, is_specific=True)
                     return f"מצוין! מחפש {text}...", True
                 session.state = ConvState.ASKING_LOCATION
-                resp = await self._llm_respond(user_id, text)
+                resp = await self._reply(session, found, filled=True)
                 return resp or f"בחירה מעולה! באיזה אזור אתה נמצא כדי שאחשב משלוח?", False
 
-            if _is_generic_product(text):
+            if found.is_generic_product:
                 session.product_query = text
                 session.is_specific = False
                 # Maybe user already included budget: "טלפון עד 2000"
-                budget = _extract_budget(text)
-                brand = _has_brand(text)
+                budget = found.budget
+                brand = found.brand
                 if budget:
                     session.budget = budget
                 if brand:
                     session.brand = brand
                 session.state = ConvState.ASKING_BRAND
-                resp = await self._llm_respond(user_id, text)
+                resp = await self._reply(session, found, filled=True)
                 return resp or f"יופי, {text}! יש לי גישה ל-15+ חנויות.\nאיזה מותג או דגם מעניין אותך? או שתרצה שאני אמליץ?", False
 
-            # Not a product -- general chat
-            resp = await self._llm_respond(user_id, text)
-            return resp or _fallback_chat(text), False
+            # Not a product -- general chat; the only turn the LLM keeps past the budget warning
+            resp = await self._reply(session, found, filled=False, essential=True)
+            return resp or _fallback_chat(found), False
 
         # --- Smart collection: parse what the user gave, fill what's missing ---
-        self._smart_extract(session, text)
+        slots = session.brand, session.budget, session.priority, session.location
+        self._smart_extract(session, found)
+        filled = slots != (session.brand, session.budget, session.priority, session.location)
 
         # Check if we have enough info to search
         if session.is_specific:
@@ -219,37 +224,38 @@ class SalesAgent:
             if session.location:
                 query = session.product_query
                 location = session.location
-                self._reset_session(user_id)
+                self._start_search(user_id, query, location, is_specific=True)
                 return f"מעולה! מחפש {query} באזור {location}...", True
             session.state = ConvState.ASKING_LOCATION
-            resp = await self._llm_respond(user_id, text)
+            resp = await self._reply(session, found, filled)
             return resp or "באיזה אזור אתה נמצא?", False
 
         # Generic product: need brand + budget + priority
         missing = self._what_is_missing(session)
         if not missing:
             query = self._build_query(session)
-            self._reset_session(user_id)
+            self._start_search(user_id, query, session.location)
             return f"מצוין, יש לי את כל מה שצריך! מחפש {query}...", True
 
         # Ask for the next missing piece
         session.state = missing
-        resp = await self._llm_respond(user_id, text)
+        resp = await self._reply(session, found, filled)
         if resp:
             return resp, False
         return self._fallback_question(session, missing), False
 
-    def _smart_extract(self, session: UserSession, text: str) -> None:
+    def _smart_extract(self, session: UserSession, found: Entities) -> None:
         """Extract brand, budget, location, priority from any user message."""
-        budget = _extract_budget(text)
+        text = found.text
+        budget = found.budget
         if budget and not session.budget:
             session.budget = budget
 
-        brand = _has_brand(text)
+        brand = found.brand
         if brand and not session.brand:
             session.brand = brand
 
-        location = _has_location(text)
+        location = found.location
         if location and not session.location:
             session.location = location
 
@@ -296,16 +302,32 @@ class SalesAgent:
             parts.append(f"עד {session.budget}")
         return " ".join(parts)
 
-    async def _llm_respond(self, user_id: int, text: str) -> str:
-        """Get LLM response. Returns empty string if unavailable."""
+    async def _reply(
+        self, session: UserSession, found: Entities, filled: bool, essential: bool = False
+    ) -> str:
+        """LLM reply if the policy wants one for this turn, else "" (the caller's template)."""
+        if not self._policy.needs_llm(session.state, found, filled):
+            return ""
+        return await self._llm_respond(session, found.text, essential)
+
+    async def _llm_respond(self, session: UserSession, text: str, essential: bool = False) -> str:
+        """Get LLM response. Returns empty string if unavailable, over budget or too busy."""
         if not self._llm:
             return ""
 
-        session = self._sessions[user_id]
-        session.messages.append(HumanMessage(content=text))
+        # No history: the reply depends only on the prompt, the slots and the text
+        memo_key = None if session.history else _memo_key(session, text)
+        if memo_key is not None:
+            cached = self._replies.get(memo_key)
+            if cached is not None:
+                session.add_message(HUMAN, text)
+                session.add_message(AI, cached)
+                return cached
 
-        if len(session.messages) > MAX_HISTORY:
-            session.messages[:] = session.messages[-MAX_HISTORY:]
+        if not await self._governor.allows(essential):
+            return ""
+
+        session.add_message(HUMAN, text)
 
         context = SYSTEM_PROMPT
         if session.product_query:
@@ -330,22 +352,92 @@ class SalesAgent:
             elif missing == ConvState.ASKING_PRIORITY:
                 context += "\nשאל מה הכי חשוב לו (איכות/מחיר/מותג)."
 
-        messages: list[BaseMessage] = [SystemMessage(content=context), *session.messages]
-
-        try:
-            response = await self._llm.ainvoke(messages)
-            content = response.content if isinstance(response.content, str) else str(response.content)
-            session.messages.append(AIMessage(content=content))
-            return content
-        except Exception:
-            logger.exception("Shufi LLM call failed")
-            return ""
-
-    def _reset_session(self, user_id: int) -> None:
-        self._sessions[user_id] = UserSession()
-
-    def clear_history(self, user_id: int) -> None:
-        self._sessions.pop(user_id, None)
+        messages: list[BaseMessage] = [SystemMessage(content=context), *session.to_messages()]
+
+        async with self._governor.slot() as acquired:
+            if not acquired:
+                return ""
+            _llm_called.set(True)
+            on_delta = _on_delta.get()
+            try:
+                if on_delta is None:
+                    response = await self._llm.ainvoke(messages)
+                else:
+                    response = await self._stream(self._llm, messages, on_delta)
+            except Exception:
+                logger.exception("Shufi LLM call failed")
+                return ""
+        await self._governor.record(response, MODEL)
+        content = response.content if isinstance(response.content, str) else response.text
+        session.add_message(AI, content)
+        if memo_key is not None and content:
+            self._replies.add(memo_key, content)
+        return content
+
+    async def _stream(
+        self, llm: ChatAnthropic, messages: list[BaseMessage], on_delta: OnDelta
+    ) -> AIMessage:
+        """astream the reply, handing the text so far to on_delta after each chunk.
+
+        Chunks are summed, so the result carries the full text and usage_metadata
+        like an ainvoke response.
+        """
+        started = time.perf_counter()
+        response: AIMessageChunk | None = None
+        shown = ""
+        async for chunk in llm.astream(messages):
+            response = chunk if response is None else response + chunk
+            text = response.text
+            if text == shown:
+                continue  # usage-only or empty chunk
+            if not shown:
+                LLM_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - started)
+            shown = text
+            await on_delta(text)
+        return response if response is not None else AIMessage(content="")
+
+    def _start_search(
+        self, user_id: int, query: str, location: str, is_specific: bool = False
+    ) -> None:
+        self._search_requests[user_id] = SearchRequest(
+            query=query, location=location, is_specific=is_specific
+        )
+
+    async def warm_replies(self, texts: list[str], variants: int) -> None:
+        """Fill the reply cache for common openings, as if each were a new user's first turn.
+
+        Openings the policy answers with a template cost nothing here.
+        """
+        if not self._llm:
+            return
+
+        async def warm(text: str) -> None:
+            for _ in range(variants):
+                await self._step(_WARM_USER_ID, UserSession(), text)
+                self._search_requests.pop(_WARM_USER_ID, None)
+
+        await asyncio.gather(*(warm(text) for text in texts))
+        logger.info("Shufi reply cache warmed: %s", self._replies.stats)
+
+    def pop_search_request(self, user_id: int) -> SearchRequest | None:
+        """Return (and forget) the search triggered by the last should_search=True turn."""
+        return self._search_requests.pop(user_id, None)
+
+    async def clear_history(self, user_id: int) -> None:
+        await self._sessions.delete(user_id)
+
+
+def _memo_key(session: UserSession, text: str) -> tuple[Any, ...]:
+    return (
+        PROMPT_VERSION,
+        normalize_text(text),
+        session.product_query,
+        session.is_specific,
+        session.brand,
+        session.budget,
+        session.priority,
+        session.location,
+    )
 
 
 # Singleton
@@ -0,0 +1,204 @@
+"""Shufi conversation sessions and their pluggable stores.
+
+- InMemorySessionStore: single process, LRU-bounded with idle TTL
+- RedisSessionStore: shared across uvicorn workers, survives restarts
+
+Sessions are serialized compactly (positional JSON, 1-letter message roles)
+so millions of idle user_ids stay cheap in Redis.
+
+In memory a session is a slotted dataclass whose history is a bounded
+tuple of (role, text) pairs; LangChain message objects (over 1 KB each) are
+built only for an LLM call. With SESSION_COMPRESS=true the in-memory store
+keeps idle sessions as zlib-compressed bytes instead of objects.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import zlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from enum import Enum, auto
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.cache.client import get_redis
+from src.cache.lru import LRUCache
+from src.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "session:v1:"
+_FORMAT_VERSION = 1
+
+# Turns kept for the LLM context (user and assistant messages together)
+MAX_HISTORY = 10
+HUMAN = "h"
+AI = "a"
+
+
+class ConvState(Enum):
+    IDLE = auto()
+    ASKING_BRAND = auto()
+    ASKING_BUDGET = auto()
+    ASKING_PRIORITY = auto()
+    ASKING_LOCATION = auto()
+
+
+@dataclass(slots=True)
+class UserSession:
+    state: ConvState = ConvState.IDLE
+    product_query: str = ""
+    brand: str = ""
+    budget: str = ""
+    priority: str = ""
+    location: str = ""
+    is_specific: bool = False
+    # Last MAX_HISTORY (role, text) pairs. A tuple, not a deque: an empty
+    # tuple is shared and a deque allocates a 64-slot block up front.
+    history: tuple[tuple[str, str], ...] = ()
+
+    def add_message(self, role: str, text: str) -> None:
+        self.history = (*self.history[1 - MAX_HISTORY:], (role, text))
+
+    def to_messages(self) -> list[BaseMessage]:
+        return [
+            HumanMessage(content=text) if role == HUMAN else AIMessage(content=text)
+            for role, text in self.history
+        ]
+
+
+def dump_session(session: UserSession) -> bytes:
+    """Compact wire format: [version, state, slots..., [[role, text], ...]]."""
+    return json.dumps(
+        [
+            _FORMAT_VERSION,
+            session.state.value,
+            session.product_query,
+            session.brand,
+            session.budget,
+            session.priority,
+            session.location,
+            int(session.is_specific),
+            session.history,
+        ],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode()
+
+
+def load_session(raw: bytes | str) -> UserSession:
+    _, state, product_query, brand, budget, priority, location, is_specific, messages = (
+        json.loads(raw)
+    )
+    return UserSession(
+        state=ConvState(state),
+        product_query=product_query,
+        brand=brand,
+        budget=budget,
+        priority=priority,
+        location=location,
+        is_specific=bool(is_specific),
+        history=tuple((role, text) for role, text in messages[-MAX_HISTORY:]),
+    )
+
+
+class SessionStore(ABC):
+    """Where SalesAgent keeps per-user conversation state between messages."""
+
+    @abstractmethod
+    async def get(self, user_id: int) -> UserSession:
+        """Return the user's session, or a fresh one if none is stored."""
+
+    @abstractmethod
+    async def save(self, user_id: int, session: UserSession) -> None:
+        """Persist the session and restart its idle TTL."""
+
+    @abstractmethod
+    async def delete(self, user_id: int) -> None:
+        """Forget the user's session."""
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store. Idle sessions expire; the least recent are evicted at max_entries.
+
+    With compress, sessions are stored as zlib-compressed dump_session bytes
+    (a few hundred bytes for a full history instead of a few KB of objects),
+    at the cost of a dump/load per message.
+    """
+
+    def __init__(self, idle_ttl: float, max_entries: int, compress: bool = False) -> None:
+        self._idle_ttl = idle_ttl
+        self._compress = compress
+        self._sessions: LRUCache[int, UserSession | bytes] = LRUCache(max_entries)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    async def get(self, user_id: int) -> UserSession:
+        stored = self._sessions.get(user_id)
+        if stored is None:
+            return UserSession()
+        if isinstance(stored, bytes):
+            return load_session(zlib.decompress(stored))
+        return stored
+
+    async def save(self, user_id: int, session: UserSession) -> None:
+        stored = zlib.compress(dump_session(session)) if self._compress else session
+        self._sessions.set(user_id, stored, ttl=self._idle_ttl)
+
+    async def delete(self, user_id: int) -> None:
+        self._sessions.pop(user_id)
+
+
+class RedisSessionStore(SessionStore):
+    """Shared store: one key per user, expiring after idle_ttl without a save."""
+
+    def __init__(self, redis: Redis, idle_ttl: float) -> None:
+        self._redis = redis
+        self._idle_ttl = idle_ttl
+
+    async def get(self, user_id: int) -> UserSession:
+        """A fresh session when Redis is unreachable: the user starts over, not errors out."""
+        try:
+            raw = await self._redis.get(f"{KEY_PREFIX}{user_id}")
+        except RedisError:
+            logger.warning("Redis session get failed for user %s", user_id, exc_info=True)
+            return UserSession()
+        if raw is None:
+            return UserSession()
+        try:
+            return load_session(raw)
+        except (ValueError, TypeError):
+            logger.warning("Dropping unreadable session for user %s", user_id)
+            return UserSession()
+
+    async def save(self, user_id: int, session: UserSession) -> None:
+        try:
+            # px: int(seconds) would turn a sub-second TTL into 0, which SET rejects
+            await self._redis.set(
+                f"{KEY_PREFIX}{user_id}",
+                dump_session(session),
+                px=max(1, int(self._idle_ttl * 1000)),
+            )
+        except RedisError:
+            logger.warning("Redis session save failed for user %s", user_id, exc_info=True)
+
+    async def delete(self, user_id: int) -> None:
+        try:
+            await self._redis.delete(f"{KEY_PREFIX}{user_id}")
+        except RedisError:
+            logger.warning("Redis session delete failed for user %s", user_id, exc_info=True)
+
+
+def create_session_store() -> SessionStore:
+    """Build the store selected by SESSION_BACKEND (memory | redis)."""
+    settings = get_settings().session
+    if settings.backend == "redis":
+        return RedisSessionStore(get_redis(), idle_ttl=settings.idle_ttl)
+    return InMemorySessionStore(
+        idle_ttl=settings.idle_ttl, max_entries=settings.max_entries, compress=settings.compress
+    )
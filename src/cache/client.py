@@ -0,0 +1,15 @@
+"""Shared async Redis client."""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+from redis.asyncio import Redis
+
+from src.config import get_settings
+
+
+@lru_cache(maxsize=1)
+def get_redis() -> Redis:
+    """Cached singleton client -- connections are pooled inside redis-py."""
+    return Redis.from_url(get_settings().redis.url)
@@ -0,0 +1,50 @@
+"""Size-bounded in-process LRU with optional per-item expiry."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Generic, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """OrderedDict-backed LRU. Expired items are dropped lazily on access."""
+
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        # key -> (expires_at wall clock or None, value)
+        self._data: OrderedDict[K, tuple[float | None, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: K) -> V | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        expires_at = time.time() + ttl if ttl is not None else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._max_entries:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        item = self._data.pop(key, None)
+        return item[1] if item else None
+
+    def clear(self) -> None:
+        self._data.clear()
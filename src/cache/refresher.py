@@ -0,0 +1,328 @@
+"""Background price refresher: keeps the most-searched queries warm.
+
+Every search through the cache is counted with exponential decay, so the
+ranking follows what users are searching now, not last month. An
+APScheduler job runs every tick_seconds (started up to jitter x tick late,
+so workers deployed together don't tick together) and:
+
+1. takes the top_queries cache keys by decayed count (at least min_score)
+2. queues each (key, store) whose offers are due in a heap, most searched
+   first; a store is due after its own interval (REFRESH_STORE_INTERVALS,
+   else refresh_at x its cache TTL), shortened by a random jitter per
+   item so keys cached in one burst don't come due in one burst
+3. pops the heap against each store's politeness budget (a token bucket,
+   requests per minute); what a store can't afford waits for a later tick
+4. re-scrapes that one store (SearchEngine.search_store), spread over the
+   first half of the tick, and merges its offers into the cached entry
+   (SearchCache.update_store); if the entry has expired or been evicted,
+   the whole key is fetched again instead -- checked before scraping, and
+   charged to every store's budget once per key, not once per store
+
+So a search for a popular product is answered from a fresh entry instead
+of a live fan-out, which is what takes p95 down (benchmarks/price_refresh.py).
+Counts are per worker: with several workers, a shared Redis entry is
+refreshed by each worker that sees the query, within that worker's budgets.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import math
+import random
+import time
+from dataclasses import asdict, dataclass
+from functools import lru_cache, partial
+from typing import Any
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+
+from src.cache.search_cache import SearchCache, cache_key, get_search_cache
+from src.config import get_settings
+from src.monitoring.metrics import PRICE_REFRESHES
+from src.scrapers.engine import STATUS_OK, SearchEngine, get_search_engine
+
+logger = logging.getLogger(__name__)
+
+# A failed store is retried after this fraction of its interval
+RETRY_FRACTION = 0.25
+# Share of the tracked keys kept when the tracker overflows (pruned in one pass)
+PRUNE_TO = 0.9
+
+
+class SearchPopularity:
+    """Exponentially decayed search counts per (query, location) cache key."""
+
+    def __init__(self, half_life: float, max_entries: int) -> None:
+        self._half_life = half_life
+        self._max_entries = max_entries
+        # key -> (count at `at`, at, query, location)
+        self._counts: dict[str, tuple[float, float, str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def record(self, query: str, location: str = "", now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        key = cache_key(query, location)
+        item = self._counts.get(key)
+        count = self._decayed(item, now) + 1.0 if item is not None else 1.0
+        self._counts[key] = (count, now, query, location)
+        if len(self._counts) > self._max_entries:
+            self._prune(now)
+
+    def top(
+        self, n: int, min_score: float = 0.0, now: float | None = None
+    ) -> list[tuple[float, str, str, str]]:
+        """Up to n (score, key, query, location), most searched first."""
+        now = time.monotonic() if now is None else now
+        scored = (
+            (self._decayed(item, now), key, item[2], item[3])
+            for key, item in self._counts.items()
+        )
+        return heapq.nlargest(n, (entry for entry in scored if entry[0] >= min_score))
+
+    def _decayed(self, item: tuple[float, float, str, str], now: float) -> float:
+        count, at = item[0], item[1]
+        return count * math.pow(0.5, (now - at) / self._half_life)
+
+    def _prune(self, now: float) -> None:
+        keep = heapq.nlargest(
+            int(self._max_entries * PRUNE_TO),
+            self._counts.items(),
+            key=lambda kv: self._decayed(kv[1], now),
+        )
+        self._counts = dict(keep)
+
+
+class _Budget:
+    """Token bucket: per_minute requests, bursting to at most one tick's worth."""
+
+    def __init__(self, per_minute: float, tick_seconds: float) -> None:
+        self._rate = per_minute / 60
+        self._burst = max(1.0, self._rate * tick_seconds)
+        self._tokens = self._burst
+        self._at = time.monotonic()
+
+    def take(self) -> bool:
+        self._refill()
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def spend(self) -> None:
+        """Charge a request that went out regardless (may leave the bucket in debt)."""
+        self._refill()
+        self._tokens -= 1
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._at) * self._rate)
+        self._at = now
+
+
+@dataclass
+class RefreshStats:
+    ticks: int = 0
+    refreshed: int = 0
+    failed: int = 0
+    # Entry gone (evicted or expired) and fetched again from every store
+    missing: int = 0
+    # Over the store's budget this tick
+    deferred: int = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class PriceRefresher:
+    """Scheduled, budgeted per-store refreshes of the most-searched cache keys."""
+
+    def __init__(
+        self,
+        cache: SearchCache,
+        engine: SearchEngine,
+        *,
+        tick_seconds: float = 15.0,
+        jitter: float = 0.2,
+        half_life: float = 3600.0,
+        min_score: float = 2.0,
+        top_queries: int = 200,
+        max_tracked: int = 10_000,
+        refresh_at: float = 0.8,
+        store_intervals: dict[str, float] | None = None,
+        store_budget: float = 30.0,
+        store_budgets: dict[str, float] | None = None,
+    ) -> None:
+        self._cache = cache
+        self._engine = engine
+        self._tick = tick_seconds
+        self._jitter = jitter
+        self._min_score = min_score
+        self._top = top_queries
+        self._refresh_at = refresh_at
+        self._store_intervals = store_intervals or {}
+        self._store_budget = store_budget
+        self._store_budgets = store_budgets or {}
+        self._popularity = SearchPopularity(half_life, max_tracked)
+        # (key, store) -> monotonic time its offers are due for a refresh
+        self._due: dict[tuple[str, str], float] = {}
+        self._budgets: dict[str, _Budget] = {}
+        self._scheduler: AsyncIOScheduler | None = None
+        # (key, store) -> refresh in progress; started by one tick, may outlive it
+        self._running: dict[tuple[str, str], asyncio.Task[None]] = {}
+        self.stats = RefreshStats()
+
+    def record(self, query: str, location: str = "") -> None:
+        """Count a search towards its key's popularity."""
+        self._popularity.record(query, location)
+
+    def interval(self, store: str) -> float:
+        return self._store_intervals.get(store, self._cache.ttl_for(store) * self._refresh_at)
+
+    def start(self) -> None:
+        """Schedule tick() on the running event loop."""
+        if self._scheduler is not None:
+            return
+        self._scheduler = AsyncIOScheduler()
+        self._scheduler.add_job(
+            self.tick,
+            IntervalTrigger(seconds=self._tick, jitter=self._tick * self._jitter),
+            id="price-refresh",
+            max_instances=1,
+            coalesce=True,
+        )
+        self._scheduler.start()
+        logger.info("Price refresher started (every %.0fs)", self._tick)
+
+    async def close(self) -> None:
+        if self._scheduler is not None:
+            self._scheduler.shutdown(wait=False)
+            self._scheduler = None
+        running, self._running = list(self._running.values()), {}
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+    async def tick(self) -> int:
+        """Rebuild the work queue and start what the budgets allow; returns how many."""
+        self.stats.ticks += 1
+        now = time.monotonic()
+        popular = self._popularity.top(self._top, self._min_score)
+        queue: list[tuple[float, float, str, str, str, str]] = []
+        for score, key, query, location in popular:
+            for store in self._engine.stores:
+                # A key that just became popular is due at once: its entry may be old
+                due = self._due.get((key, store), now)
+                if due <= now:
+                    heapq.heappush(queue, (-score, due, key, store, query, location))
+
+        # Keys that fell out of the top start over if they come back
+        keys = {key for _, key, _, _ in popular}
+        self._due = {item: due for item, due in self._due.items() if item[0] in keys}
+
+        started = 0
+        while queue:
+            _, _, key, store, query, location = heapq.heappop(queue)
+            if (key, store) in self._running:
+                continue
+            if not self._budget(store).take():
+                self.stats.deferred += 1
+                PRICE_REFRESHES.labels(store, "deferred").inc()
+                continue
+            # Spread over the first half of the tick rather than one burst per store
+            delay = random.uniform(0, self._tick / 2)
+            task = asyncio.create_task(self._refresh(key, store, query, location, delay))
+            self._running[(key, store)] = task
+            task.add_done_callback(partial(self._refresh_done, (key, store)))
+            started += 1
+        return started
+
+    async def _refresh(
+        self, key: str, store: str, query: str, location: str, delay: float
+    ) -> None:
+        await asyncio.sleep(delay)
+        if self._due.get((key, store), 0.0) > time.monotonic():
+            return  # covered meanwhile by a whole-key fetch another store started
+        if not await self._cache.has_entry(query, location):
+            self._refetch(key, store, query, location)
+            return
+        result = await self._engine.search_store(store, query, location)
+        now = time.monotonic()
+        if result.status != STATUS_OK:
+            outcome = "failed"
+            self.stats.failed += 1
+            self._due[(key, store)] = now + self.interval(store) * RETRY_FRACTION
+        elif await self._cache.update_store(query, location, store, result.offers):
+            outcome = "ok"
+            self.stats.refreshed += 1
+            self._due[(key, store)] = self._next_due(store, now)
+        else:
+            self._refetch(key, store, query, location)
+            return
+        PRICE_REFRESHES.labels(store, outcome).inc()
+
+    def _refetch(self, key: str, store: str, query: str, location: str) -> None:
+        """Entry gone but still popular: fetch the whole key again, from every store.
+
+        Only the call that starts the fetch charges the other stores' budgets
+        (store already paid for its token); the key's other queued refreshes
+        see their new due time and skip.
+        """
+        self.stats.missing += 1
+        PRICE_REFRESHES.labels(store, "missing").inc()
+        now = time.monotonic()
+        started = self._cache.refresh(query, location)
+        for other in self._engine.stores:
+            if started and other != store:
+                self._budget(other).spend()
+            self._due[(key, other)] = self._next_due(other, now)
+
+    def _refresh_done(self, item: tuple[str, str], task: asyncio.Task[None]) -> None:
+        self._running.pop(item, None)
+        # Retrieve the exception so background tasks never log "never retrieved"
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Price refresh failed for %s: %r", item, task.exception())
+
+    def _next_due(self, store: str, now: float) -> float:
+        return now + self.interval(store) * (1 - random.uniform(0, self._jitter))
+
+    def _budget(self, store: str) -> _Budget:
+        budget = self._budgets.get(store)
+        if budget is None:
+            per_minute = self._store_budgets.get(store, self._store_budget)
+            budget = self._budgets[store] = _Budget(per_minute, self._tick)
+        return budget
+
+
+def create_price_refresher() -> PriceRefresher:
+    settings = get_settings().refresh
+    return PriceRefresher(
+        get_search_cache(),
+        get_search_engine(),
+        tick_seconds=settings.tick_seconds,
+        jitter=settings.jitter,
+        half_life=settings.half_life,
+        min_score=settings.min_score,
+        top_queries=settings.top_queries,
+        max_tracked=settings.max_tracked,
+        refresh_at=settings.refresh_at,
+        store_intervals=settings.store_intervals,
+        store_budget=settings.store_budget,
+        store_budgets=settings.store_budgets,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_price_refresher() -> PriceRefresher:
+    """Cached singleton fed by the search handler and started in the app lifespan."""
+    return create_price_refresher()
+
+
+async def close_price_refresher() -> None:
+    if get_price_refresher.cache_info().currsize:
+        await get_price_refresher().close()
+        get_price_refresher.cache_clear()
@@ -0,0 +1,335 @@
+"""Two-tier search-result cache: in-process LRU in front of Redis.
+
+Keyed on the normalized query Shufi built (SalesAgent._build_query) plus
+location. Each entry is fresh for the shortest TTL among the stores that
+contributed offers, then served stale for a while as a background refresh
+runs. Concurrent misses for the same key are coalesced (single-flight), so a
+burst of identical searches triggers exactly one scrape fan-out per worker.
+A result cut short by the search deadline is fresh for partial_ttl only:
+the stores that timed out are asked again on the next hit, instead of
+staying missing from that query for the full TTL.
+Popular keys are also refreshed ahead of expiry, one store at a time, by
+the background price refresher (cache/refresher.py).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.cache.client import get_redis
+from src.cache.lru import LRUCache
+from src.config import get_settings
+from src.monitoring.metrics import CACHE_LOOKUPS
+from src.scrapers.engine import SearchResult, get_search_engine
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "search:v1:"
+
+_LOCAL_HIT = CACHE_LOOKUPS.labels(result="local")
+_REDIS_HIT = CACHE_LOOKUPS.labels(result="redis")
+_STALE_HIT = CACHE_LOOKUPS.labels(result="stale")
+_MISS = CACHE_LOOKUPS.labels(result="miss")
+_COALESCED = CACHE_LOOKUPS.labels(result="coalesced")
+
+Fetch = Callable[[], Awaitable[SearchResult]]
+Loader = Callable[[str, str], Awaitable[SearchResult]]
+
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse whitespace so trivially different queries share a key."""
+    return " ".join(text.lower().split())
+
+
+def cache_key(query: str, location: str = "") -> str:
+    raw = f"{normalize(query)}|{normalize(location)}"
+    return KEY_PREFIX + hashlib.sha1(raw.encode()).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    offers: list[dict[str, Any]]
+    fresh_until: float
+    stale_until: float
+    # store -> when its offers were scraped (entries refreshed one store at a time)
+    fetched_at: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.fresh_until
+
+
+@dataclass
+class CacheStats:
+    """Counters for hit ratio and latency reporting."""
+
+    local_hits: int = 0
+    redis_hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    fetches: int = 0
+    fetch_errors: int = 0
+    # Fetches cut short by the deadline, cached for partial_ttl
+    partial: int = 0
+    lookup_seconds: float = 0.0
+    fetch_seconds: float = 0.0
+
+    @property
+    def hit_ratio(self) -> float:
+        hits = self.local_hits + self.redis_hits
+        total = hits + self.misses
+        return hits / total if total else 0.0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {**asdict(self), "hit_ratio": self.hit_ratio}
+
+
+class SearchCache:
+    """Cache search offers by (query, location) with SWR and request coalescing."""
+
+    def __init__(
+        self,
+        redis: Redis | None,
+        loader: Loader,
+        *,
+        local_max_entries: int = 2048,
+        ttl: float = 600.0,
+        stale_ttl: float = 1800.0,
+        partial_ttl: float = 30.0,
+        store_ttls: dict[str, float] | None = None,
+    ) -> None:
+        self._redis = redis
+        self._loader = loader
+        self._local: LRUCache[str, CacheEntry] = LRUCache(local_max_entries)
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._partial_ttl = partial_ttl
+        self._store_ttls = store_ttls or {}
+        self._inflight: dict[str, asyncio.Task[list[dict[str, Any]]]] = {}
+        self._refreshing: dict[str, asyncio.Task[None]] = {}
+        self.stats = CacheStats()
+
+    async def get_or_fetch(
+        self, query: str, location: str = "", fetch: Fetch | None = None
+    ) -> list[dict[str, Any]]:
+        """Return cached offers, or run one lookup+fetch for all concurrent callers.
+
+        fetch overrides the loader for this miss (e.g. a streaming fetch that
+        renders live results); background revalidation always uses the loader.
+        """
+        key = cache_key(query, location)
+
+        entry = self._local.get(key)
+        if entry is not None:
+            self.stats.local_hits += 1
+            _LOCAL_HIT.inc()
+            if not entry.fresh:
+                self.stats.stale_hits += 1
+                _STALE_HIT.inc()
+                self._revalidate(key, query, location)
+            return entry.offers
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats.coalesced += 1
+            _COALESCED.inc()
+        else:
+            task = asyncio.create_task(self._load(key, query, location, fetch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._task_done(self._inflight, key, t))
+        return await asyncio.shield(task)
+
+    def ttl_for(self, store: str) -> float:
+        """How long offers from store stay fresh."""
+        return self._store_ttls.get(store, self._ttl)
+
+    async def update_store(
+        self, query: str, location: str, store: str, offers: list[dict[str, Any]]
+    ) -> bool:
+        """Replace store's offers in a cached entry and restart its TTL.
+
+        Returns False (and caches nothing) when there is no entry to update:
+        the other stores' offers are unknown, so a one-store entry would
+        pass for a complete result.
+        """
+        key = cache_key(query, location)
+        entry = self._local.get(key) or await self._redis_get(key)
+        if entry is None:
+            return False
+        merged = [offer for offer in entry.offers if offer.get("source") != store]
+        merged.extend(offers)
+        if merged:
+            fetched_at = {
+                source: entry.fetched_at.get(source, entry.fresh_until - self.ttl_for(source))
+                for source in _sources(entry.offers) | set(entry.fetched_at)
+            }
+            fetched_at[store] = time.time()
+            await self._store(key, merged, fetched_at)
+        return True
+
+    async def has_entry(self, query: str, location: str = "") -> bool:
+        """Whether (query, location) is cached, fresh or stale, locally or in Redis."""
+        key = cache_key(query, location)
+        return key in self._local or await self._redis_get(key) is not None
+
+    def refresh(self, query: str, location: str = "") -> bool:
+        """Re-fetch (query, location) from every store in the background.
+
+        False if a re-fetch of that key is already running (nothing started).
+        """
+        return self._revalidate(cache_key(query, location), query, location)
+
+    async def invalidate(self, query: str, location: str = "") -> None:
+        key = cache_key(query, location)
+        self._local.pop(key)
+        if self._redis is not None:
+            try:
+                await self._redis.delete(key)
+            except RedisError:
+                logger.warning("Redis delete failed for %s", key, exc_info=True)
+
+    async def _load(
+        self, key: str, query: str, location: str, fetch: Fetch | None
+    ) -> list[dict[str, Any]]:
+        """Leader path for a local miss: try Redis, then fetch."""
+        entry = await self._redis_get(key)
+        if entry is not None:
+            self.stats.redis_hits += 1
+            _REDIS_HIT.inc()
+            self._local.set(key, entry, ttl=entry.stale_until - time.time())
+            if not entry.fresh:
+                self.stats.stale_hits += 1
+                _STALE_HIT.inc()
+                self._revalidate(key, query, location)
+            return entry.offers
+
+        self.stats.misses += 1
+        _MISS.inc()
+        started = time.monotonic()
+        self.stats.fetches += 1
+        try:
+            result = await (fetch or (lambda: self._loader(query, location)))()
+        except Exception:
+            self.stats.fetch_errors += 1
+            raise
+        finally:
+            self.stats.fetch_seconds += time.monotonic() - started
+
+        await self._store_result(key, result)
+        return result.offers
+
+    def _revalidate(self, key: str, query: str, location: str) -> bool:
+        """Refresh a stale entry in the background, at most once per key."""
+        if key in self._refreshing:
+            return False
+
+        async def refresh() -> None:
+            self.stats.fetches += 1
+            await self._store_result(key, await self._loader(query, location))
+
+        task = asyncio.create_task(refresh())
+        self._refreshing[key] = task
+        task.add_done_callback(lambda t: self._task_done(self._refreshing, key, t))
+        return True
+
+    @staticmethod
+    def _task_done(
+        registry: dict[str, asyncio.Task[Any]], key: str, task: asyncio.Task[Any]
+    ) -> None:
+        registry.pop(key, None)
+        # Retrieve the exception so background tasks never log "never retrieved"
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Search fetch failed for %s: %r", key, task.exception())
+
+    async def _redis_get(self, key: str) -> CacheEntry | None:
+        if self._redis is None:
+            return None
+        started = time.monotonic()
+        try:
+            raw = await self._redis.get(key)
+        except RedisError:
+            logger.warning("Redis get failed for %s", key, exc_info=True)
+            return None
+        finally:
+            self.stats.lookup_seconds += time.monotonic() - started
+        return CacheEntry(**json.loads(raw)) if raw is not None else None
+
+    async def _store_result(self, key: str, result: SearchResult) -> None:
+        # Nothing to serve next time -- don't pin an empty result for the full TTL
+        if not result.offers:
+            return
+        now = time.time()
+        fetched_at: dict[str, float] = {}
+        if result.timed_out:
+            self.stats.partial += 1
+            for store in result.timed_out:
+                # Due partial_ttl from now, so the next hit asks that store again
+                fetched_at[store] = now - self.ttl_for(store) + self._partial_ttl
+        await self._store(key, result.offers, fetched_at)
+
+    async def _store(
+        self, key: str, offers: list[dict[str, Any]], fetched_at: dict[str, float] | None = None
+    ) -> None:
+        """Cache offers; fresh until the first store's offers outlive that store's TTL.
+
+        fetched_at may name stores without offers (timed out), to bring the
+        entry's expiry forward.
+        """
+        now = time.time()
+        fetched_at = fetched_at or {}
+        stores = _sources(offers) | set(fetched_at)
+        fetched_at = {store: fetched_at.get(store, now) for store in stores}
+        fresh_until = min(fetched_at[store] + self.ttl_for(store) for store in stores)
+        entry = CacheEntry(
+            offers=offers,
+            fresh_until=fresh_until,
+            stale_until=fresh_until + self._stale_ttl,
+            fetched_at=fetched_at,
+        )
+
+        self._local.set(key, entry, ttl=entry.stale_until - now)
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(
+                key,
+                json.dumps(asdict(entry), ensure_ascii=False),
+                px=max(1, int((entry.stale_until - now) * 1000)),
+            )
+        except RedisError:
+            logger.warning("Redis set failed for %s", key, exc_info=True)
+
+
+def _sources(offers: list[dict[str, Any]]) -> set[str]:
+    return {offer.get("source", "") for offer in offers}
+
+
+async def _engine_loader(query: str, location: str) -> SearchResult:
+    return await get_search_engine().search(query, location)
+
+
+@lru_cache(maxsize=1)
+def get_search_cache() -> SearchCache:
+    """Cached singleton wired to the shared Redis client and search engine."""
+    settings = get_settings().cache
+    return SearchCache(
+        get_redis(),
+        _engine_loader,
+        local_max_entries=settings.local_max_entries,
+        ttl=settings.ttl,
+        stale_ttl=settings.stale_ttl,
+        partial_ttl=settings.partial_ttl,
+        store_ttls=settings.store_ttls,
+    )
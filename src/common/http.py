@@ -0,0 +1,26 @@
+"""Shared pooled HTTP client.
+
+One httpx.AsyncClient per process keeps TCP+TLS connections alive between
+calls instead of paying a handshake per request. Closed in the app lifespan.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+import httpx
+
+DEFAULT_TIMEOUT = httpx.Timeout(5.0, connect=3.0)
+DEFAULT_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=10)
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.AsyncClient:
+    """Cached singleton; connections are pooled per host."""
+    return httpx.AsyncClient(timeout=DEFAULT_TIMEOUT, limits=DEFAULT_LIMITS)
+
+
+async def close_http_client() -> None:
+    if get_http_client.cache_info().currsize:
+        await get_http_client().aclose()
+        get_http_client.cache_clear()
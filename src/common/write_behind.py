@@ -0,0 +1,153 @@
+"""Bounded write-behind buffer: callers append rows, one task writes them in batches.
+
+emit() only appends to an in-memory buffer and returns -- no I/O on the
+caller's path. One background task hands the buffer to the writer when
+batch_size rows are waiting or flush_interval has passed since the first
+of them, whichever comes first.
+
+The buffer is bounded: past max_queue, new rows are dropped and counted
+rather than growing memory while the database is down. A batch that
+fails to write is dropped and counted too; bookkeeping must never back
+up into serving. aclose() flushes what is left.
+
+Used by the analytics events (monitoring/events.py) and the scraped
+offers (database/ingest.py).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from typing import Any, Generic, TypeVar
+
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+Writer = Callable[[list[T]], Awaitable[None]]
+
+
+@dataclass
+class WriteBehindStats:
+    queued: int = 0
+    written: int = 0
+    batches: int = 0
+    # Buffer full, or emitted after shutdown began / outside an event loop
+    dropped: int = 0
+    # In a batch the writer failed
+    failed: int = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class WriteBehind(Generic[T]):
+    """Bounded in-memory buffer of rows, flushed in batches by one worker task.
+
+    metric is a Counter labelled by result (queued | written | dropped | failed).
+    """
+
+    def __init__(
+        self,
+        writer: Writer[T],
+        metric: Counter,
+        *,
+        name: str,
+        max_queue: int,
+        batch_size: int,
+        flush_interval: float,
+    ) -> None:
+        self._writer = writer
+        self._name = name
+        self._max_queue = max_queue
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queued = metric.labels(result="queued")
+        self._written = metric.labels(result="written")
+        self._dropped = metric.labels(result="dropped")
+        self._failed = metric.labels(result="failed")
+        self._buffer: deque[T] = deque()
+        self._wakeup = asyncio.Event()
+        self._full = asyncio.Event()
+        self._worker: asyncio.Task[None] | None = None
+        self._closing = False
+        self.stats = WriteBehindStats()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def emit(self, row: T) -> None:
+        """Buffer a row; returns immediately and never raises."""
+        if self._closing or len(self._buffer) >= self._max_queue or not self._ensure_worker():
+            self._drop(1)
+            return
+        self._buffer.append(row)
+        self.stats.queued += 1
+        self._queued.inc()
+        if len(self._buffer) == 1:
+            self._wakeup.set()
+        if len(self._buffer) >= self._batch_size:
+            self._full.set()
+
+    async def aclose(self, timeout: float = 10.0) -> None:
+        """Flush what is buffered (up to timeout), then stop the worker."""
+        self._closing = True
+        self._wakeup.set()
+        self._full.set()
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._worker, timeout)
+        except TimeoutError:
+            self._drop(len(self._buffer))
+            logger.warning("%s flush timed out, dropped %d", self._name, len(self._buffer))
+            self._buffer.clear()
+        logger.info("%s writer closed: %s", self._name, self.stats.snapshot())
+
+    def _ensure_worker(self) -> bool:
+        if self._worker is not None and not self._worker.done():
+            return True
+        try:
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        except RuntimeError:
+            return False  # no event loop (sync caller) -- nothing can flush
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            if not self._buffer:
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            if len(self._buffer) < self._batch_size and not self._closing:
+                # Wait for a full batch, but no longer than flush_interval
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), self._flush_interval)
+                except TimeoutError:
+                    pass
+            count = min(self._batch_size, len(self._buffer))
+            await self._flush([self._buffer.popleft() for _ in range(count)])
+
+    async def _flush(self, batch: list[T]) -> None:
+        try:
+            await self._writer(batch)
+        except Exception as e:  # COPY raises asyncpg errors, not wrapped by SQLAlchemy
+            logger.warning("Writing %d %s failed: %r", len(batch), self._name, e)
+            self.stats.failed += len(batch)
+            self._failed.inc(len(batch))
+            return
+        self.stats.written += len(batch)
+        self.stats.batches += 1
+        self._written.inc(len(batch))
+
+    def _drop(self, count: int) -> None:
+        self.stats.dropped += count
+        self._dropped.inc(count)
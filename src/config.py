@@ -29,9 +29,22 @@ class DatabaseSettings(BaseSettings):
     db: str = "smartshopper"
     user: str = "smartshopper"
     password: str = "localdev"
+    # Replaces the URL built from the fields above, e.g. a local SQLite stand-in:
+    # POSTGRES_DSN=sqlite+aiosqlite:///data/dev.sqlite3
+    dsn: str = ""
+    pool_size: int = 10
+    max_overflow: int = 5
+    pool_timeout: float = 5.0
+    pool_recycle: float = 1800.0
+    # Prepared statements kept per connection (asyncpg)
+    statement_cache_size: int = 500
+    # Keys per IN (...) lookup during bulk ingestion
+    batch_size: int = 500
 
     @property
     def async_url(self) -> str:
+        if self.dsn:
+            return self.dsn
         return (
             f"postgresql+asyncpg://{self.user}:{self.password}"
             f"@{self.host}:{self.port}/{self.db}"
@@ -45,6 +58,22 @@ class DatabaseSettings(BaseSettings):
         )
 
 
+@final
+class IngestSettings(BaseSettings):
+    """Write-behind storage of scraped offers and price history (database/ingest.py)."""
+
+    model_config = SettingsConfigDict(env_prefix="INGEST_")
+
+    enabled: bool = True
+    # Store results (one store's offers for one search) buffered before new ones are dropped
+    max_queue: int = 2000
+    # A flush (one transaction) happens at batch_size results or flush_interval seconds
+    batch_size: int = 50
+    flush_interval: float = 5.0
+    # Longest the final flush on shutdown may take
+    drain_timeout: float = 10.0
+
+
 @final
 class RedisSettings(BaseSettings):
     """Redis connection settings."""
@@ -70,6 +99,21 @@ class TelegramSettings(BaseSettings):
     webhook_url: str = ""
     webhook_path: str = "/webhook/telegram"
     secret_token: str = ""
+    # Live "first results fast" replies: edit one message as stores answer
+    stream_results: bool = True
+    edit_interval: float = 1.0
+    # One results message with a combined keyboard instead of 1 + N messages
+    compact_results: bool = True
+    # Shufi's LLM replies appear as they are generated (edited in place)
+    stream_replies: bool = True
+    # Webhook answers at once; updates are processed by a background worker pool
+    fast_ack: bool = True
+    update_workers: int = 16
+    update_max_backlog: int = 1000
+    update_dedup_size: int = 10_000
+    # Accepted but unfinished updates per user; more are acknowledged and dropped
+    update_max_per_user: int = 3
+    drain_timeout: float = 10.0
 
 
 @final
@@ -80,6 +124,19 @@ class LLMSettings(BaseSettings):
     openai_api_key: str = Field(default="", alias="OPENAI_API_KEY")
     supervisor_model: str = "claude-opus-4-6"
     worker_model: str = "gpt-4o-mini"
+    # Concurrent LLM calls per worker; a turn waiting longer than the timeout uses rules
+    llm_max_concurrency: int = 8
+    llm_queue_timeout: float = 2.0
+    # "memory" (per worker) or "redis" (daily spend shared across workers)
+    llm_budget_backend: str = "memory"
+    # Per-ConvState reply mode: auto | llm | template (see agents/policy.py)
+    llm_reply_modes: dict[str, str] = {}
+    # Memoized replies for turns with no history (see agents/reply_cache.py)
+    llm_reply_cache_size: int = 1000
+    llm_reply_cache_ttl: float = 6 * 3600
+    llm_reply_variants: int = 3
+    # Openings whose replies are generated at startup
+    llm_reply_warm: list[str] = ["מה אתה יודע לעשות?", "מי אתה?", "איך זה עובד?"]
 
 
 @final
@@ -89,6 +146,195 @@ class GoogleSettings(BaseSettings):
     maps_api_key: str = Field(default="", alias="GOOGLE_MAPS_API_KEY")
 
 
+@final
+class SearchSettings(BaseSettings):
+    """Multi-store search engine limits."""
+
+    model_config = SettingsConfigDict(env_prefix="SEARCH_")
+
+    global_concurrency: int = 32
+    per_store_concurrency: int = 4
+    store_timeout: float = 2.5
+    deadline: float = 3.0
+    use_fixtures: bool = True
+    # Store pages at least this many characters are parsed in worker processes
+    parse_offload_bytes: int = 1_000_000
+    parse_workers: int = 2
+
+
+@final
+class FetchSettings(BaseSettings):
+    """Shared per-store-domain HTTP layer (see scrapers/utils/fetch.py)."""
+
+    model_config = SettingsConfigDict(env_prefix="FETCH_")
+
+    http2: bool = True
+    # Keep below SEARCH_STORE_TIMEOUT so a slow store counts against its breaker
+    timeout: float = 2.0
+    initial_concurrency: int = 4
+    min_concurrency: int = 1
+    max_concurrency: int = 16
+    # A response this many times slower than the domain's average shrinks the limit
+    latency_factor: float = 2.0
+    # Consecutive failures that mark a store degraded, and for how long
+    failure_threshold: int = 5
+    open_seconds: float = 30.0
+    validator_cache_size: int = 512
+
+
+@final
+class BrowserSettings(BaseSettings):
+    """Headless Chromium pool for stores that need JavaScript rendering."""
+
+    model_config = SettingsConfigDict(env_prefix="BROWSER_")
+
+    browsers: int = 2
+    contexts_per_browser: int = 4
+    # A context is closed and replaced (cookies kept) after this many pages
+    pages_per_context: int = 50
+    # Longest wait for a free context before the render gives up
+    queue_timeout: float = 5.0
+    block_resources: list[str] = ["image", "media", "font"]
+    block_hosts: list[str] = [
+        "google-analytics.com",
+        "googletagmanager.com",
+        "doubleclick.net",
+        "facebook.net",
+        "hotjar.com",
+    ]
+
+
+@final
+class CacheSettings(BaseSettings):
+    """Search-result cache (in-process LRU in front of Redis)."""
+
+    model_config = SettingsConfigDict(env_prefix="CACHE_")
+
+    enabled: bool = True
+    local_max_entries: int = 2048
+    ttl: float = 600.0
+    # Served stale while a background refresh runs, after ttl expires
+    stale_ttl: float = 1800.0
+    # Freshness of a result some stores timed out of; revalidated after that
+    partial_ttl: float = 30.0
+    # Per-store freshness overrides, e.g. CACHE_STORE_TTLS='{"Amazon IL": 1800}'
+    store_ttls: dict[str, float] = Field(default_factory=dict)
+
+
+@final
+class RefreshSettings(BaseSettings):
+    """Background price refresher that keeps popular searches warm (cache/refresher.py)."""
+
+    model_config = SettingsConfigDict(env_prefix="REFRESH_")
+
+    enabled: bool = True
+    # How often the work queue is rebuilt; each run starts up to jitter x tick late
+    tick_seconds: float = 15.0
+    jitter: float = 0.2
+    # Searches decay by half every half_life seconds; below min_score a query isn't refreshed
+    half_life: float = 3600.0
+    min_score: float = 2.0
+    top_queries: int = 200
+    max_tracked: int = 10_000
+    # A store's offers are refreshed at this fraction of its cache TTL...
+    refresh_at: float = 0.8
+    # ...unless it has its own interval (seconds), e.g. REFRESH_STORE_INTERVALS='{"KSP": 300}'
+    store_intervals: dict[str, float] = Field(default_factory=dict)
+    # Politeness: background requests per store per minute
+    store_budget: float = 30.0
+    store_budgets: dict[str, float] = Field(default_factory=dict)
+
+
+@final
+class SessionSettings(BaseSettings):
+    """Shufi conversation session storage."""
+
+    model_config = SettingsConfigDict(env_prefix="SESSION_")
+
+    # "memory" (single worker) or "redis" (shared across workers)
+    backend: str = "memory"
+    idle_ttl: float = 1800.0
+    max_entries: int = 100_000
+    # Keep in-memory sessions zlib-compressed between messages
+    compress: bool = False
+
+
+@final
+class RateLimitSettings(BaseSettings):
+    """Per-user message rate limit (GCRA)."""
+
+    model_config = SettingsConfigDict(env_prefix="RATE_LIMIT_")
+
+    # "memory" (single worker) or "redis" (shared across workers)
+    backend: str = "memory"
+    max_requests: int = 15
+    window: float = 60.0
+    # How often idle users are dropped from the in-memory limiter
+    sweep_interval: float = 60.0
+
+
+@final
+class UserLockSettings(BaseSettings):
+    """One message in flight per user."""
+
+    model_config = SettingsConfigDict(env_prefix="USER_LOCK_")
+
+    # "memory" (single worker) or "redis" (lease shared across workers)
+    backend: str = "memory"
+    # Let one follow-up message wait for the lock instead of rejecting it
+    queue_next: bool = False
+    lease_ttl: float = 30.0
+    wait_timeout: float = 30.0
+
+
+@final
+class DiscordSettings(BaseSettings):
+    """Background delivery of Discord monitoring embeds."""
+
+    model_config = SettingsConfigDict(env_prefix="DISCORD_")
+
+    max_queue: int = 1000
+    batch_size: int = 10
+    flush_interval: float = 2.0
+    # Past this fraction of max_queue, keep only 1 in sample_every routine embeds
+    high_watermark: float = 0.8
+    sample_every: int = 10
+
+
+@final
+class EventSettings(BaseSettings):
+    """Write-behind search/conversion events for the daily report (monitoring/events.py)."""
+
+    model_config = SettingsConfigDict(env_prefix="EVENTS_")
+
+    enabled: bool = True
+    # Past this many buffered events new ones are dropped (and counted)
+    max_queue: int = 10_000
+    # A flush happens at batch_size events or flush_interval seconds, whichever comes first
+    batch_size: int = 500
+    flush_interval: float = 5.0
+    # Longest the final flush on shutdown may take
+    drain_timeout: float = 10.0
+
+
+@final
+class LogisticsSettings(BaseSettings):
+    """Distance data for shipping prices."""
+
+    model_config = SettingsConfigDict(env_prefix="LOGISTICS_")
+
+    data_dir: Path = Path(__file__).resolve().parent.parent / "data"
+    geocode_cache_size: int = 50_000
+    # How long an address the geocoder couldn't resolve isn't retried
+    geocode_negative_ttl: float = 3600.0
+    # How long to wait before retrying after a geocoder failure (timeout, 5xx)
+    geocode_retry_ttl: float = 60.0
+    # Straight-line km -> estimated road km
+    road_factor: float = 1.25
+    # Used while an unknown address is geocoded in the background
+    fallback_location: str = "מרכז"
+
+
 @final
 class EmailSettings(BaseSettings):
     """Email / SendGrid settings for daily reports."""
@@ -121,14 +367,26 @@ class Settings(BaseSettings):
 
     # Discord
     discord_webhook_url: str = Field(default="", alias="DISCORD_WEBHOOK_URL")
+    discord: DiscordSettings = Field(default_factory=DiscordSettings)
+    events: EventSettings = Field(default_factory=EventSettings)
 
     # Nested sub-settings
     database: DatabaseSettings = Field(default_factory=DatabaseSettings)
+    ingest: IngestSettings = Field(default_factory=IngestSettings)
     redis: RedisSettings = Field(default_factory=RedisSettings)
     telegram: TelegramSettings = Field(default_factory=TelegramSettings)
     llm: LLMSettings = Field(default_factory=LLMSettings)
     google: GoogleSettings = Field(default_factory=GoogleSettings)
     email: EmailSettings = Field(default_factory=EmailSettings)
+    search: SearchSettings = Field(default_factory=SearchSettings)
+    fetch: FetchSettings = Field(default_factory=FetchSettings)
+    browser: BrowserSettings = Field(default_factory=BrowserSettings)
+    cache: CacheSettings = Field(default_factory=CacheSettings)
+    refresh: RefreshSettings = Field(default_factory=RefreshSettings)
+    session: SessionSettings = Field(default_factory=SessionSettings)
+    rate_limit: RateLimitSettings = Field(default_factory=RateLimitSettings)
+    user_lock: UserLockSettings = Field(default_factory=UserLockSettings)
+    logistics: LogisticsSettings = Field(default_factory=LogisticsSettings)
 
     @model_validator(mode="after")
     def validate_production_settings(self) -> Settings:
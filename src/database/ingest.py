@@ -0,0 +1,79 @@
+"""Write-behind storage of scraped offers: products, latest offers, price history.
+
+Every store result the search engine produces -- a user's search or a
+background refresh; cache hits never reach the engine -- is handed to
+record_offers(), which only appends it to a bounded buffer
+(common/write_behind.py). The worker saves buffered results with
+save_offers(), in arrival order, one transaction per batch, so the
+latest price of a (product, store) wins. Results past max_queue, or in a
+batch that fails to write, are dropped and counted; the lifespan flushes
+what is left on shutdown.
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from functools import lru_cache
+from typing import Any
+
+from src.common.write_behind import WriteBehind, Writer
+from src.config import get_settings
+from src.database.repositories.offers import save_offers
+from src.database.session import ensure_schema, get_sessionmaker
+from src.monitoring.metrics import OFFER_INGEST
+
+# (one store's offers for one search, when they were scraped)
+OfferBatch = tuple[list[dict[str, Any]], datetime]
+
+
+class OfferRecorder(WriteBehind[OfferBatch]):
+    """Store results buffered and saved with save_offers() in batches."""
+
+    def __init__(
+        self,
+        writer: Writer[OfferBatch] | None = None,
+        *,
+        max_queue: int = 2000,
+        batch_size: int = 50,
+        flush_interval: float = 5.0,
+    ) -> None:
+        super().__init__(
+            writer if writer is not None else _write_offers,
+            OFFER_INGEST,
+            name="offer results",
+            max_queue=max_queue,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+        )
+
+
+async def _write_offers(batches: list[OfferBatch]) -> None:
+    """One transaction per batch; tables are created on the first one."""
+    await ensure_schema()
+    batch_size = get_settings().database.batch_size
+    async with get_sessionmaker()() as session, session.begin():
+        for offers, seen_at in batches:
+            await save_offers(session, offers, seen_at, batch_size)
+
+
+def record_offers(offers: list[dict[str, Any]]) -> None:
+    """A store answered a search with offers; store them in the background."""
+    if offers and get_settings().ingest.enabled:
+        get_offer_recorder().emit((offers, datetime.now(UTC)))
+
+
+@lru_cache(maxsize=1)
+def get_offer_recorder() -> OfferRecorder:
+    """Cached singleton; its worker starts with the first result."""
+    settings = get_settings().ingest
+    return OfferRecorder(
+        max_queue=settings.max_queue,
+        batch_size=settings.batch_size,
+        flush_interval=settings.flush_interval,
+    )
+
+
+async def close_offer_recorder() -> None:
+    if get_offer_recorder.cache_info().currsize:
+        await get_offer_recorder().aclose(get_settings().ingest.drain_timeout)
+        get_offer_recorder.cache_clear()
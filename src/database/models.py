@@ -0,0 +1,99 @@
+"""Products, store offers, price history and user events.
+
+- products: one row per normalized model (scrapers/ranking.py model_key),
+  shared by every store that sells it
+- store_offers: the latest offer per (product, store), i.e. price, url and
+  when it was last seen
+- price_history: append-only, one row per first sighting or price change
+  of a product at a store
+- user_events: append-only searches and conversions (delivery orders) for
+  the daily report, written in batches by monitoring/events.py
+
+The indexes are the ones the repositories query by: product by model key,
+offers by product and by store (plus last seen), a product's history at
+a store ordered by time, and events of one kind over a time window.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    UniqueConstraint,
+    func,
+)
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from src.logistics.pricing import DEFAULT_SIZE
+
+# BIGSERIAL on PostgreSQL; SQLite only autoincrements INTEGER PRIMARY KEY
+_ID = BigInteger().with_variant(Integer, "sqlite")
+# Shekels; floats in Python, exact in the database
+_PRICE = Numeric(10, 2, asdecimal=False)
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Product(Base):
+    __tablename__ = "products"
+
+    id: Mapped[int] = mapped_column(_ID, primary_key=True)
+    model_key: Mapped[str] = mapped_column(String, unique=True)
+    name: Mapped[str] = mapped_column(String)
+    size: Mapped[str] = mapped_column(String(2), default=DEFAULT_SIZE)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+
+class StoreOffer(Base):
+    __tablename__ = "store_offers"
+    __table_args__ = (
+        UniqueConstraint("product_id", "store", name="uq_store_offers_product_store"),
+        Index("ix_store_offers_store_seen_at", "store", "seen_at"),
+    )
+
+    id: Mapped[int] = mapped_column(_ID, primary_key=True)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id", ondelete="CASCADE"))
+    store: Mapped[str] = mapped_column(String)
+    price: Mapped[float] = mapped_column(_PRICE)
+    url: Mapped[str | None] = mapped_column(String)
+    delivery_days: Mapped[str | None] = mapped_column(String)
+    seen_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+
+class PriceHistory(Base):
+    __tablename__ = "price_history"
+    __table_args__ = (
+        Index("ix_price_history_product_store_time", "product_id", "store", "recorded_at"),
+    )
+
+    id: Mapped[int] = mapped_column(_ID, primary_key=True)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id", ondelete="CASCADE"))
+    store: Mapped[str] = mapped_column(String)
+    price: Mapped[float] = mapped_column(_PRICE)
+    recorded_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+
+class UserEvent(Base):
+    __tablename__ = "user_events"
+    __table_args__ = (Index("ix_user_events_kind_created_at", "kind", "created_at"),)
+
+    id: Mapped[int] = mapped_column(_ID, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(20))
+    user_id: Mapped[int] = mapped_column(BigInteger)
+    # Searches: what was asked for and how many results were shown
+    query: Mapped[str | None] = mapped_column(String)
+    results: Mapped[int | None] = mapped_column(Integer)
+    # Conversions: the offer a delivery was ordered for
+    product_id: Mapped[str | None] = mapped_column(String)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
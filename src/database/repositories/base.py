@@ -0,0 +1,49 @@
+"""Helpers shared by the repositories: dialect-specific INSERT, COPY and batching."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator, Sequence
+from typing import Any, TypeVar
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import Base
+
+T = TypeVar("T")
+
+
+def is_postgres(session: AsyncSession) -> bool:
+    return session.get_bind().dialect.name == "postgresql"
+
+
+def insert(session: AsyncSession, model: type[Base]) -> postgresql.Insert | sqlite.Insert:
+    """INSERT with ON CONFLICT support for the session's database."""
+    return postgresql.insert(model) if is_postgres(session) else sqlite.insert(model)
+
+
+async def copy_records(
+    session: AsyncSession,
+    model: type[Base],
+    records: Sequence[tuple[Any, ...]],
+    columns: Sequence[str],
+) -> bool:
+    """COPY records into model's table in the session's transaction (asyncpg).
+
+    False when COPY isn't available -- another database, or no live driver
+    connection -- and the caller should INSERT instead.
+    """
+    if not is_postgres(session):
+        return False
+    connection = await session.connection()
+    driver = (await connection.get_raw_connection()).driver_connection
+    if driver is None:
+        return False
+    await driver.copy_records_to_table(model.__tablename__, records=records, columns=columns)
+    return True
+
+
+def batched(rows: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    """Slices of at most size rows; one multi-row statement each."""
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
@@ -0,0 +1,72 @@
+"""Search and conversion events, and the daily report's view of them."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import UserEvent
+from src.database.repositories.base import copy_records, insert
+
+KIND_SEARCH = "search"
+KIND_CONVERSION = "conversion"
+
+# (kind, user_id, query, results, product_id, created_at)
+EventRow = tuple[str, int, str | None, int | None, str | None, datetime]
+
+_COLUMNS = ("kind", "user_id", "query", "results", "product_id", "created_at")
+
+
+@dataclass
+class EventSummary:
+    searches: int = 0
+    conversions: int = 0
+    # (query, searches), most requested first
+    top_queries: list[tuple[str, int]] = field(default_factory=list)
+
+    @property
+    def conversion_rate(self) -> float:
+        return self.conversions / self.searches if self.searches else 0.0
+
+
+class EventRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    async def append(self, rows: Sequence[EventRow]) -> None:
+        """Write rows in the session's transaction: COPY on PostgreSQL, executemany elsewhere."""
+        if not rows:
+            return
+        if await copy_records(self._session, UserEvent, rows, _COLUMNS):
+            return
+        await self._session.execute(
+            insert(self._session, UserEvent), [dict(zip(_COLUMNS, row)) for row in rows]
+        )
+
+    async def summary(self, since: datetime, until: datetime, top: int = 10) -> EventSummary:
+        """Counts for [since, until) and the most searched queries."""
+        window = (UserEvent.created_at >= since, UserEvent.created_at < until)
+        counts = dict(
+            (
+                await self._session.execute(
+                    select(UserEvent.kind, func.count()).where(*window).group_by(UserEvent.kind)
+                )
+            ).all()
+        )
+        query = func.lower(UserEvent.query)
+        top_queries = await self._session.execute(
+            select(query, func.count())
+            .where(UserEvent.kind == KIND_SEARCH, *window)
+            .group_by(query)
+            .order_by(func.count().desc())
+            .limit(top)
+        )
+        return EventSummary(
+            searches=counts.get(KIND_SEARCH, 0),
+            conversions=counts.get(KIND_CONVERSION, 0),
+            top_queries=[(query, count) for query, count in top_queries],
+        )
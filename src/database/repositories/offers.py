@@ -0,0 +1,120 @@
+"""Latest offer per (product, store), and ingestion of a search's offers."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import Product, StoreOffer
+from src.database.repositories.base import batched, insert
+from src.database.repositories.prices import PriceHistoryRepository, PriceRow
+from src.database.repositories.products import ProductRepository
+from src.logistics.pricing import DEFAULT_SIZE
+from src.scrapers.ranking import model_key
+
+
+class OfferRepository:
+    def __init__(self, session: AsyncSession, batch_size: int = 500) -> None:
+        self._session = session
+        self._batch_size = batch_size
+
+    async def upsert(self, rows: Iterable[dict[str, Any]]) -> list[PriceRow]:
+        """Insert or update offer rows (product_id, store, price, url, delivery_days, seen_at).
+
+        Returns the rows whose price is new or changed, as price history rows.
+        The same (product, store) twice keeps the cheapest.
+        """
+        latest: dict[tuple[int, str], dict[str, Any]] = {}
+        for row in rows:
+            key = (row["product_id"], row["store"])
+            if key not in latest or row["price"] < latest[key]["price"]:
+                latest[key] = row
+
+        keys = list(latest)
+        known: dict[tuple[int, str], float] = {}
+        for batch in batched(keys, self._batch_size):
+            result = await self._session.execute(
+                select(StoreOffer.product_id, StoreOffer.store, StoreOffer.price).where(
+                    tuple_(StoreOffer.product_id, StoreOffer.store).in_(batch)
+                )
+            )
+            known.update(((product_id, store), price) for product_id, store, price in result)
+
+        stmt = insert(self._session, StoreOffer)
+        await self._session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[StoreOffer.product_id, StoreOffer.store],
+                set_={
+                    "price": stmt.excluded.price,
+                    "url": stmt.excluded.url,
+                    "delivery_days": stmt.excluded.delivery_days,
+                    "seen_at": stmt.excluded.seen_at,
+                },
+            ),
+            list(latest.values()),
+        )
+
+        return [
+            (row["product_id"], row["store"], row["price"], row["seen_at"])
+            for key, row in latest.items()
+            if known.get(key) != row["price"]
+        ]
+
+    async def for_product(self, model_key: str) -> list[StoreOffer]:
+        """Every store's latest offer for a product, cheapest first."""
+        return list(
+            await self._session.scalars(
+                select(StoreOffer)
+                .join(Product, Product.id == StoreOffer.product_id)
+                .where(Product.model_key == model_key)
+                .order_by(StoreOffer.price)
+            )
+        )
+
+    async def for_store(self, store: str, since: datetime | None = None) -> list[StoreOffer]:
+        """A store's offers, most recently seen first."""
+        query = select(StoreOffer).where(StoreOffer.store == store)
+        if since is not None:
+            query = query.where(StoreOffer.seen_at >= since)
+        return list(await self._session.scalars(query.order_by(StoreOffer.seen_at.desc())))
+
+
+async def save_offers(
+    session: AsyncSession,
+    offers: list[dict[str, Any]],
+    seen_at: datetime | None = None,
+    batch_size: int = 500,
+) -> int:
+    """Ingest one search's offers: products, latest offers, price changes.
+
+    Each step is one statement for all rows -- an executemany of a prepared
+    INSERT ... ON CONFLICT, lookups batch_size keys at a time, one COPY for
+    the history -- rather than round trips per offer (benchmarks/offer_ingest.py).
+    Runs in the caller's transaction; returns how many history rows were written.
+    """
+    if not offers:
+        return 0
+    seen_at = seen_at or datetime.now(UTC)
+    keys = [model_key(offer) for offer in offers]
+    products = ProductRepository(session, batch_size)
+    ids = await products.ensure(
+        {"model_key": key, "name": offer["name"], "size": offer.get("size", DEFAULT_SIZE)}
+        for key, offer in zip(keys, offers)
+    )
+    changed = await OfferRepository(session, batch_size).upsert(
+        {
+            "product_id": ids[key],
+            "store": offer.get("source", ""),
+            "price": round(float(offer["price"]), 2),
+            "url": offer.get("url"),
+            "delivery_days": offer.get("delivery_days"),
+            "seen_at": seen_at,
+        }
+        for key, offer in zip(keys, offers)
+    )
+    await PriceHistoryRepository(session).append(changed)
+    return len(changed)
@@ -0,0 +1,52 @@
+"""Append-only price history."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import PriceHistory, Product
+from src.database.repositories.base import copy_records, insert
+
+# (product_id, store, price, recorded_at)
+PriceRow = tuple[int, str, float, datetime]
+
+_COLUMNS = ("product_id", "store", "price", "recorded_at")
+
+
+class PriceHistoryRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    async def append(self, rows: Sequence[PriceRow]) -> None:
+        """Write rows in the session's transaction: COPY on PostgreSQL, executemany elsewhere."""
+        if not rows:
+            return
+        records = [
+            (product_id, store, Decimal(str(price)), at) for product_id, store, price, at in rows
+        ]
+        if await copy_records(self._session, PriceHistory, records, _COLUMNS):
+            return
+        await self._session.execute(
+            insert(self._session, PriceHistory), [dict(zip(_COLUMNS, row)) for row in rows]
+        )
+
+    async def history(
+        self, model_key: str, store: str | None = None, since: datetime | None = None
+    ) -> list[PriceHistory]:
+        """A product's price changes, oldest first (one store, or all)."""
+        query = (
+            select(PriceHistory)
+            .join(Product, Product.id == PriceHistory.product_id)
+            .where(Product.model_key == model_key)
+            .order_by(PriceHistory.store, PriceHistory.recorded_at)
+        )
+        if store is not None:
+            query = query.where(PriceHistory.store == store)
+        if since is not None:
+            query = query.where(PriceHistory.recorded_at >= since)
+        return list(await self._session.scalars(query))
@@ -0,0 +1,44 @@
+"""Products, keyed on the normalized model key."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import Product
+from src.database.repositories.base import batched, insert
+
+
+class ProductRepository:
+    def __init__(self, session: AsyncSession, batch_size: int = 500) -> None:
+        self._session = session
+        self._batch_size = batch_size
+
+    async def get(self, model_key: str) -> Product | None:
+        return await self._session.scalar(select(Product).where(Product.model_key == model_key))
+
+    async def ensure(self, products: Iterable[dict[str, Any]]) -> dict[str, int]:
+        """model_key -> id for product dicts (model_key, name, size), inserting new ones.
+
+        Existing products are left as they are (ON CONFLICT DO NOTHING), so
+        re-ingesting a known product writes nothing.
+        """
+        rows = list({product["model_key"]: product for product in products}.values())
+        await self._session.execute(
+            insert(self._session, Product).on_conflict_do_nothing(
+                index_elements=[Product.model_key]
+            ),
+            rows,
+        )
+
+        ids: dict[str, int] = {}
+        keys = [row["model_key"] for row in rows]
+        for batch in batched(keys, self._batch_size):
+            result = await self._session.execute(
+                select(Product.model_key, Product.id).where(Product.model_key.in_(batch))
+            )
+            ids.update(result.all())
+        return ids
@@ -0,0 +1,80 @@
+"""Async SQLAlchemy engine and sessions.
+
+One engine per process. On PostgreSQL (asyncpg) it gets a bounded pool
+that is pre-pinged and recycled, JIT off (it only slows the short queries
+we run), and a prepared statement cache per connection. Bulk writes are
+executemany calls of one INSERT ... ON CONFLICT, so the statement is
+prepared once per connection and asyncpg pipelines the rows. POSTGRES_DSN
+can point at SQLite (aiosqlite) as a local stand-in; the repositories
+support both.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+from sqlalchemy import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from src.config import get_settings
+from src.database.models import Base
+
+
+def create_db_engine(url: str | None = None) -> AsyncEngine:
+    settings = get_settings().database
+    db_url = make_url(url or settings.async_url)
+    if db_url.get_backend_name() != "postgresql":
+        return create_async_engine(db_url)
+    return create_async_engine(
+        db_url.update_query_dict(
+            {"prepared_statement_cache_size": str(settings.statement_cache_size)}
+        ),
+        pool_size=settings.pool_size,
+        max_overflow=settings.max_overflow,
+        pool_timeout=settings.pool_timeout,
+        pool_recycle=settings.pool_recycle,
+        pool_pre_ping=True,
+        connect_args={"server_settings": {"application_name": "smartshopper", "jit": "off"}},
+    )
+
+
+@lru_cache(maxsize=1)
+def get_db_engine() -> AsyncEngine:
+    """Cached singleton engine for POSTGRES_* settings."""
+    return create_db_engine()
+
+
+@lru_cache(maxsize=1)
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(get_db_engine(), expire_on_commit=False)
+
+
+async def create_schema(engine: AsyncEngine | None = None) -> None:
+    """Create missing tables and indexes (existing ones are left alone)."""
+    async with (engine or get_db_engine()).begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+_schema_ready = False
+
+
+async def ensure_schema() -> None:
+    """create_schema() for the shared engine, once per process (write-behind writers)."""
+    global _schema_ready
+    if not _schema_ready:
+        await create_schema()
+        _schema_ready = True
+
+
+async def close_db_engine() -> None:
+    global _schema_ready
+    _schema_ready = False
+    if get_db_engine.cache_info().currsize:
+        await get_db_engine().dispose()
+        get_sessionmaker.cache_clear()
+        get_db_engine.cache_clear()
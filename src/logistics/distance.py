@@ -0,0 +1,331 @@
+"""Distance provider for shipping prices -- no network round trip per search.
+
+Lookup order for a user location:
+1. Known city/region (ISRAELI_CITIES) -> row of the precomputed city x store
+   matrix, a float32 .npy file memory-mapped at startup.
+2. Ad-hoc address already geocoded -> in-process LRU, then the persistent
+   SQLite LRU -> haversine to each store's nearest branch.
+3. Unknown address -> fallback region row now; the address is geocoded in
+   the background so the next search for it is exact. One the geocoder
+   says doesn't exist stays on the fallback for negative_ttl; one it failed
+   on (timeout, 5xx) is retried after the much shorter retry_ttl.
+Straight-line km are scaled by road_factor to estimate road distance.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from collections.abc import Sequence
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+
+from src.agents.entities import extract_entities
+from src.cache.lru import LRUCache
+from src.config import get_settings
+from src.logistics.geo import CITY_CENTROIDS, STORE_BRANCHES, branch_coordinates, haversine_km
+from src.logistics.geocoding import (
+    GeocodingBackend,
+    GeocodingError,
+    LatLon,
+    create_geocoder,
+)
+
+logger = logging.getLogger(__name__)
+
+MATRIX_FILE = "distance_matrix.npy"
+INDEX_FILE = "distance_matrix.json"
+GEOCODE_DB = "geocode_cache.sqlite3"
+
+
+def _normalize(address: str) -> str:
+    return " ".join(address.lower().split())
+
+
+class DistanceMatrix:
+    """City x store road-distance estimates (km), backed by a memory-mapped .npy file."""
+
+    def __init__(self, cities: list[str], stores: list[str], km: npt.NDArray[np.float32]) -> None:
+        self._city_index = {city: i for i, city in enumerate(cities)}
+        self._store_index = {store: i for i, store in enumerate(stores)}
+        self._km = km
+
+    @classmethod
+    def build(cls, road_factor: float) -> DistanceMatrix:
+        cities = list(CITY_CENTROIDS)
+        stores = list(STORE_BRANCHES)
+        city_coords = np.array([CITY_CENTROIDS[c] for c in cities])
+        km = np.empty((len(cities), len(stores)), dtype=np.float32)
+        for j, store in enumerate(stores):
+            branches = branch_coordinates(store)
+            # (cities, branches) -> nearest branch per city
+            km[:, j] = haversine_km(
+                city_coords[:, None, 0], city_coords[:, None, 1],
+                branches[None, :, 0], branches[None, :, 1],
+            ).min(axis=1) * road_factor
+        return cls(cities, stores, km)
+
+    @classmethod
+    def load_or_build(cls, data_dir: Path, road_factor: float) -> DistanceMatrix:
+        """Memory-map the saved matrix; rebuild it if the city/store tables changed."""
+        cities, stores = list(CITY_CENTROIDS), list(STORE_BRANCHES)
+        index = {"cities": cities, "stores": stores, "road_factor": road_factor}
+        matrix_path, index_path = data_dir / MATRIX_FILE, data_dir / INDEX_FILE
+        if matrix_path.exists() and index_path.exists():
+            if json.loads(index_path.read_text(encoding="utf-8")) == index:
+                return cls(cities, stores, np.load(matrix_path, mmap_mode="r"))
+            logger.info("Distance matrix is stale, rebuilding")
+
+        matrix = cls.build(road_factor)
+        data_dir.mkdir(parents=True, exist_ok=True)
+        np.save(matrix_path, matrix._km)
+        index_path.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+        return cls(cities, stores, np.load(matrix_path, mmap_mode="r"))
+
+    def has_city(self, city: str) -> bool:
+        return city in self._city_index
+
+    def row(self, city: str, stores: Sequence[str]) -> npt.NDArray[np.float64]:
+        """km from city to each store; NaN for stores without known branches."""
+        km = self._km[self._city_index[city]]
+        return np.array(
+            [km[self._store_index[s]] if s in self._store_index else np.nan for s in stores],
+            dtype=np.float64,
+        )
+
+
+class GeocodeCache:
+    """Address -> (lat, lon). In-process LRU in front of a size-capped SQLite table.
+
+    Lookups are indexed point reads on the event loop. Writes (new
+    addresses and last_used touches) are queued and applied in one
+    transaction on a worker thread, so a search never waits on a commit.
+    Addresses the geocoder couldn't resolve are remembered in memory only,
+    for negative_ttl, so they aren't sent to the geocoder on every search.
+    """
+
+    def __init__(self, path: Path | str, max_entries: int, negative_ttl: float = 3600.0) -> None:
+        self._max_entries = max_entries
+        self._negative_ttl = negative_ttl
+        self._memory: LRUCache[str, LatLon] = LRUCache(min(max_entries, 4096))
+        self._unresolved: LRUCache[str, bool] = LRUCache(min(max_entries, 4096))
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        # WAL: reads on the loop don't wait for the writer thread's transaction
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            " address TEXT PRIMARY KEY, lat REAL NOT NULL, lon REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS geocode_last_used ON geocode(last_used)")
+        self._db.commit()
+        # Used only by the flush thread (one flush at a time)
+        self._writer = sqlite3.connect(str(path), check_same_thread=False)
+        # address -> (coords, last_used); coords None means touch last_used only
+        self._queued: dict[str, tuple[LatLon | None, float]] = {}
+        self._flushing: asyncio.Task[None] | None = None
+
+    def get(self, address: str) -> LatLon | None:
+        key = _normalize(address)
+        hit = self._memory.get(key)
+        if hit is not None:
+            return hit
+        row = self._db.execute(
+            "SELECT lat, lon FROM geocode WHERE address = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        coords = (row[0], row[1])
+        self._memory.set(key, coords)
+        self._queue(key, None)
+        return coords
+
+    def set(self, address: str, coords: LatLon) -> None:
+        key = _normalize(address)
+        self._memory.set(key, coords)
+        self._unresolved.pop(key)
+        self._queue(key, coords)
+
+    def is_unresolved(self, address: str) -> bool:
+        return _normalize(address) in self._unresolved
+
+    def set_unresolved(self, address: str, ttl: float | None = None) -> None:
+        """Remember that address didn't geocode, for ttl (default negative_ttl)."""
+        self._unresolved.set(
+            _normalize(address), True, ttl=self._negative_ttl if ttl is None else ttl
+        )
+
+    async def flush(self) -> None:
+        """Write queued rows off the event loop, one transaction per batch."""
+        while self._queued:
+            rows, self._queued = self._queued, {}
+            try:
+                await asyncio.to_thread(self._write, rows)
+            except sqlite3.Error:
+                logger.warning(
+                    "Geocode cache write failed, %d rows lost", len(rows), exc_info=True
+                )
+
+    async def aclose(self) -> None:
+        self._flush_later()
+        if self._flushing is not None:
+            await self._flushing
+        self._db.close()
+        self._writer.close()
+
+    def _queue(self, key: str, coords: LatLon | None) -> None:
+        queued = self._queued.get(key)
+        if coords is None and queued is not None:
+            coords = queued[0]  # a touch doesn't undo a pending insert
+        self._queued[key] = (coords, time.time())
+        self._flush_later()
+
+    def _flush_later(self) -> None:
+        if self._flushing is not None and not self._flushing.done():
+            return  # the running flush picks up rows queued meanwhile
+        try:
+            self._flushing = asyncio.get_running_loop().create_task(self.flush())
+        except RuntimeError:
+            # No event loop (sync caller) -- write inline
+            rows, self._queued = self._queued, {}
+            self._write(rows)
+
+    def _write(self, rows: dict[str, tuple[LatLon | None, float]]) -> None:
+        added = [(key, c[0], c[1], used) for key, (c, used) in rows.items() if c is not None]
+        touched = [(used, key) for key, (c, used) in rows.items() if c is None]
+        with self._writer:  # commit, or roll back on error
+            if added:
+                self._writer.executemany(
+                    "INSERT OR REPLACE INTO geocode (address, lat, lon, last_used)"
+                    " VALUES (?, ?, ?, ?)",
+                    added,
+                )
+            if touched:
+                self._writer.executemany(
+                    "UPDATE geocode SET last_used = ? WHERE address = ?", touched
+                )
+            if not added:
+                return
+            (count,) = self._writer.execute("SELECT COUNT(*) FROM geocode").fetchone()
+            if count > self._max_entries:
+                # Evict least recently used rows beyond the cap
+                self._writer.execute(
+                    "DELETE FROM geocode WHERE address IN ("
+                    " SELECT address FROM geocode ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self._max_entries,),
+                )
+
+
+class DistanceProvider:
+    """km from a user location to stores, answered from local data only."""
+
+    def __init__(
+        self,
+        matrix: DistanceMatrix,
+        geocoder: GeocodingBackend,
+        cache: GeocodeCache,
+        *,
+        road_factor: float,
+        fallback_location: str,
+        retry_ttl: float = 60.0,
+    ) -> None:
+        self._matrix = matrix
+        self._geocoder = geocoder
+        self._cache = cache
+        self._road_factor = road_factor
+        self._fallback = fallback_location
+        self._retry_ttl = retry_ttl
+        self._pending: dict[str, asyncio.Task[None]] = {}
+
+    def distances(self, location: str, stores: Sequence[str]) -> npt.NDArray[np.float64]:
+        """km from location to each store (NaN where the store has no known branch)."""
+        city = self._known_city(location)
+        if city is not None:
+            return self._matrix.row(city, stores)
+
+        coords = self._cache.get(location)
+        if coords is not None:
+            return self._from_coords(coords, stores)
+
+        if not self._cache.is_unresolved(location):
+            self._geocode_later(location)
+        return self._matrix.row(self._fallback, stores)
+
+    def distance_km(self, location: str, store: str) -> float | None:
+        km = float(self.distances(location, [store])[0])
+        return None if np.isnan(km) else km
+
+    def _known_city(self, location: str) -> str | None:
+        if self._matrix.has_city(location):
+            return location
+        city = extract_entities(location).location
+        return city if city is not None and self._matrix.has_city(city) else None
+
+    def _from_coords(self, coords: LatLon, stores: Sequence[str]) -> npt.NDArray[np.float64]:
+        km = np.full(len(stores), np.nan)
+        for i, store in enumerate(stores):
+            if store in STORE_BRANCHES:
+                branches = branch_coordinates(store)
+                km[i] = haversine_km(coords[0], coords[1], branches[:, 0], branches[:, 1]).min()
+        return km * self._road_factor
+
+    def _geocode_later(self, location: str) -> None:
+        key = _normalize(location)
+        if key in self._pending:
+            return
+        try:
+            task = asyncio.get_running_loop().create_task(self._geocode(location))
+        except RuntimeError:
+            return  # no loop (sync caller) -- stay on the fallback
+        self._pending[key] = task
+        task.add_done_callback(lambda _: self._pending.pop(key, None))
+
+    async def _geocode(self, location: str) -> None:
+        try:
+            coords = await self._geocoder.geocode(location)
+        except GeocodingError as e:
+            # The address may be fine: hold off only briefly, not for negative_ttl
+            logger.warning(
+                "Geocoding %r failed, retrying in %.0fs: %s", location, self._retry_ttl, e
+            )
+            self._cache.set_unresolved(location, ttl=self._retry_ttl)
+            return
+        if coords is None:
+            # Stay on the fallback region without asking again on every search
+            self._cache.set_unresolved(location)
+        else:
+            self._cache.set(location, coords)
+
+    async def aclose(self) -> None:
+        for task in list(self._pending.values()):
+            task.cancel()
+        await self._cache.aclose()
+
+
+def create_distance_provider(geocoder: GeocodingBackend | None = None) -> DistanceProvider:
+    settings = get_settings().logistics
+    settings.data_dir.mkdir(parents=True, exist_ok=True)
+    return DistanceProvider(
+        DistanceMatrix.load_or_build(settings.data_dir, settings.road_factor),
+        geocoder or create_geocoder(),
+        GeocodeCache(
+            settings.data_dir / GEOCODE_DB,
+            settings.geocode_cache_size,
+            negative_ttl=settings.geocode_negative_ttl,
+        ),
+        road_factor=settings.road_factor,
+        fallback_location=settings.fallback_location,
+        retry_ttl=settings.geocode_retry_ttl,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_distance_provider() -> DistanceProvider:
+    """Cached singleton; first call maps (or builds) the matrix file."""
+    return create_distance_provider()
@@ -0,0 +1,93 @@
+"""Static geography: city/region centroids and known store branches.
+
+Coordinates are approximate city centres (WGS84, degrees) -- good enough for
+shipping estimates, which are quoted per km.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import numpy.typing as npt
+
+EARTH_RADIUS_KM = 6371.0
+
+# Every entry of entities.ISRAELI_CITIES, including the regional names
+CITY_CENTROIDS: dict[str, tuple[float, float]] = {
+    "תל אביב": (32.0853, 34.7818),
+    "ירושלים": (31.7683, 35.2137),
+    "חיפה": (32.7940, 34.9896),
+    "באר שבע": (31.2520, 34.7915),
+    "אשדוד": (31.8044, 34.6553),
+    "אשקלון": (31.6688, 34.5743),
+    "נתניה": (32.3215, 34.8532),
+    "חולון": (32.0158, 34.7874),
+    "בת ים": (32.0171, 34.7454),
+    "רמת גן": (32.0684, 34.8248),
+    "פתח תקווה": (32.0840, 34.8878),
+    "ראשון לציון": (31.9730, 34.7925),
+    "הרצליה": (32.1624, 34.8447),
+    "רעננה": (32.1848, 34.8713),
+    "כפר סבא": (32.1782, 34.9076),
+    "הוד השרון": (32.1500, 34.8880),
+    "רחובות": (31.8928, 34.8113),
+    "נס ציונה": (31.9293, 34.7987),
+    "לוד": (31.9510, 34.8881),
+    "רמלה": (31.9279, 34.8625),
+    "מודיעין": (31.8980, 35.0104),
+    "עפולה": (32.6080, 35.2890),
+    "נצרת": (32.6996, 35.3035),
+    "טבריה": (32.7959, 35.5310),
+    "אילת": (29.5577, 34.9519),
+    "קריית שמונה": (33.2073, 35.5697),
+    "קריית גת": (31.6100, 34.7642),
+    "דימונה": (31.0700, 35.0300),
+    "ערד": (31.2589, 35.2128),
+    "צפת": (32.9646, 35.4960),
+    "מרכז": (32.0800, 34.8500),
+    "צפון": (32.8000, 35.3000),
+    "דרום": (31.2500, 34.7900),
+    "שרון": (32.2000, 34.8800),
+    "גוש דן": (32.0700, 34.8000),
+    "שפלה": (31.8500, 34.8500),
+    "נגב": (30.9000, 34.8500),
+}
+
+# Branch / warehouse cities per store (shipping leaves from the nearest one)
+STORE_BRANCHES: dict[str, tuple[str, ...]] = {
+    "Zap": ("תל אביב",),
+    "Bug": ("תל אביב", "ירושלים", "חיפה", "באר שבע"),
+    "KSP": ("תל אביב", "ירושלים", "חיפה", "באר שבע", "נתניה"),
+    "Ivory": ("תל אביב", "רמת גן", "חיפה"),
+    "iDigital": ("תל אביב", "ירושלים", "חיפה"),
+    "Machsanei Hashmal": ("ראשון לציון", "חיפה", "באר שבע", "נתניה"),
+    "Amazon IL": ("אשדוד",),
+    "Lastprice": ("פתח תקווה",),
+    "Shekem Electric": ("חולון", "חיפה", "באר שבע"),
+    "Payless": ("ראשון לציון", "קריית גת"),
+    "Electric City": ("רמלה",),
+    "Office Depot": ("הרצליה", "ירושלים", "חיפה"),
+    "Home Center": ("רמת גן", "ראשון לציון", "חיפה", "באר שבע", "ירושלים"),
+    "Traklin": ("לוד", "חיפה"),
+    "Mega Sport": ("תל אביב", "נתניה", "אשדוד"),
+    "Netoneto": ("פתח תקווה",),
+}
+
+
+def haversine_km(
+    lat1: npt.ArrayLike, lon1: npt.ArrayLike, lat2: npt.ArrayLike, lon2: npt.ArrayLike
+) -> npt.NDArray[np.float64]:
+    """Great-circle distance in km; broadcasts over NumPy arrays."""
+    lat1, lon1, lat2, lon2 = (
+        np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2)
+    )
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    distance: npt.NDArray[np.float64] = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+    return distance
+
+
+def branch_coordinates(store: str) -> npt.NDArray[np.float64]:
+    """(n_branches, 2) lat/lon array for a known store."""
+    return np.array([CITY_CENTROIDS[city] for city in STORE_BRANCHES[store]])
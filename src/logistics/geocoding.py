@@ -0,0 +1,85 @@
+"""Swappable geocoding backends for ad-hoc user addresses.
+
+- GoogleMapsGeocoder: live Google Geocoding API (googlemaps client, run off-loop)
+- StubGeocoder: fixed address table, for local development and tests
+
+A backend returns None only when the address definitely doesn't resolve,
+and raises GeocodingError when it couldn't tell (timeout, 5xx, quota): the
+caller remembers the first for a long time and retries the second soon.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+
+import googlemaps
+
+from src.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+LatLon = tuple[float, float]
+
+# Statuses that say the address itself is the problem, not the service
+_DEFINITE_STATUSES = frozenset({"ZERO_RESULTS", "INVALID_REQUEST"})
+
+
+class GeocodingError(Exception):
+    """The geocoder failed for a transient reason; the address may still resolve."""
+
+
+class GeocodingBackend(ABC):
+    """Turns a free-text address into coordinates."""
+
+    @abstractmethod
+    async def geocode(self, address: str) -> LatLon | None:
+        """Return (lat, lon), or None if the address can't be resolved.
+
+        Raises GeocodingError if the service failed to answer.
+        """
+
+
+class StubGeocoder(GeocodingBackend):
+    """Resolves only addresses from a local table; never touches the network."""
+
+    def __init__(self, known: dict[str, LatLon] | None = None) -> None:
+        self._known = known or {}
+        self.calls = 0
+
+    async def geocode(self, address: str) -> LatLon | None:
+        self.calls += 1
+        return self._known.get(address)
+
+
+class GoogleMapsGeocoder(GeocodingBackend):
+    """Google Geocoding API, biased to Israel."""
+
+    def __init__(self, api_key: str) -> None:
+        self._client = googlemaps.Client(key=api_key)
+
+    async def geocode(self, address: str) -> LatLon | None:
+        try:
+            results = await asyncio.to_thread(
+                self._client.geocode, address, region="il", language="iw"
+            )
+        except googlemaps.exceptions.ApiError as e:
+            if e.status in _DEFINITE_STATUSES:
+                return None
+            raise GeocodingError(f"Geocoding API error: {e}") from e
+        except Exception as e:
+            # Timeout, TransportError / HTTPError (5xx) and the like
+            raise GeocodingError(f"Geocoding failed: {e}") from e
+        if not results:
+            return None
+        location = results[0]["geometry"]["location"]
+        return location["lat"], location["lng"]
+
+
+def create_geocoder() -> GeocodingBackend:
+    """Google backend when GOOGLE_MAPS_API_KEY is set, otherwise the stub."""
+    api_key = get_settings().google.maps_api_key
+    if api_key and not api_key.startswith("your-"):
+        return GoogleMapsGeocoder(api_key)
+    return StubGeocoder()
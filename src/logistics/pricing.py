@@ -0,0 +1,90 @@
+"""Shiliichuyot shipping-cost engine.
+
+Business formula (fixed by the partner agreement, do not change):
+    shipping = (50 + distance_km * 3) * size_factor
+    size factors: S=1.0 | M=1.5 | L=2.5 | XL=4.0
+Result is in shekels, rounded half-up to a whole shekel.
+
+price_offers() prices a whole batch of offers in one vectorized NumPy call;
+shipping_cost() is the scalar version for single-offer paths (callbacks).
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+BASE_FEE = 50.0
+PER_KM = 3.0
+SIZE_FACTORS: dict[str, float] = {"S": 1.0, "M": 1.5, "L": 2.5, "XL": 4.0}
+DEFAULT_SIZE = "M"
+
+SIZE_CLASSES: tuple[str, ...] = tuple(SIZE_FACTORS)
+_SIZE_CODE = {size: code for code, size in enumerate(SIZE_CLASSES)}
+_FACTORS = np.array([SIZE_FACTORS[size] for size in SIZE_CLASSES])
+
+
+def _round_shekel(values: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    # Half-up, not NumPy's default half-to-even, to match the scalar path
+    return np.floor(values + 0.5)
+
+
+def size_codes(sizes: Sequence[str]) -> npt.NDArray[np.intp]:
+    """Map size classes ("S".."XL") to indices into the factor table."""
+    try:
+        return np.fromiter((_SIZE_CODE[s] for s in sizes), dtype=np.intp, count=len(sizes))
+    except KeyError as e:
+        raise ValueError(
+            f"Unknown size class {e.args[0]!r}; expected one of {SIZE_CLASSES}"
+        ) from None
+
+
+def shipping_costs(
+    distances_km: npt.ArrayLike, codes: npt.ArrayLike
+) -> npt.NDArray[np.float64]:
+    """Vectorized shipping cost for arrays of distances and size codes."""
+    distances = np.asarray(distances_km, dtype=np.float64)
+    if np.any(distances < 0):
+        raise ValueError("distance_km must be non-negative")
+    return _round_shekel((BASE_FEE + distances * PER_KM) * _FACTORS[np.asarray(codes)])
+
+
+def total_costs(
+    prices: npt.ArrayLike, distances_km: npt.ArrayLike, codes: npt.ArrayLike
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """(shipping, total) arrays for a batch of offers."""
+    shipping = shipping_costs(distances_km, codes)
+    return shipping, np.asarray(prices, dtype=np.float64) + shipping
+
+
+def price_offers(offers: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Fill shipping_cost and total_cost on offer dicts in place, in one batch.
+
+    Each offer needs price and distance_km; size defaults to DEFAULT_SIZE.
+    """
+    if not offers:
+        return offers
+    prices = np.fromiter((o["price"] for o in offers), dtype=np.float64, count=len(offers))
+    distances = np.fromiter(
+        (o["distance_km"] for o in offers), dtype=np.float64, count=len(offers)
+    )
+    codes = size_codes([o.get("size", DEFAULT_SIZE) for o in offers])
+
+    shipping, totals = total_costs(prices, distances, codes)
+    for offer, ship, total in zip(offers, shipping.astype(np.int64).tolist(), totals.tolist()):
+        offer["shipping_cost"] = ship
+        offer["total_cost"] = total
+    return offers
+
+
+def shipping_cost(distance_km: float, size: str = DEFAULT_SIZE) -> int:
+    """Scalar shipping cost for one offer."""
+    if size not in SIZE_FACTORS:
+        raise ValueError(f"Unknown size class {size!r}; expected one of {SIZE_CLASSES}")
+    if distance_km < 0:
+        raise ValueError("distance_km must be non-negative")
+    return math.floor((BASE_FEE + distance_km * PER_KM) * SIZE_FACTORS[size] + 0.5)
@@ -12,10 +12,23 @@ import logging
 from contextlib import asynccontextmanager
 from collections.abc import AsyncIterator
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 
+from src.agents.sales_agent import shufi
+from src.cache.refresher import close_price_refresher, get_price_refresher
+from src.common.http import close_http_client
 from src.config import get_settings
+from src.database.ingest import close_offer_recorder
+from src.database.session import close_db_engine
+from src.logistics.distance import get_distance_provider
+from src.monitoring import metrics
+from src.monitoring.discord_logger import close_discord_sink
+from src.monitoring.events import close_event_recorder
+from src.scrapers.utils.browser import close_browser_pool
+from src.scrapers.utils.extract import close_parse_pool
+from src.scrapers.utils.fetch import close_store_fetcher
 from src.telegram.bot import create_bot, create_dispatcher
+from src.telegram.update_queue import UpdateQueue
 from src.telegram.webhook import webhook_router
 
 logging.basicConfig(level=logging.INFO)
@@ -26,6 +39,8 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     """Startup/shutdown lifecycle for bot and webhook."""
     settings = get_settings()
+    # Map the distance matrix now, not on the first search
+    distances = get_distance_provider()
     bot = create_bot()
     dp = create_dispatcher()
 
@@ -37,8 +52,28 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     use_webhook = webhook_url and not webhook_url.startswith("https://your-")
 
     polling_task = None
+    updates = None
+    # Common openings get their replies in the background; serving doesn't wait
+    warm_task = asyncio.create_task(
+        shufi.warm_replies(settings.llm.llm_reply_warm, settings.llm.llm_reply_variants)
+    )
+    # Popular searches are re-scraped ahead of expiry, so they're answered from the cache
+    if settings.cache.enabled and settings.refresh.enabled:
+        get_price_refresher().start()
 
     if use_webhook:
+        if settings.telegram.fast_ack:
+            updates = UpdateQueue(
+                bot,
+                dp,
+                workers=settings.telegram.update_workers,
+                max_backlog=settings.telegram.update_max_backlog,
+                dedup_size=settings.telegram.update_dedup_size,
+                max_per_user=settings.telegram.update_max_per_user,
+            )
+            updates.start()
+            app.state.updates = updates
+
         # Production: set webhook
         full_url = f"{webhook_url}{settings.telegram.webhook_path}"
         await bot.set_webhook(
@@ -54,9 +89,14 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
 
     yield
 
+    warm_task.cancel()
+    await close_price_refresher()
     if use_webhook:
         await bot.delete_webhook()
         logger.info("Telegram webhook deleted")
+        if updates is not None:
+            # Finish updates already acknowledged to Telegram before closing the bot
+            await updates.close(settings.telegram.drain_timeout)
     elif polling_task:
         polling_task.cancel()
         try:
@@ -65,6 +105,17 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
             pass
 
     await bot.session.close()
+    await distances.aclose()
+    await close_browser_pool()
+    await close_store_fetcher()
+    close_parse_pool()
+    # Events and offers recorded by the last searches go out before the pool closes
+    await close_event_recorder()
+    await close_offer_recorder()
+    await close_db_engine()
+    # Flush queued monitoring events before the pooled client goes away
+    await close_discord_sink()
+    await close_http_client()
 
 
 async def _run_polling(dp, bot) -> None:
@@ -88,3 +139,10 @@ app.include_router(webhook_router)
 async def health_check() -> dict:
     """Health check endpoint."""
     return {"status": "ok"}
+
+
+@app.get("/metrics")
+async def prometheus_metrics() -> Response:
+    """Prometheus scrape endpoint."""
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
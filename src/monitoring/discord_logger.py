@@ -5,16 +5,26 @@ Sends colored embed messages to Discord for:
 - Search completed (green)
 - Site blocked (yellow)
 - Critical error (red)
+
+Logging never blocks the caller: embeds go to a background DiscordSink
+that batches them (up to 10 per webhook POST) over the shared HTTP client.
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import math
 import time
+from collections import deque
+from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any
 
 import httpx
 
+from src.common.http import get_http_client
 from src.config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -25,6 +35,9 @@ COLOR_GREEN = 0x2ECC71   # search completed
 COLOR_YELLOW = 0xF1C40F  # site blocked
 COLOR_RED = 0xE74C3C     # critical error
 
+# Discord's limit per webhook message
+MAX_EMBEDS_PER_MESSAGE = 10
+
 
 def _now_israel() -> str:
     """Current time formatted for Israel timezone."""
@@ -33,14 +46,184 @@ def _now_israel() -> str:
     return now.strftime("%H:%M:%S %d/%m/%Y")
 
 
-async def _send_embed(title: str, description: str, color: int, fields: list[dict] | None = None) -> None:
-    """Send a Discord embed message via webhook."""
+@dataclass
+class DiscordSinkStats:
+    """Counters for delivery and overload reporting."""
+
+    queued: int = 0
+    sent: int = 0
+    batches: int = 0
+    dropped: int = 0
+    sampled_out: int = 0
+    failed: int = 0
+    rate_limited: int = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class DiscordSink:
+    """Background Discord webhook delivery: buffered, batched, never awaited by callers.
+
+    Embeds are buffered (bounded) and a single worker task posts them up to
+    batch_size per webhook call over the shared pooled HTTP client, waiting
+    out 429 retry_after. Under overload, routine embeds are sampled once the
+    buffer passes the high watermark, and everything is dropped when it is full.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        max_queue: int,
+        batch_size: int,
+        flush_interval: float,
+        high_watermark: float,
+        sample_every: int,
+        max_retries: int = 3,
+        client: httpx.AsyncClient | None = None,
+    ) -> None:
+        self._url = url
+        # None -> the shared pooled client (src/common/http.py)
+        self._client = client
+        self._max_queue = max_queue
+        self._batch_size = min(batch_size, MAX_EMBEDS_PER_MESSAGE)
+        self._flush_interval = flush_interval
+        self._high_watermark = int(max_queue * high_watermark)
+        self._sample_every = sample_every
+        self._max_retries = max_retries
+        self._buffer: deque[dict[str, Any]] = deque()
+        self._wakeup = asyncio.Event()
+        self._worker: asyncio.Task[None] | None = None
+        self._closing = False
+        self._routine_seen = 0
+        self.stats = DiscordSinkStats()
+
+    def emit(self, embed: dict[str, Any], important: bool = False) -> None:
+        """Queue an embed; returns immediately and never raises."""
+        size = len(self._buffer)
+        if self._closing or size >= self._max_queue:
+            self.stats.dropped += 1
+            return
+        if not important and size >= self._high_watermark:
+            self._routine_seen += 1
+            if self._routine_seen % self._sample_every:
+                self.stats.sampled_out += 1
+                return
+        if not self._ensure_worker():
+            self.stats.dropped += 1
+            return
+        self._buffer.append(embed)
+        self.stats.queued += 1
+        self._wakeup.set()
+
+    async def aclose(self, timeout: float = 5.0) -> None:
+        """Flush what is buffered (up to timeout), then stop the worker."""
+        self._closing = True
+        self._wakeup.set()
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._worker, timeout)
+        except TimeoutError:
+            self.stats.dropped += len(self._buffer)
+            logger.warning("Discord sink flush timed out, dropped %d embeds", len(self._buffer))
+        logger.info("Discord sink closed: %s", self.stats.snapshot())
+
+    def _ensure_worker(self) -> bool:
+        if self._worker is not None and not self._worker.done():
+            return True
+        try:
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        except RuntimeError:
+            return False  # no event loop (sync caller) -- nothing can deliver
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            if not self._buffer:
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            if len(self._buffer) < self._batch_size and not self._closing:
+                # Linger so bursts share one POST
+                await asyncio.sleep(self._flush_interval)
+            count = min(self._batch_size, len(self._buffer))
+            batch = [self._buffer.popleft() for _ in range(count)]
+            await self._post(batch)
+
+    async def _post(self, batch: list[dict[str, Any]]) -> None:
+        client = self._client or get_http_client()
+        for _ in range(self._max_retries + 1):
+            try:
+                resp = await client.post(self._url, json={"embeds": batch})
+            except httpx.HTTPError as e:
+                logger.warning("Discord webhook failed: %s", e)
+                break
+            if resp.status_code == 429:
+                self.stats.rate_limited += 1
+                await asyncio.sleep(_retry_after(resp))
+                continue
+            if resp.status_code not in (200, 204):
+                logger.warning("Discord webhook returned %s", resp.status_code)
+                break
+            self.stats.sent += len(batch)
+            self.stats.batches += 1
+            return
+        self.stats.failed += len(batch)
+
+
+def _retry_after(resp: httpx.Response) -> float:
+    """Seconds to wait from a Discord 429 (JSON body first, then the header, else 1s)."""
+    try:
+        seconds = _seconds(resp.json()["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        seconds = None
+    if seconds is None:
+        # An HTTP-date or garbage here must not kill the worker
+        seconds = _seconds(resp.headers.get("Retry-After"))
+    return seconds if seconds is not None else 1.0
+
+
+def _seconds(value: Any) -> float | None:
+    try:
+        seconds = float(value)
+    except (ValueError, TypeError):
+        return None
+    return seconds if math.isfinite(seconds) and seconds >= 0 else None
+
+
+@lru_cache(maxsize=1)
+def get_discord_sink() -> DiscordSink:
+    """Cached singleton; its worker starts with the first embed."""
+    settings = get_settings()
+    return DiscordSink(
+        settings.discord_webhook_url,
+        max_queue=settings.discord.max_queue,
+        batch_size=settings.discord.batch_size,
+        flush_interval=settings.discord.flush_interval,
+        high_watermark=settings.discord.high_watermark,
+        sample_every=settings.discord.sample_every,
+    )
+
+
+async def close_discord_sink() -> None:
+    if get_discord_sink.cache_info().currsize:
+        await get_discord_sink().aclose()
+
+
+def _send_embed(
+    title: str, description: str, color: int, fields: list[dict[str, Any]] | None = None
+) -> None:
+    """Queue a Discord embed message for the webhook."""
     settings = get_settings()
     url = settings.discord_webhook_url
     if not url or "your-webhook-url" in url:
         return
 
-    embed: dict = {
+    embed: dict[str, Any] = {
         "title": title,
         "description": description,
         "color": color,
@@ -50,20 +233,13 @@ async def _send_embed(title: str, description: str, color: int, fields: list[dic
     if fields:
         embed["fields"] = fields
 
-    payload = {"embeds": [embed]}
-
-    try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(url, json=payload, timeout=5.0)
-            if resp.status_code not in (200, 204):
-                logger.warning("Discord webhook returned %s", resp.status_code)
-    except Exception:
-        logger.exception("Failed to send Discord webhook")
+    # Problems are never sampled away under load; routine search events may be
+    get_discord_sink().emit(embed, important=color in (COLOR_YELLOW, COLOR_RED))
 
 
 async def log_search_started(product: str, user_id: int) -> float:
     """Log that a search has started. Returns start time for duration calc."""
-    await _send_embed(
+    _send_embed(
         title="חיפוש חדש התחיל",
         description=f"**{product}**",
         color=COLOR_BLUE,
@@ -77,7 +253,7 @@ async def log_search_started(product: str, user_id: int) -> float:
 async def log_search_completed(product: str, result_count: int, start_time: float) -> None:
     """Log that a search completed successfully."""
     duration = time.monotonic() - start_time
-    await _send_embed(
+    _send_embed(
         title="חיפוש הושלם",
         description=f"**{product}**",
         color=COLOR_GREEN,
@@ -90,7 +266,7 @@ async def log_search_completed(product: str, result_count: int, start_time: floa
 
 async def log_site_blocked(site: str, status_code: int) -> None:
     """Log that a scraping site returned 403/429."""
-    await _send_embed(
+    _send_embed(
         title="אתר חסום",
         description=f"**{site}** החזיר {status_code}",
         color=COLOR_YELLOW,
@@ -100,9 +276,25 @@ async def log_site_blocked(site: str, status_code: int) -> None:
     )
 
 
+async def log_budget_alert(level: str, spent_usd: float, budget_usd: float) -> None:
+    """Log that daily LLM spend crossed the warning or block threshold."""
+    _send_embed(
+        title="תקציב LLM",
+        description=f"**{level}** ${spent_usd:.2f} / ${budget_usd:.2f}",
+        color=COLOR_RED if level == "blocked" else COLOR_YELLOW,
+        fields=[
+            {
+                "name": "ניצול",
+                "value": f"{spent_usd / budget_usd:.0%}" if budget_usd else "-",
+                "inline": True,
+            },
+        ],
+    )
+
+
 async def log_critical_error(error: str, details: str = "") -> None:
     """Log a critical error."""
-    await _send_embed(
+    _send_embed(
         title="שגיאה קריטית",
         description=f"```{error}```",
         color=COLOR_RED,
@@ -0,0 +1,86 @@
+"""Write-behind analytics events: searches and conversions for the daily report.
+
+Handlers call record_search() / record_conversion(), which only append a
+row to the recorder's bounded buffer and return -- no I/O on the user's
+path. Its worker writes the buffer to PostgreSQL (user_events, one COPY
+per batch) when batch_size events are waiting or flush_interval has
+passed since the first of them (common/write_behind.py). Events past
+max_queue, or in a batch that fails to write, are dropped and counted;
+the lifespan flushes what is left on shutdown.
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from functools import lru_cache
+
+from src.common.write_behind import WriteBehind, Writer
+from src.config import get_settings
+from src.database.repositories.events import (
+    KIND_CONVERSION,
+    KIND_SEARCH,
+    EventRepository,
+    EventRow,
+)
+from src.database.session import ensure_schema, get_sessionmaker
+from src.monitoring.metrics import ANALYTICS_EVENTS
+
+
+class EventRecorder(WriteBehind[EventRow]):
+    """Event rows buffered and written to user_events in batches."""
+
+    def __init__(
+        self,
+        writer: Writer[EventRow] | None = None,
+        *,
+        max_queue: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 5.0,
+    ) -> None:
+        super().__init__(
+            writer if writer is not None else _write_events,
+            ANALYTICS_EVENTS,
+            name="events",
+            max_queue=max_queue,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+        )
+
+
+async def _write_events(rows: list[EventRow]) -> None:
+    """One transaction per batch; tables are created on the first one."""
+    await ensure_schema()
+    async with get_sessionmaker()() as session, session.begin():
+        await EventRepository(session).append(rows)
+
+
+def record_search(user_id: int, query: str, results: int) -> None:
+    """A search was answered with `results` offers shown."""
+    _emit((KIND_SEARCH, user_id, query, results, None, datetime.now(UTC)))
+
+
+def record_conversion(user_id: int, product_id: str) -> None:
+    """A delivery was ordered for an offer."""
+    _emit((KIND_CONVERSION, user_id, None, None, product_id, datetime.now(UTC)))
+
+
+def _emit(row: EventRow) -> None:
+    if get_settings().events.enabled:
+        get_event_recorder().emit(row)
+
+
+@lru_cache(maxsize=1)
+def get_event_recorder() -> EventRecorder:
+    """Cached singleton; its worker starts with the first event."""
+    settings = get_settings().events
+    return EventRecorder(
+        max_queue=settings.max_queue,
+        batch_size=settings.batch_size,
+        flush_interval=settings.flush_interval,
+    )
+
+
+async def close_event_recorder() -> None:
+    if get_event_recorder.cache_info().currsize:
+        await get_event_recorder().aclose(get_settings().events.drain_timeout)
+        get_event_recorder.cache_clear()
@@ -0,0 +1,130 @@
+"""Prometheus metrics for the request pipeline.
+
+Scraped from GET /metrics. All metrics live in the default registry and are
+prefixed smartshopper_. Hot paths bind label values once at import
+(e.g. MIDDLEWARE_REJECTIONS.labels(reason=...)) so an observation costs a
+lock and an add, not a label lookup.
+
+Derived values are left to PromQL, e.g. cache hit ratio:
+  sum(rate(smartshopper_cache_lookups_total{result=~"local|redis"}[5m]))
+  / sum(rate(smartshopper_cache_lookups_total{result=~"local|redis|miss"}[5m]))
+"""
+
+from __future__ import annotations
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# From rule-based turns and cache hits (ms) up to LLM calls and slow stores (s)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# --- Telegram ingress ---
+WEBHOOK_SECONDS = Histogram(
+    "smartshopper_webhook_seconds",
+    "Time to answer a Telegram webhook call",
+    ["mode"],  # inline (handled in the request) | queued (fast ack)
+    buckets=LATENCY_BUCKETS,
+)
+WEBHOOK_UPDATES = Counter(
+    "smartshopper_webhook_updates_total",
+    "Webhook updates by queue outcome",
+    ["result"],  # accepted | duplicate | dropped | rejected
+)
+UPDATE_SECONDS = Histogram(
+    "smartshopper_update_seconds",
+    "Time to process one queued update",
+    buckets=LATENCY_BUCKETS,
+)
+UPDATE_BACKLOG = Gauge(
+    "smartshopper_update_backlog",
+    "Accepted updates not yet processed",
+)
+MIDDLEWARE_REJECTIONS = Counter(
+    "smartshopper_middleware_rejections_total",
+    "Messages turned away before reaching a handler",
+    ["reason"],  # rate_limit | lock
+)
+
+# --- Shufi ---
+AGENT_SECONDS = Histogram(
+    "smartshopper_agent_seconds",
+    "SalesAgent.handle_message latency",
+    ["path"],  # llm (at least one LLM call) | rules
+    buckets=LATENCY_BUCKETS,
+)
+LLM_FIRST_TOKEN_SECONDS = Histogram(
+    "smartshopper_llm_first_token_seconds",
+    "Time from a streamed LLM request to its first text",
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "smartshopper_llm_tokens_total",
+    "LLM tokens used",
+    ["direction"],  # input | output
+)
+LLM_COST_USD = Counter(
+    "smartshopper_llm_cost_usd_total",
+    "Estimated LLM spend in USD",
+)
+LLM_REPLY_CACHE = Counter(
+    "smartshopper_llm_reply_cache_total",
+    "Context-free LLM turns by reply cache outcome",
+    ["result"],  # hit | miss
+)
+LLM_DEGRADED = Counter(
+    "smartshopper_llm_degraded_total",
+    "Turns answered by rules because the LLM was not allowed",
+    ["reason"],  # budget | busy
+)
+
+# --- Search ---
+STORE_SECONDS = Histogram(
+    "smartshopper_store_seconds",
+    "Per-store search latency",
+    ["store"],
+    buckets=LATENCY_BUCKETS,
+)
+STORE_FAILURES = Counter(
+    "smartshopper_store_failures_total",
+    "Store searches that timed out or failed",
+    ["store", "status"],  # status: timeout | error | degraded
+)
+CACHE_LOOKUPS = Counter(
+    "smartshopper_cache_lookups_total",
+    "Search cache lookups by outcome",
+    ["result"],  # local | redis | stale | miss | coalesced
+)
+PRICE_REFRESHES = Counter(
+    "smartshopper_price_refreshes_total",
+    "Background per-store refreshes of popular searches",
+    ["store", "result"],  # result: ok | failed | missing | deferred
+)
+
+# --- Analytics ---
+ANALYTICS_EVENTS = Counter(
+    "smartshopper_analytics_events_total",
+    "Search/conversion events by outcome in the write-behind recorder",
+    ["result"],  # queued | written | dropped | failed
+)
+OFFER_INGEST = Counter(
+    "smartshopper_offer_ingest_total",
+    "Scraped store results by outcome in the write-behind offer writer",
+    ["result"],  # queued | written | dropped | failed
+)
+
+# --- Telegram egress ---
+TELEGRAM_API_SECONDS = Histogram(
+    "smartshopper_telegram_api_seconds",
+    "Bot API call latency",
+    ["method"],
+    buckets=LATENCY_BUCKETS,
+)
+TELEGRAM_API_ERRORS = Counter(
+    "smartshopper_telegram_api_errors_total",
+    "Bot API calls that raised",
+    ["method", "error"],
+)
+
+
+def render() -> tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, with its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
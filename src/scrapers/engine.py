@@ -0,0 +1,252 @@
+"""Concurrent multi-store search engine.
+
+One query fans out to every registered store adapter at once:
+- global + per-store concurrency caps (asyncio.Semaphore)
+- per-store timeout and a deadline for the whole search
+- partial results: whatever finished before the deadline is returned,
+  stores still running are cancelled and reported as timed out
+- stream() yields per-store results as they land, for live Telegram replies
+- a store whose circuit breaker is open (scrapers/utils/fetch.py) is
+  reported as degraded at once instead of waiting out its timeout
+- search_store() queries one store alone, for the background price
+  refresher (cache/refresher.py)
+- every store's fresh offers are passed to on_offers, which stores them
+  in the background (database/ingest.py)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Callable, Iterable
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+from src.config import get_settings
+from src.database.ingest import record_offers
+from src.logistics.distance import DistanceProvider, get_distance_provider
+from src.logistics.pricing import price_offers
+from src.monitoring.metrics import STORE_FAILURES, STORE_SECONDS
+from src.scrapers.utils.fetch import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+STATUS_OK = "ok"
+STATUS_TIMEOUT = "timeout"
+STATUS_ERROR = "error"
+STATUS_DEGRADED = "degraded"
+
+
+class StoreAdapter(ABC):
+    """A single store backend.
+
+    Offers are product dicts with at least id, name, source, price, url,
+    distance_km and size; the engine adds shipping_cost and total_cost.
+    """
+
+    name: str = ""
+    # None -> use settings.search.per_store_concurrency / store_timeout
+    max_concurrency: int | None = None
+    timeout: float | None = None
+
+    @abstractmethod
+    async def search(self, query: str) -> list[dict[str, Any]]:
+        """Return this store's offers for query."""
+
+
+@dataclass
+class StoreResult:
+    """Outcome of one store for one search."""
+
+    store: str
+    offers: list[dict[str, Any]] = field(default_factory=list)
+    status: str = STATUS_OK
+    elapsed: float = 0.0
+
+
+@dataclass
+class SearchResult:
+    """Merged outcome of a search across all stores."""
+
+    query: str
+    stores: list[StoreResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def offers(self) -> list[dict[str, Any]]:
+        return [offer for result in self.stores for offer in result.offers]
+
+    @property
+    def timed_out(self) -> list[str]:
+        return [r.store for r in self.stores if r.status == STATUS_TIMEOUT]
+
+    @property
+    def failed(self) -> list[str]:
+        return [r.store for r in self.stores if r.status == STATUS_ERROR]
+
+    @property
+    def degraded(self) -> list[str]:
+        return [r.store for r in self.stores if r.status == STATUS_DEGRADED]
+
+
+class SearchEngine:
+    """Fan a query out to all store adapters under concurrency caps and deadlines."""
+
+    def __init__(
+        self,
+        adapters: Iterable[StoreAdapter],
+        *,
+        global_concurrency: int,
+        per_store_concurrency: int,
+        store_timeout: float,
+        deadline: float,
+        distances: DistanceProvider | None = None,
+        on_offers: Callable[[list[dict[str, Any]]], None] | None = None,
+    ) -> None:
+        self._adapters = list(adapters)
+        self._by_name = {adapter.name: adapter for adapter in self._adapters}
+        self._distances = distances
+        self._on_offers = on_offers
+        self._store_timeout = store_timeout
+        self._deadline = deadline
+        self._global_limit = asyncio.Semaphore(global_concurrency)
+        self._store_limits = {
+            adapter.name: asyncio.Semaphore(adapter.max_concurrency or per_store_concurrency)
+            for adapter in self._adapters
+        }
+
+    @property
+    def stores(self) -> list[str]:
+        return [adapter.name for adapter in self._adapters]
+
+    async def search(
+        self, query: str, location: str = "", deadline: float | None = None
+    ) -> SearchResult:
+        """Query all stores; return whatever finished before the deadline."""
+        started = time.monotonic()
+        results = [result async for result in self.stream(query, location, deadline)]
+        return SearchResult(query=query, stores=results, elapsed=time.monotonic() - started)
+
+    async def search_store(self, store: str, query: str, location: str = "") -> StoreResult:
+        """One store's result for query, under the same limits. KeyError if store is unknown."""
+        return await self._run_store(self._by_name[store], query, location)
+
+    async def stream(
+        self, query: str, location: str = "", deadline: float | None = None
+    ) -> AsyncIterator[StoreResult]:
+        """Yield each store's result as soon as it finishes.
+
+        Stores still running at the deadline are cancelled and yielded last
+        as timed out. Closing the iterator early cancels the remaining stores.
+        """
+        started = time.monotonic()
+        deadline_at = started + (deadline or self._deadline)
+        tasks = {
+            asyncio.create_task(self._run_store(adapter, query, location)): adapter
+            for adapter in self._adapters
+        }
+        pending = set(tasks)
+        try:
+            while pending:
+                remaining = deadline_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if pending:
+            logger.info(
+                "Search deadline hit for %r: %d/%d stores answered",
+                query, len(tasks) - len(pending), len(tasks),
+            )
+        elapsed = time.monotonic() - started
+        for task in pending:
+            yield _observed(
+                StoreResult(store=tasks[task].name, status=STATUS_TIMEOUT, elapsed=elapsed)
+            )
+
+    async def _run_store(self, adapter: StoreAdapter, query: str, location: str) -> StoreResult:
+        """Run one adapter under both semaphores and its own timeout. Never raises."""
+        started = time.monotonic()
+        try:
+            async with self._global_limit, self._store_limits[adapter.name]:
+                offers = await asyncio.wait_for(
+                    adapter.search(query),
+                    timeout=adapter.timeout or self._store_timeout,
+                )
+            if location:
+                self._set_distance(offers, location, adapter.name)
+            # One vectorized pricing call per store batch
+            price_offers(offers)
+        except TimeoutError:
+            result = StoreResult(
+                store=adapter.name, status=STATUS_TIMEOUT, elapsed=time.monotonic() - started
+            )
+        except CircuitOpenError:
+            result = StoreResult(
+                store=adapter.name, status=STATUS_DEGRADED, elapsed=time.monotonic() - started
+            )
+        except Exception:
+            logger.exception("Store %s failed for %r", adapter.name, query)
+            result = StoreResult(
+                store=adapter.name, status=STATUS_ERROR, elapsed=time.monotonic() - started
+            )
+        else:
+            result = StoreResult(
+                store=adapter.name, offers=offers, elapsed=time.monotonic() - started
+            )
+            if offers and self._on_offers is not None:
+                self._on_offers(offers)
+        return _observed(result)
+
+    def _set_distance(self, offers: list[dict[str, Any]], location: str, store: str) -> None:
+        """Replace adapter-reported distances with user location -> nearest branch."""
+        if self._distances is None:
+            return
+        km = self._distances.distance_km(location, store)
+        if km is None:
+            return
+        for offer in offers:
+            offer["distance_km"] = round(km, 1)
+
+
+def _observed(result: StoreResult) -> StoreResult:
+    STORE_SECONDS.labels(result.store).observe(result.elapsed)
+    if result.status != STATUS_OK:
+        STORE_FAILURES.labels(result.store, result.status).inc()
+    return result
+
+
+def create_search_engine(adapters: Iterable[StoreAdapter] | None = None) -> SearchEngine:
+    """Build an engine from settings. Defaults to the fixture stores until real spiders land."""
+    settings = get_settings().search
+    if adapters is None:
+        if not settings.use_fixtures:
+            raise RuntimeError("No live store adapters registered; set SEARCH_USE_FIXTURES=true")
+        from src.scrapers.spiders.fixture import build_fixture_adapters
+
+        adapters = build_fixture_adapters()
+    return SearchEngine(
+        adapters,
+        global_concurrency=settings.global_concurrency,
+        per_store_concurrency=settings.per_store_concurrency,
+        store_timeout=settings.store_timeout,
+        deadline=settings.deadline,
+        distances=get_distance_provider(),
+        on_offers=record_offers,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_search_engine() -> SearchEngine:
+    """Cached singleton engine used by the Telegram search handler."""
+    return create_search_engine()
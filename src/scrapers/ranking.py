@@ -0,0 +1,114 @@
+"""Incremental top-K ranking of offers.
+
+Business rule: the user always gets the 5 cheapest options by total_cost
+(product + Shiliichuyot shipping). Ties go to faster delivery, then to the
+nearer store.
+
+Offers are added as stores report. A bounded heap keeps only the current
+top K, so nothing is ever fully sorted, and add() says whether the visible
+top K changed -- the streaming reply edits Telegram only then.
+"""
+
+from __future__ import annotations
+
+import heapq
+import re
+from collections.abc import Callable, Hashable, Iterable
+from itertools import count
+from typing import Any
+
+DEFAULT_K = 5
+
+_NON_ALNUM = re.compile(r"[^\w]+")
+_FIRST_INT = re.compile(r"\d+")
+_UNKNOWN_DAYS = 99
+
+Rank = tuple[float, int, float]
+# (negated rank, -sequence, dedupe key, offer)
+_Entry = tuple[Rank, int, Hashable, dict[str, Any]]
+
+
+def model_key(offer: dict[str, Any]) -> str:
+    """Normalized product name: 'Sony WH-1000XM4' and 'sony wh 1000xm4' match."""
+    return _NON_ALNUM.sub(" ", offer["name"].lower()).strip()
+
+
+def offer_key(offer: dict[str, Any]) -> tuple[str, str]:
+    """Same product from the same store (e.g. listed by both a store and an aggregator)."""
+    return model_key(offer), offer.get("source", "")
+
+
+def rank_key(offer: dict[str, Any]) -> Rank:
+    """(total_cost, fastest delivery days, distance_km) -- lower is better."""
+    days = _FIRST_INT.search(str(offer.get("delivery_days", "")))
+    return (
+        float(offer["total_cost"]),
+        int(days.group(0)) if days else _UNKNOWN_DAYS,
+        float(offer.get("distance_km", 0.0)),
+    )
+
+
+class TopK:
+    """Bounded top-K of offers, deduplicated by dedupe_key (cheapest offer per key wins)."""
+
+    def __init__(
+        self,
+        k: int = DEFAULT_K,
+        dedupe_key: Callable[[dict[str, Any]], Hashable] = model_key,
+    ) -> None:
+        self._k = k
+        self._dedupe_key = dedupe_key
+        # Max-heap of the kept offers: heap[0] is the worst one (next to evict).
+        # The sequence makes later arrivals lose ties and keeps the offer dict
+        # out of comparisons.
+        self._heap: list[_Entry] = []
+        self._members: dict[Hashable, _Entry] = {}
+        self._seq = count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def add(self, offer: dict[str, Any]) -> bool:
+        """Offer one candidate. Returns True if the top K changed."""
+        rank = rank_key(offer)
+        neg = (-rank[0], -rank[1], -rank[2])
+        key = self._dedupe_key(offer)
+
+        existing = self._members.get(key)
+        if existing is not None:
+            if neg <= existing[0]:
+                return False  # not better than the copy we already show
+            self._heap.remove(existing)
+            heapq.heapify(self._heap)
+        elif len(self._heap) >= self._k:
+            if neg <= self._heap[0][0]:
+                return False  # worse than (or tied with) the current worst
+            evicted = heapq.heappop(self._heap)
+            del self._members[evicted[2]]
+
+        entry = (neg, -next(self._seq), key, offer)
+        heapq.heappush(self._heap, entry)
+        self._members[key] = entry
+        return True
+
+    def extend(self, offers: Iterable[dict[str, Any]]) -> bool:
+        """Add a batch (one store's results). Returns True if the top K changed."""
+        changed = False
+        for offer in offers:
+            changed |= self.add(offer)
+        return changed
+
+    def results(self) -> list[dict[str, Any]]:
+        """Current top K, best first."""
+        return [entry[3] for entry in sorted(self._heap, reverse=True)]
+
+
+def top_k(
+    offers: Iterable[dict[str, Any]],
+    k: int = DEFAULT_K,
+    dedupe_key: Callable[[dict[str, Any]], Hashable] = model_key,
+) -> list[dict[str, Any]]:
+    """One-shot helper for a complete offer list."""
+    ranker = TopK(k, dedupe_key)
+    ranker.extend(offers)
+    return ranker.results()
@@ -0,0 +1,141 @@
+"""Fixture-backed stand-in store adapters.
+
+Serve offers from a static catalog with simulated network latency, so the
+search engine can be developed and load-tested offline. Prices, distances and
+delivery times vary deterministically per store so results look realistic.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from typing import Any
+
+from src.scrapers.engine import StoreAdapter
+
+# (store name, domain, typical latency in seconds)
+FIXTURE_STORES: list[tuple[str, str, float]] = [
+    ("Zap", "zap.co.il", 0.25),
+    ("Bug", "bug.co.il", 0.20),
+    ("KSP", "ksp.co.il", 0.30),
+    ("Ivory", "ivory.co.il", 0.35),
+    ("iDigital", "idigital.co.il", 0.15),
+    ("Machsanei Hashmal", "machsanei.co.il", 0.40),
+    ("Amazon IL", "amazon.co.il", 0.60),
+    ("Lastprice", "lastprice.co.il", 0.20),
+    ("Shekem Electric", "shekem-electric.co.il", 0.30),
+    ("Payless", "payngo.co.il", 0.25),
+    ("Electric City", "electricity.co.il", 0.35),
+    ("Office Depot", "officedepot.co.il", 0.45),
+    ("Home Center", "homecenter.co.il", 0.50),
+    ("Traklin", "traklin.co.il", 0.30),
+    ("Mega Sport", "megasport.co.il", 0.25),
+    ("Netoneto", "netoneto.co.il", 0.20),
+]
+
+# Base catalog: name, base price, size class, search keywords (lowercase)
+CATALOG: list[dict[str, Any]] = [
+    {"name": "Xiaomi Redmi Buds 4", "price": 89.90, "size": "S",
+     "keywords": ("אוזניות", "xiaomi", "redmi", "שיאומי", "buds")},
+    {"name": "JBL Tune 520BT", "price": 149.00, "size": "S",
+     "keywords": ("אוזניות", "jbl", "בלוטוס")},
+    {"name": "Sony WH-1000XM4", "price": 279.90, "size": "S",
+     "keywords": ("אוזניות", "sony", "סוני")},
+    {"name": "Samsung Galaxy Buds2 Pro", "price": 349.00, "size": "S",
+     "keywords": ("אוזניות", "samsung", "galaxy", "סמסונג", "גלקסי")},
+    {"name": "Beats Studio Buds+", "price": 399.00, "size": "S",
+     "keywords": ("אוזניות", "beats")},
+    {"name": "Apple AirPods 3", "price": 499.00, "size": "S",
+     "keywords": ("אוזניות", "apple", "airpods", "אפל", "אירפודס")},
+    {"name": "Bose QuietComfort 45", "price": 599.00, "size": "S",
+     "keywords": ("אוזניות", "bose")},
+    {"name": "Sony WH-1000XM5", "price": 849.00, "size": "S",
+     "keywords": ("אוזניות", "sony", "סוני")},
+    {"name": "Apple iPhone 15 Pro 128GB", "price": 4290.00, "size": "S",
+     "keywords": ("טלפון", "סלולרי", "iphone", "אייפון", "apple", "15", "pro", "פרו")},
+    {"name": "Samsung Galaxy S24 256GB", "price": 3190.00, "size": "S",
+     "keywords": ("טלפון", "סלולרי", "samsung", "galaxy", "סמסונג", "גלקסי")},
+    {"name": "Xiaomi Redmi Note 13", "price": 899.00, "size": "S",
+     "keywords": ("טלפון", "סלולרי", "xiaomi", "redmi", "שיאומי")},
+    {"name": "LG OLED 55\" C3", "price": 4990.00, "size": "XL",
+     "keywords": ("טלוויזיה", "טלויזיה", "מסך", "lg", "אל ג'י")},
+    {"name": "Lenovo IdeaPad Slim 5", "price": 2890.00, "size": "M",
+     "keywords": ("מחשב", "לפטופ", "lenovo", "לנובו")},
+    {"name": "Dyson V15 Detect", "price": 2790.00, "size": "L",
+     "keywords": ("שואב אבק", "dyson", "דייסון")},
+]
+
+_ALL_KEYWORDS = frozenset(keyword for item in CATALOG for keyword in item["keywords"])
+
+
+def _delivery_days(distance_km: int) -> str:
+    if distance_km <= 6:
+        return "1 יום"
+    if distance_km <= 20:
+        return "1-2 ימים"
+    if distance_km <= 30:
+        return "2-3 ימים"
+    return "3-5 ימים"
+
+
+def _build_offers(store_index: int, name: str, domain: str) -> list[dict[str, Any]]:
+    """Deterministic per-store offers: each store carries ~2/3 of the catalog."""
+    offers = []
+    for product_index, item in enumerate(CATALOG):
+        if (store_index + product_index) % 3 == 0:
+            continue
+        markup = ((store_index * 7 + product_index * 3) % 11 - 5) / 100
+        price = round(item["price"] * (1 + markup), 2)
+        distance_km = 3 + (store_index * 5 + product_index * 2) % 35
+        offers.append({
+            "id": store_index * 100 + product_index + 1,
+            "name": item["name"],
+            "source": name,
+            "price": price,
+            "distance_km": distance_km,
+            "delivery_days": _delivery_days(distance_km),
+            "url": f"https://{domain}/item/{product_index + 1}",
+            "size": item["size"],
+            "keywords": item["keywords"],
+        })
+    return offers
+
+
+class FixtureStoreAdapter(StoreAdapter):
+    """Stand-in store: in-memory offers + simulated latency with jitter."""
+
+    def __init__(self, name: str, offers: list[dict[str, Any]], latency: float = 0.2) -> None:
+        self.name = name
+        self.latency = latency
+        self._offers = offers
+
+    async def search(self, query: str) -> list[dict[str, Any]]:
+        await asyncio.sleep(self.latency * random.uniform(0.5, 1.5))
+
+        lower = query.lower()
+        # Unknown queries still get results so the bot flow is testable end to end
+        if not any(keyword in lower for keyword in _ALL_KEYWORDS):
+            return [_public(offer) for offer in self._offers]
+        return [
+            _public(offer) for offer in self._offers
+            if any(keyword in lower for keyword in offer["keywords"])
+        ]
+
+
+def _public(offer: dict[str, Any]) -> dict[str, Any]:
+    return {k: v for k, v in offer.items() if k != "keywords"}
+
+
+def build_fixture_adapters(
+    latency_overrides: dict[str, float] | None = None,
+) -> list[FixtureStoreAdapter]:
+    """One adapter per FIXTURE_STORES entry; latency_overrides simulates slow stores."""
+    overrides = latency_overrides or {}
+    return [
+        FixtureStoreAdapter(
+            name,
+            _build_offers(index, name, domain),
+            latency=overrides.get(name, latency),
+        )
+        for index, (name, domain, latency) in enumerate(FIXTURE_STORES)
+    ]
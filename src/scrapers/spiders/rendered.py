@@ -0,0 +1,45 @@
+"""Base adapter for stores whose search results only exist after JavaScript runs.
+
+A subclass names the store, builds its search URL and parses the rendered
+HTML; the page itself comes from the shared browser pool, so a search costs
+a context acquire and a navigation, never a browser launch.
+"""
+
+from __future__ import annotations
+
+from abc import abstractmethod
+from typing import Any
+
+from src.scrapers.engine import StoreAdapter
+from src.scrapers.utils.browser import BrowserPool, get_browser_pool
+
+# Rendering is slower than an API call; the engine's store timeout still caps it
+DEFAULT_RENDER_TIMEOUT = 8.0
+
+
+class RenderedStoreAdapter(StoreAdapter):
+    """Search by rendering the store's results page in a pooled browser context."""
+
+    # CSS selector that appears once results have rendered (None: DOM loaded is enough)
+    ready_selector: str | None = None
+    render_timeout: float = DEFAULT_RENDER_TIMEOUT
+
+    def __init__(self, pool: BrowserPool | None = None) -> None:
+        self._pool = pool if pool is not None else get_browser_pool()
+
+    @abstractmethod
+    def search_url(self, query: str) -> str:
+        """The store's results page for query."""
+
+    @abstractmethod
+    def parse(self, html: str) -> list[dict[str, Any]]:
+        """Offers from the rendered results page."""
+
+    async def search(self, query: str) -> list[dict[str, Any]]:
+        html = await self._pool.render(
+            self.name,
+            self.search_url(query),
+            wait_for=self.ready_selector,
+            timeout=self.render_timeout,
+        )
+        return self.parse(html)
@@ -0,0 +1,287 @@
+"""Pooled headless Chromium for stores that need JavaScript rendering.
+
+Launching a browser costs seconds; opening a page in a warm context costs
+milliseconds. The pool launches a fixed number of Chromium instances once
+(lazily, on the first render) and hands out browser contexts:
+
+- contexts are reused per store, so each store keeps its own cookies
+  (session, consent banner, chosen branch)
+- after pages_per_context pages, or a browser error other than a timeout,
+  a context is closed and replaced; the store's cookies carry over
+- images, media, fonts and analytics hosts are aborted at the route level
+- at most browsers x contexts_per_browser renders run at once; the rest
+  wait FIFO and give up with TimeoutError after queue_timeout
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+from urllib.parse import urlsplit
+
+from playwright.async_api import (
+    Browser,
+    BrowserContext,
+    Page,
+    Playwright,
+    Route,
+    StorageState,
+    async_playwright,
+)
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from src.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+LAUNCH_ARGS = ["--disable-dev-shm-usage", "--disable-gpu", "--no-first-run"]
+LOCALE = "he-IL"
+TIMEZONE = "Asia/Jerusalem"
+
+
+@dataclass
+class BrowserPoolStats:
+    launched: int = 0
+    contexts_created: int = 0
+    contexts_recycled: int = 0
+    pages: int = 0
+    blocked_requests: int = 0
+    queue_timeouts: int = 0
+
+
+@dataclass
+class _PooledContext:
+    store: str
+    context: BrowserContext
+    pages: int = 0
+
+
+class BrowserPool:
+    """Fixed set of Chromium instances; renders borrow a per-store context."""
+
+    def __init__(
+        self,
+        *,
+        browsers: int,
+        contexts_per_browser: int,
+        pages_per_context: int,
+        queue_timeout: float,
+        block_resources: Iterable[str] = (),
+        block_hosts: Iterable[str] = (),
+    ) -> None:
+        self._browser_count = browsers
+        self._capacity = browsers * contexts_per_browser
+        self._pages_per_context = pages_per_context
+        self._queue_timeout = queue_timeout
+        self._block_resources = frozenset(block_resources)
+        self._block_hosts = tuple(block_hosts)
+
+        self._slots = asyncio.Semaphore(self._capacity)
+        self._start_lock = asyncio.Lock()
+        self._playwright: Playwright | None = None
+        self._browsers: list[Browser] = []
+        # Free contexts, least recently released first
+        self._idle: list[_PooledContext] = []
+        # Open contexts, idle or in use (creations in flight included)
+        self._live = 0
+        # Last known cookies per store, seeded into replacement contexts
+        self._storage: dict[str, StorageState] = {}
+        self.stats = BrowserPoolStats()
+
+    @asynccontextmanager
+    async def page(self, store: str, timeout: float | None = None) -> AsyncIterator[Page]:
+        """A fresh page in one of store's contexts, closed on exit.
+
+        Raises TimeoutError if no context frees up within timeout
+        (default queue_timeout).
+        """
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout or self._queue_timeout)
+        except TimeoutError:
+            self.stats.queue_timeouts += 1
+            raise
+        pooled: _PooledContext | None = None
+        broken = False
+        try:
+            await self._start()
+            pooled = self._take_idle(store) or await self._new_context(store)
+            page = await pooled.context.new_page()
+            try:
+                yield page
+            finally:
+                pooled.pages += 1
+                self.stats.pages += 1
+                await _quietly(page.close())
+        except PlaywrightTimeoutError:
+            raise  # a slow store, not a bad context
+        except PlaywrightError:
+            broken = True
+            raise
+        finally:
+            if pooled is not None:
+                await self._release(pooled, broken)
+            self._slots.release()
+
+    async def render(
+        self,
+        store: str,
+        url: str,
+        *,
+        wait_for: str | None = None,
+        timeout: float = 10.0,
+    ) -> str:
+        """HTML of url after it loads (and wait_for, a CSS selector, appears)."""
+        async with self.page(store) as page:
+            await page.goto(url, wait_until="domcontentloaded", timeout=timeout * 1000)
+            if wait_for:
+                await page.wait_for_selector(wait_for, timeout=timeout * 1000)
+            return await page.content()
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for pooled in idle:
+            await _quietly(pooled.context.close())
+        for browser in self._browsers:
+            await _quietly(browser.close())
+        self._browsers.clear()
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        self._live = 0
+
+    async def _start(self) -> None:
+        if self._playwright is not None:
+            return
+        async with self._start_lock:
+            if self._playwright is not None:
+                return
+            started = time.monotonic()
+            playwright = await async_playwright().start()
+            browsers: list[Browser] = []
+            try:
+                for _ in range(self._browser_count):
+                    browsers.append(await self._launch(playwright))
+            except BaseException:
+                # Don't leak the driver or the browsers that did start
+                for browser in browsers:
+                    await _quietly(browser.close())
+                await _quietly(playwright.stop())
+                raise
+            self._browsers = browsers
+            self._playwright = playwright
+            logger.info(
+                "Browser pool started: %d browsers, %d contexts in %.1fs",
+                self._browser_count, self._capacity, time.monotonic() - started,
+            )
+
+    async def _launch(self, playwright: Playwright) -> Browser:
+        browser = await playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        self.stats.launched += 1
+        return browser
+
+    async def _browser(self) -> Browser:
+        """The least loaded browser; a crashed one is relaunched in place."""
+        playwright = self._playwright
+        if playwright is None or not self._browsers:
+            raise PlaywrightError("Browser pool is closed")
+        browser = min(self._browsers, key=lambda b: len(b.contexts))
+        if not browser.is_connected():
+            logger.warning("Pooled Chromium disconnected, relaunching")
+            index = self._browsers.index(browser)
+            browser = self._browsers[index] = await self._launch(playwright)
+        return browser
+
+    def _take_idle(self, store: str) -> _PooledContext | None:
+        for i in range(len(self._idle) - 1, -1, -1):
+            if self._idle[i].store == store:
+                return self._idle.pop(i)
+        return None
+
+    async def _new_context(self, store: str) -> _PooledContext:
+        evicted = None
+        if self._live >= self._capacity and self._idle:
+            # Every slot has a context: replace the longest-idle one (another store's)
+            evicted = self._idle.pop(0)
+        else:
+            self._live += 1
+        try:
+            if evicted is not None:
+                await self._retire(evicted)
+            context = await (await self._browser()).new_context(
+                locale=LOCALE,
+                timezone_id=TIMEZONE,
+                storage_state=self._storage.get(store),
+            )
+            await context.route("**/*", self._route)
+        except BaseException:
+            self._live -= 1
+            raise
+        self.stats.contexts_created += 1
+        return _PooledContext(store, context)
+
+    async def _release(self, pooled: _PooledContext, broken: bool) -> None:
+        if not broken and pooled.pages < self._pages_per_context:
+            self._idle.append(pooled)
+            return
+        self._live -= 1
+        await self._retire(pooled)
+
+    async def _retire(self, pooled: _PooledContext) -> None:
+        """Keep the store's cookies, then close the context."""
+        try:
+            self._storage[pooled.store] = await pooled.context.storage_state()
+        except Exception:
+            logger.debug("No storage state from %s context", pooled.store, exc_info=True)
+        await _quietly(pooled.context.close())
+        self.stats.contexts_recycled += 1
+
+    async def _route(self, route: Route) -> None:
+        request = route.request
+        if request.resource_type in self._block_resources or self._blocked_host(request.url):
+            self.stats.blocked_requests += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def _blocked_host(self, url: str) -> bool:
+        host = urlsplit(url).hostname or ""
+        return any(host == h or host.endswith(f".{h}") for h in self._block_hosts)
+
+
+async def _quietly(closing: Any) -> None:
+    """Await a close() that may fail because the browser is already gone."""
+    try:
+        await closing
+    except Exception:
+        logger.debug("Browser close failed", exc_info=True)
+
+
+def create_browser_pool() -> BrowserPool:
+    settings = get_settings().browser
+    return BrowserPool(
+        browsers=settings.browsers,
+        contexts_per_browser=settings.contexts_per_browser,
+        pages_per_context=settings.pages_per_context,
+        queue_timeout=settings.queue_timeout,
+        block_resources=settings.block_resources,
+        block_hosts=settings.block_hosts,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_browser_pool() -> BrowserPool:
+    """Cached singleton; Chromium starts on the first render, not at import."""
+    return create_browser_pool()
+
+
+async def close_browser_pool() -> None:
+    if get_browser_pool.cache_info().currsize:
+        await get_browser_pool().close()
+        get_browser_pool.cache_clear()
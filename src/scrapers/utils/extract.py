@@ -0,0 +1,143 @@
+"""Store page extraction with a C-backed parser (selectolax / lexbor).
+
+Each store describes its results page once, as a SelectorSpec at module
+level; every selector is checked when the spec is built, so a typo fails
+at import instead of on a live search. Extraction reads only what the
+business rules need:
+
+- name, url and price of each product card
+- product dimensions -> shipping size class (S/M/L/XL)
+- the store address shown on the page (for the distance lookup)
+
+A typical results page takes well under a millisecond, so it is parsed
+inline. Pages over SEARCH_PARSE_OFFLOAD_BYTES go to a process pool so a
+huge page never blocks the event loop (see benchmarks/html_extraction.py).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+from selectolax.lexbor import LexborHTMLParser, LexborNode
+
+from src.config import get_settings
+from src.logistics.pricing import DEFAULT_SIZE
+
+_PRICE = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?")
+# "40x27x17", "40 × 27 × 17", "40*27*17" (cm)
+_NUM = r"(\d+(?:\.\d+)?)"
+_BY = r"\s*[xX×*]\s*"
+_DIMENSIONS = re.compile(f"{_NUM}{_BY}{_NUM}(?:{_BY}{_NUM})?")
+# Longest side (cm) up to which a package is in each size class; above the last -> XL
+SIZE_LIMITS_CM: tuple[tuple[float, str], ...] = ((35.0, "S"), (70.0, "M"), (120.0, "L"))
+_PROBE = LexborHTMLParser("<html><body></body></html>")
+
+
+@dataclass(frozen=True)
+class SelectorSpec:
+    """CSS selectors for one store's results page (card fields are relative to item)."""
+
+    item: str
+    name: str
+    price: str
+    url: str = "a"
+    url_attr: str = "href"
+    dimensions: str | None = None
+    # Page level, outside the cards
+    address: str | None = None
+
+    def __post_init__(self) -> None:
+        for selector in (self.item, self.name, self.price, self.url, self.dimensions, self.address):
+            if selector is not None:
+                try:
+                    _PROBE.css(selector)
+                except Exception as e:
+                    raise ValueError(f"Invalid selector {selector!r}: {e}") from None
+
+
+@dataclass
+class ExtractedPage:
+    address: str | None = None
+    # name, url, price, size (and dimensions_cm when known)
+    items: list[dict[str, Any]] = field(default_factory=list)
+
+
+def extract(spec: SelectorSpec, html: str) -> ExtractedPage:
+    """Parse html and pull the spec's fields. Cards without a name or price are skipped."""
+    tree = LexborHTMLParser(html)
+    page = ExtractedPage(address=_text(tree.css_first(spec.address)) if spec.address else None)
+    for card in tree.css(spec.item):
+        name = _text(card.css_first(spec.name))
+        price = parse_price(_text(card.css_first(spec.price)))
+        if not name or price is None:
+            continue
+        link = card.css_first(spec.url)
+        item: dict[str, Any] = {
+            "name": name,
+            "url": link.attributes.get(spec.url_attr) if link is not None else None,
+            "price": price,
+            "size": DEFAULT_SIZE,
+        }
+        if spec.dimensions:
+            dimensions = parse_dimensions(_text(card.css_first(spec.dimensions)))
+            if dimensions:
+                item["dimensions_cm"] = dimensions
+                item["size"] = size_class(dimensions)
+        page.items.append(item)
+    return page
+
+
+async def extract_async(spec: SelectorSpec, html: str) -> ExtractedPage:
+    """extract(), moved to the process pool when the page is large."""
+    settings = get_settings().search
+    if len(html) < settings.parse_offload_bytes:
+        return extract(spec, html)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_parse_pool(), extract, spec, html)
+
+
+def parse_price(text: str) -> float | None:
+    """Price in shekels from card text like "₪1,553.90"; None if there is no number."""
+    match = _PRICE.search(text)
+    return float(match.group().replace(",", "")) if match else None
+
+
+def parse_dimensions(text: str) -> tuple[float, ...] | None:
+    """'מידות: 40x27x17 ס"מ' -> (40.0, 27.0, 17.0)."""
+    match = _DIMENSIONS.search(text)
+    if not match:
+        return None
+    return tuple(float(g) for g in match.groups() if g is not None)
+
+
+def size_class(dimensions_cm: tuple[float, ...]) -> str:
+    longest = max(dimensions_cm)
+    for limit, size in SIZE_LIMITS_CM:
+        if longest <= limit:
+            return size
+    return "XL"
+
+
+def _text(node: LexborNode | None) -> str:
+    return node.text(strip=True) if node is not None else ""
+
+
+@lru_cache(maxsize=1)
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Worker processes for large pages (spawned, so no event loop state is forked)."""
+    return ProcessPoolExecutor(
+        max_workers=get_settings().search.parse_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def close_parse_pool() -> None:
+    if get_parse_pool.cache_info().currsize:
+        get_parse_pool().shutdown(cancel_futures=True)
+        get_parse_pool.cache_clear()
@@ -0,0 +1,358 @@
+"""Shared HTTP fetch layer for store adapters.
+
+One pooled httpx.AsyncClient per store domain (HTTP/2 where the store
+offers it, keep-alive), with three protections so a struggling store
+costs as little as possible:
+
+- AIMD concurrency per domain: the in-flight limit grows by ~1 per window
+  of successful requests and is cut on 429/403 (halved) or when latency
+  climbs well above the domain's recent average (x0.8), at most once per
+  window
+- circuit breaker: after failure_threshold consecutive failures the domain
+  is degraded for open_seconds and calls raise CircuitOpenError at once,
+  instead of spending the search deadline on it; one probe request then
+  decides whether it closes again
+- conditional GETs: ETag / Last-Modified of earlier 200s are sent back as
+  If-None-Match / If-Modified-Since, and a 304 is answered from the copy
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+
+from src.cache.lru import LRUCache
+from src.config import get_settings
+from src.monitoring.discord_logger import log_site_blocked
+
+logger = logging.getLogger(__name__)
+
+BLOCK_STATUSES = frozenset({403, 429})
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    ),
+    "Accept-Language": "he-IL,he;q=0.9,en;q=0.6",
+}
+
+# Multiplicative decrease on a block response / on a latency spike
+BLOCK_BACKOFF = 0.5
+LATENCY_BACKOFF = 0.8
+# Weight of the newest sample in the per-domain latency average
+LATENCY_ALPHA = 0.1
+
+
+class FetchError(Exception):
+    """A store request that failed in a way the adapter should not retry at once."""
+
+
+class BlockedError(FetchError):
+    def __init__(self, domain: str, status_code: int) -> None:
+        super().__init__(f"{domain} answered {status_code}")
+        self.domain = domain
+        self.status_code = status_code
+
+
+class CircuitOpenError(FetchError):
+    """The domain is degraded; skip it for this search."""
+
+    def __init__(self, domain: str, retry_in: float) -> None:
+        super().__init__(f"{domain} degraded, retry in {retry_in:.0f}s")
+        self.domain = domain
+        self.retry_in = retry_in
+
+
+class AdaptiveLimit:
+    """AIMD limit on concurrent requests, adjusted from outcomes and latency."""
+
+    def __init__(self, initial: int, minimum: int, maximum: int, latency_factor: float) -> None:
+        self._limit = float(initial)
+        self._min = minimum
+        self._max = maximum
+        self._latency_factor = latency_factor
+        self._in_flight = 0
+        self._changed = asyncio.Condition()
+        self._avg_latency: float | None = None
+        self._last_decrease = 0.0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self) -> None:
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+
+    async def release(self) -> None:
+        async with self._changed:
+            self._in_flight -= 1
+            self._changed.notify_all()
+
+    def on_success(self, latency: float) -> None:
+        avg = self._avg_latency
+        self._avg_latency = latency if avg is None else avg + LATENCY_ALPHA * (latency - avg)
+        if avg is not None and latency > avg * self._latency_factor:
+            self._decrease(LATENCY_BACKOFF)
+        else:
+            # +1 over a window of `limit` successes
+            self._limit = min(self._max, self._limit + 1 / self._limit)
+
+    def on_block(self) -> None:
+        self._decrease(BLOCK_BACKOFF)
+
+    def _decrease(self, factor: float) -> None:
+        # One cut per window: the requests already in flight saw the same conditions
+        now = time.monotonic()
+        if now - self._last_decrease < (self._avg_latency or 0.0):
+            return
+        self._last_decrease = now
+        self._limit = max(float(self._min), self._limit * factor)
+
+
+class CircuitBreaker:
+    """closed -> open after N consecutive failures -> half-open probe -> closed/open."""
+
+    def __init__(self, failure_threshold: int, open_seconds: float) -> None:
+        self._threshold = failure_threshold
+        self._open_seconds = open_seconds
+        self._failures = 0
+        self._open_until = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return self._failures >= self._threshold
+
+    def check(self, domain: str) -> None:
+        """Raise CircuitOpenError unless a request may go out now."""
+        if not self.is_open:
+            return
+        now = time.monotonic()
+        if now < self._open_until:
+            raise CircuitOpenError(domain, self._open_until - now)
+        # Half-open: this request is the probe; the rest wait out another period
+        # (a probe that never reports back, e.g. cancelled, just allows the next one)
+        self._open_until = now + self._open_seconds
+
+    def on_success(self) -> None:
+        self._failures = 0
+
+    def on_failure(self) -> bool:
+        """Count a failure; True if this one opened the circuit."""
+        was_open = self.is_open
+        self._failures += 1
+        if self.is_open:
+            self._open_until = time.monotonic() + self._open_seconds
+        return self.is_open and not was_open
+
+
+@dataclass
+class DomainStats:
+    requests: int = 0
+    not_modified: int = 0
+    blocked: int = 0
+    errors: int = 0
+    skipped: int = 0
+
+
+@dataclass
+class _Validators:
+    etag: str | None
+    last_modified: str | None
+    response: httpx.Response
+
+
+class _Domain:
+    def __init__(
+        self, client: httpx.AsyncClient, limit: AdaptiveLimit, breaker: CircuitBreaker
+    ) -> None:
+        self.client = client
+        self.limit = limit
+        self.breaker = breaker
+        self.stats = DomainStats()
+
+
+class StoreFetcher:
+    """Per-domain pooled clients behind adaptive limits and circuit breakers."""
+
+    def __init__(
+        self,
+        *,
+        http2: bool = True,
+        timeout: float = 2.0,
+        initial_concurrency: int = 4,
+        min_concurrency: int = 1,
+        max_concurrency: int = 16,
+        latency_factor: float = 2.0,
+        failure_threshold: int = 5,
+        open_seconds: float = 30.0,
+        validator_cache_size: int = 512,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self._http2 = http2
+        self._timeout = timeout
+        self._initial = initial_concurrency
+        self._min = min_concurrency
+        self._max = max_concurrency
+        self._latency_factor = latency_factor
+        self._failure_threshold = failure_threshold
+        self._open_seconds = open_seconds
+        # Shared by every domain's client when set (tests: httpx.MockTransport)
+        self._transport = transport
+        self._domains: dict[str, _Domain] = {}
+        self._validators: LRUCache[str, _Validators] = LRUCache(validator_cache_size)
+
+    def degraded(self, url_or_domain: str) -> bool:
+        domain = self._domains.get(_domain(url_or_domain))
+        return domain is not None and domain.breaker.is_open
+
+    def stats(self) -> dict[str, DomainStats]:
+        return {name: domain.stats for name, domain in self._domains.items()}
+
+    def limit(self, url_or_domain: str) -> int | None:
+        domain = self._domains.get(_domain(url_or_domain))
+        return domain.limit.limit if domain is not None else None
+
+    async def get(
+        self,
+        url: str,
+        *,
+        params: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
+        timeout: float | None = None,
+    ) -> httpx.Response:
+        """GET url through its domain's pool.
+
+        Raises CircuitOpenError if the domain is degraded, BlockedError on
+        403/429 and httpx errors on transport failures; other statuses are
+        returned for the adapter to judge. A 304 comes back as the cached 200.
+        """
+        name = _domain(url)
+        domain = self._domain(name)
+        try:
+            domain.breaker.check(name)
+        except CircuitOpenError:
+            domain.stats.skipped += 1
+            raise
+
+        request_headers = dict(headers or {})
+        cache_key = str(httpx.URL(url, params=params))
+        cached = self._validators.get(cache_key)
+        if cached is not None:
+            if cached.etag:
+                request_headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                request_headers["If-Modified-Since"] = cached.last_modified
+
+        await domain.limit.acquire()
+        started = time.monotonic()
+        try:
+            response = await domain.client.get(
+                url, params=params, headers=request_headers, timeout=timeout or self._timeout
+            )
+        except httpx.HTTPError:
+            domain.stats.errors += 1
+            self._failed(name, domain)
+            raise
+        finally:
+            await domain.limit.release()
+        elapsed = time.monotonic() - started
+        domain.stats.requests += 1
+
+        if response.status_code in BLOCK_STATUSES:
+            domain.stats.blocked += 1
+            domain.limit.on_block()
+            if self._failed(name, domain):
+                await log_site_blocked(name, response.status_code)
+            raise BlockedError(name, response.status_code)
+        if response.status_code >= 500:
+            domain.stats.errors += 1
+            self._failed(name, domain)
+            return response
+
+        domain.limit.on_success(elapsed)
+        domain.breaker.on_success()
+        if response.status_code == 304 and cached is not None:
+            domain.stats.not_modified += 1
+            return cached.response
+        if response.status_code == 200:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if etag or last_modified:
+                self._validators.set(cache_key, _Validators(etag, last_modified, response))
+        return response
+
+    async def close(self) -> None:
+        domains, self._domains = self._domains, {}
+        for domain in domains.values():
+            await domain.client.aclose()
+
+    def _domain(self, name: str) -> _Domain:
+        domain = self._domains.get(name)
+        if domain is None:
+            client = httpx.AsyncClient(
+                http2=self._http2,
+                headers=DEFAULT_HEADERS,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self._max,
+                    max_keepalive_connections=self._max,
+                    keepalive_expiry=60.0,
+                ),
+                transport=self._transport,
+            )
+            limit = AdaptiveLimit(self._initial, self._min, self._max, self._latency_factor)
+            breaker = CircuitBreaker(self._failure_threshold, self._open_seconds)
+            domain = self._domains[name] = _Domain(client, limit, breaker)
+        return domain
+
+    def _failed(self, name: str, domain: _Domain) -> bool:
+        opened = domain.breaker.on_failure()
+        if opened:
+            logger.warning("Store %s degraded for %.0fs", name, self._open_seconds)
+        return opened
+
+
+def _domain(url_or_domain: str) -> str:
+    host = urlsplit(url_or_domain).hostname if "/" in url_or_domain else url_or_domain
+    host = (host or url_or_domain).lower()
+    return host.removeprefix("www.")
+
+
+def create_store_fetcher() -> StoreFetcher:
+    settings = get_settings().fetch
+    return StoreFetcher(
+        http2=settings.http2,
+        timeout=settings.timeout,
+        initial_concurrency=settings.initial_concurrency,
+        min_concurrency=settings.min_concurrency,
+        max_concurrency=settings.max_concurrency,
+        latency_factor=settings.latency_factor,
+        failure_threshold=settings.failure_threshold,
+        open_seconds=settings.open_seconds,
+        validator_cache_size=settings.validator_cache_size,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_store_fetcher() -> StoreFetcher:
+    """Cached singleton shared by all store adapters."""
+    return create_store_fetcher()
+
+
+async def close_store_fetcher() -> None:
+    if get_store_fetcher.cache_info().currsize:
+        await get_store_fetcher().close()
+        get_store_fetcher.cache_clear()
@@ -13,6 +13,7 @@ from aiogram.enums import ParseMode
 from src.config import get_settings
 from src.telegram.handlers import callbacks, search, start
 from src.telegram.middleware.rate_limit import RateLimitMiddleware
+from src.telegram.middleware.request_metrics import RequestMetricsMiddleware
 from src.telegram.middleware.user_lock import UserLockMiddleware
 
 
@@ -35,7 +36,10 @@ def create_dispatcher() -> Dispatcher:
 def create_bot() -> Bot:
     """Create Bot instance with token from settings."""
     settings = get_settings()
-    return Bot(
+    bot = Bot(
         token=settings.telegram.bot_token,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
+    # Latency/error metrics for every outgoing Bot API call
+    bot.session.middleware(RequestMetricsMiddleware())
+    return bot
@@ -2,10 +2,14 @@
 
 from __future__ import annotations
 
+from typing import Any
+
 SEPARATOR = "\u2500" * 25
+# "scanning stores"
+_SCANNING = "\u05e1\u05d5\u05e8\u05e7 \u05d7\u05e0\u05d5\u05d9\u05d5\u05ea"
 
 
-def format_result(rank: int, product: dict) -> str:
+def format_result(rank: int, product: dict[str, Any]) -> str:
     """Format a single product result -- clean, no emojis."""
     return (
         f"<b>{rank}. {product['name']}</b> | {product['source']}\n"
@@ -15,7 +19,7 @@ def format_result(rank: int, product: dict) -> str:
     )
 
 
-def format_results(query: str, products: list[dict]) -> str:
+def format_results(query: str, products: list[dict[str, Any]]) -> str:
     """Format all 5 product results into a single clean message."""
     header = f'<b>{query}</b>\n{SEPARATOR}'
 
@@ -31,3 +35,18 @@ def format_results(query: str, products: list[dict]) -> str:
     )
 
     return f"{header}\n\n{items}{summary}"
+
+
+def format_searching(query: str) -> str:
+    """Placeholder shown the moment a search starts."""
+    return f"<b>{query}</b>\n{SEPARATOR}\n\n{_SCANNING}..."
+
+
+def format_partial_results(
+    query: str, products: list[dict[str, Any]], stores_done: int, stores_total: int
+) -> str:
+    """Current top results while the remaining stores are still answering."""
+    return (
+        f"{format_results(query, products)}\n"
+        f"{_SCANNING}... {stores_done}/{stores_total}"
+    )
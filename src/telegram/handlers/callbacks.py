@@ -5,6 +5,8 @@ from __future__ import annotations
 from aiogram import F, Router
 from aiogram.types import CallbackQuery
 
+from src.monitoring.events import record_conversion
+
 router = Router(name="callbacks")
 
 
@@ -12,6 +14,7 @@ router = Router(name="callbacks")
 async def handle_deliver(callback: CallbackQuery) -> None:
     """Handle 'Order Shilichuyot' button press."""
     product_id = callback.data.split("_", 1)[1] if callback.data else "?"
+    record_conversion(callback.from_user.id, product_id)
     await callback.answer()
     await callback.message.answer(
         f"מזמין שיליחויות למוצר #{product_id}...\n"
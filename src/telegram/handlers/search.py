@@ -1,117 +1,58 @@
 """Product search handler -- routes through Shufi AI agent.
 
 All text messages go to Shufi's state machine. Shufi guides the
-conversation (asking brand/budget/location) and signals when to search.
+conversation (asking brand/budget/location) and signals when to search;
+the search itself fans out to all stores through the search engine.
+
+With telegram.stream_results on, a placeholder is sent immediately and
+edited in place as stores answer, so the user sees the fastest store's
+offers instead of waiting for the slowest.
+
+With telegram.stream_replies on, Shufi's LLM replies are streamed the
+same way: the reply message is sent at the first token and edited as
+the rest arrives. Template replies are sent once, as before.
+
+With telegram.compact_results on, the results are one message carrying a
+combined keyboard -- a search costs one send (plus edits when streaming)
+instead of 1 + N. The legacy one-message-per-product layout goes through
+the outbound send queue, which paces sends and waits out flood limits.
 """
 
 from __future__ import annotations
 
+from typing import Any
+
 from aiogram import Router
-from aiogram.types import Message
+from aiogram.types import InlineKeyboardMarkup, Message
 
-from src.agents.sales_agent import shufi
+from src.agents.sales_agent import SearchRequest, shufi
+from src.cache.refresher import get_price_refresher
+from src.cache.search_cache import Fetch, get_search_cache
+from src.config import get_settings
 from src.monitoring.discord_logger import log_search_completed, log_search_started
-from src.telegram.formatters import format_results
-from src.telegram.keyboards import build_result_keyboard
+from src.monitoring.events import record_search
+from src.scrapers.engine import SearchResult, get_search_engine
+from src.scrapers.ranking import DEFAULT_K, TopK, model_key, offer_key
+from src.telegram.formatters import format_partial_results, format_results, format_searching
+from src.telegram.keyboards import build_result_keyboard, build_results_keyboard
+from src.telegram.live_message import LiveMessage
+from src.telegram.middleware.user_lock import HeldLock
+from src.telegram.outbox import get_outbox
 
 router = Router(name="search")
 
-# Stub products for testing (8 results, sorted cheapest first)
-STUB_PRODUCTS: list[dict] = [
-    {
-        "id": 1,
-        "name": "Xiaomi Redmi Buds 4",
-        "source": "Zap",
-        "price": 89.90,
-        "shipping_cost": 110,
-        "total_cost": 200,
-        "distance_km": 15,
-        "delivery_days": "2-3 ימים",
-        "url": "https://zap.co.il/item/33333",
-    },
-    {
-        "id": 2,
-        "name": "JBL Tune 520BT",
-        "source": "Bug",
-        "price": 149.00,
-        "shipping_cost": 86,
-        "total_cost": 235,
-        "distance_km": 8,
-        "delivery_days": "1-2 ימים",
-        "url": "https://bug.co.il/item/67890",
-    },
-    {
-        "id": 3,
-        "name": "Sony WH-1000XM4",
-        "source": "KSP",
-        "price": 279.90,
-        "shipping_cost": 128,
-        "total_cost": 408,
-        "distance_km": 12,
-        "delivery_days": "1-2 ימים",
-        "url": "https://ksp.co.il/item/12345",
-    },
-    {
-        "id": 4,
-        "name": "Samsung Galaxy Buds2 Pro",
-        "source": "Ivory",
-        "price": 349.00,
-        "shipping_cost": 155,
-        "total_cost": 504,
-        "distance_km": 25,
-        "delivery_days": "2-3 ימים",
-        "url": "https://ivory.co.il/item/11111",
-    },
-    {
-        "id": 5,
-        "name": "Beats Studio Buds+",
-        "source": "iDigital",
-        "price": 399.00,
-        "shipping_cost": 95,
-        "total_cost": 494,
-        "distance_km": 5,
-        "delivery_days": "1 יום",
-        "url": "https://idigital.co.il/item/44444",
-    },
-    {
-        "id": 6,
-        "name": "Apple AirPods 3",
-        "source": "Machsanei Hashmal",
-        "price": 499.00,
-        "shipping_cost": 110,
-        "total_cost": 609,
-        "distance_km": 18,
-        "delivery_days": "1-2 ימים",
-        "url": "https://machsanei.co.il/item/55555",
-    },
-    {
-        "id": 7,
-        "name": "Bose QuietComfort 45",
-        "source": "Amazon IL",
-        "price": 599.00,
-        "shipping_cost": 140,
-        "total_cost": 739,
-        "distance_km": 30,
-        "delivery_days": "3-5 ימים",
-        "url": "https://amazon.co.il/item/66666",
-    },
-    {
-        "id": 8,
-        "name": "Sony WH-1000XM5",
-        "source": "Lastprice",
-        "price": 849.00,
-        "shipping_cost": 95,
-        "total_cost": 944,
-        "distance_km": 7,
-        "delivery_days": "1-2 ימים",
-        "url": "https://lastprice.co.il/item/77777",
-    },
-]
+# Business rule: always show exactly 5 options, cheapest total first
+RESULT_COUNT = DEFAULT_K
 
 
 @router.message()
-async def handle_message(message: Message) -> None:
-    """Route all text through Shufi, show results when Shufi says to search."""
+async def handle_message(message: Message, user_lock: HeldLock | None = None) -> None:
+    """Route all text through Shufi, show results when Shufi says to search.
+
+    user_lock (from UserLockMiddleware) is checked before the session is
+    saved and before results are sent: if the lease lapsed, the worker now
+    holding it answers this user instead.
+    """
     query = message.text
     if not query or query.startswith("/"):
         return
@@ -119,25 +60,146 @@ async def handle_message(message: Message) -> None:
     user_id = message.from_user.id if message.from_user else 0
 
     # Shufi handles the conversation and decides when to search
-    shufi_response, should_search = await shufi.handle_message(user_id, query)
+    reply = _ShufiReply(message)
+    on_delta = reply.update if get_settings().telegram.stream_replies else None
+    still_held = user_lock.still_held if user_lock is not None else None
+    shufi_response, should_search = await shufi.handle_message(
+        user_id, query, on_delta, still_held
+    )
 
     # Always show Shufi's response
-    await message.answer(f"<b>שופי:</b> {shufi_response}")
+    await reply.finish(shufi_response)
 
     # Show search results only when Shufi signals ready
     if should_search:
+        request = shufi.pop_search_request(user_id) or SearchRequest(query=query)
+        if still_held is not None and not await still_held():
+            return
+        query = request.query
         start_time = await log_search_started(query, user_id)
+        sorted_products = await _present(message, request)
+        record_search(user_id, query, len(sorted_products))
+        await log_search_completed(query, len(sorted_products), start_time)
+
+
+class _ShufiReply:
+    """Shufi's reply message: sent at the first streamed text, then edited in place."""
 
-        sorted_products = sorted(STUB_PRODUCTS, key=lambda p: p["total_cost"])
+    def __init__(self, message: Message) -> None:
+        self._message = message
+        self._live: LiveMessage | None = None
 
-        text = format_results(query, sorted_products)
-        await message.answer(text)
+    async def update(self, text: str) -> None:
+        if self._live is None:
+            self._live = LiveMessage(
+                await self._message.answer(_shufi_text(text)),
+                interval=get_settings().telegram.edit_interval,
+                just_sent=True,
+            )
+        else:
+            await self._live.update(_shufi_text(text))
+
+    async def finish(self, text: str) -> None:
+        if self._live is None:
+            await self._message.answer(_shufi_text(text))
+        else:
+            await self._live.finish(_shufi_text(text))
+
+
+def _shufi_text(text: str) -> str:
+    return f"<b>שופי:</b> {text}"
 
+
+async def _present(message: Message, request: SearchRequest) -> list[dict[str, Any]]:
+    """Search and show the results in the configured layout."""
+    settings = get_settings().telegram
+    if settings.stream_results:
+        sorted_products = await _stream_results(message, request, settings.compact_results)
+    else:
+        sorted_products = await _send_results(message, request, settings.compact_results)
+
+    if not settings.compact_results:
+        outbox = get_outbox()
         for product in sorted_products:
             keyboard = build_result_keyboard(product["id"], product["url"])
-            await message.answer(
+            await outbox.answer(
+                message,
                 f"<b>{product['name']}</b> | \u20aa{product['total_cost']:.0f}",
                 reply_markup=keyboard,
             )
-
-        await log_search_completed(query, len(sorted_products), start_time)
+    return sorted_products
+
+
+async def _search(request: SearchRequest, fetch: Fetch | None = None) -> list[dict[str, Any]]:
+    """All offers for request, through the result cache when it is enabled."""
+    settings = get_settings()
+    if settings.cache.enabled:
+        if settings.refresh.enabled:
+            get_price_refresher().record(request.query, request.location)
+        return await get_search_cache().get_or_fetch(request.query, request.location, fetch)
+    if fetch is not None:
+        return (await fetch()).offers
+    return (await get_search_engine().search(request.query, request.location)).offers
+
+
+async def _send_results(
+    message: Message, request: SearchRequest, compact: bool = True
+) -> list[dict[str, Any]]:
+    """Wait for all stores (or the deadline), then send the results once."""
+    ranker = _ranker(request)
+    ranker.extend(await _search(request))
+    sorted_products = ranker.results()
+    await message.answer(
+        format_results(request.query, sorted_products),
+        reply_markup=_results_keyboard(sorted_products) if compact else None,
+    )
+    return sorted_products
+
+
+async def _stream_results(
+    message: Message, request: SearchRequest, compact: bool = True
+) -> list[dict[str, Any]]:
+    """Send a placeholder at once, then edit it as each store's offers arrive.
+
+    On a cache hit (or when another user's identical search is already
+    running) the placeholder goes straight to the final layout.
+    """
+    query = request.query
+    engine = get_search_engine()
+    live = LiveMessage(
+        await message.answer(format_searching(query)),
+        interval=get_settings().telegram.edit_interval,
+    )
+
+    async def fetch() -> SearchResult:
+        result = SearchResult(query=query)
+        live_ranker = _ranker(request)
+        stores_done = 0
+        async for store_result in engine.stream(query, request.location):
+            stores_done += 1
+            result.stores.append(store_result)
+            # Only touch Telegram when the visible ranking actually changed
+            if live_ranker.extend(store_result.offers):
+                await live.update(
+                    format_partial_results(
+                        query, live_ranker.results(), stores_done, len(engine.stores)
+                    )
+                )
+        return result
+
+    ranker = _ranker(request)
+    ranker.extend(await _search(request, fetch))
+    top = ranker.results()
+    await live.finish(
+        format_results(query, top), reply_markup=_results_keyboard(top) if compact else None
+    )
+    return top
+
+
+def _results_keyboard(products: list[dict[str, Any]]) -> InlineKeyboardMarkup | None:
+    return build_results_keyboard(products) if products else None
+
+
+def _ranker(request: SearchRequest) -> TopK:
+    """Specific model: one row per store. Generic: cheapest store per product."""
+    return TopK(RESULT_COUNT, dedupe_key=offer_key if request.is_specific else model_key)
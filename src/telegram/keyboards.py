@@ -2,10 +2,15 @@
 
 Business rule: each result has exactly 2 buttons:
   [קנייה ישירה] (URL) + [הזמן שיליחויות] (callback)
+
+Compact mode puts all results under one message: one row per result,
+buttons prefixed with the result's rank in format_results.
 """
 
 from __future__ import annotations
 
+from typing import Any
+
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
 
@@ -25,3 +30,22 @@ def build_result_keyboard(product_id: int, product_url: str) -> InlineKeyboardMa
             ]
         ]
     )
+
+
+def build_results_keyboard(products: list[dict[str, Any]]) -> InlineKeyboardMarkup:
+    """Build one keyboard for all results: a 2-button row per product, in rank order."""
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(
+                    text=f"{rank}. קנייה ישירה",
+                    url=product["url"],
+                ),
+                InlineKeyboardButton(
+                    text=f"{rank}. הזמן שיליחויות",
+                    callback_data=f"deliver_{product['id']}",
+                ),
+            ]
+            for rank, product in enumerate(products, 1)
+        ]
+    )
@@ -0,0 +1,73 @@
+"""Edit-in-place Telegram message for streaming search results.
+
+Telegram rejects bursts of edits to the same chat, so intermediate updates
+are throttled to one edit per interval; the final text is always written.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import InlineKeyboardMarkup, Message
+
+logger = logging.getLogger(__name__)
+
+
+class LiveMessage:
+    """Wraps a sent message and re-renders it as new content arrives."""
+
+    def __init__(self, message: Message, interval: float = 1.0, just_sent: bool = False) -> None:
+        self._message = message
+        self._interval = interval
+        self._text = message.text or ""
+        # First results may replace a placeholder right away; a message that
+        # already shows real content waits out one interval like any edit
+        self._last_edit = time.monotonic() if just_sent else 0.0
+        self._blocked_until = 0.0
+
+    async def update(self, text: str) -> bool:
+        """Edit if the text changed and the throttle allows. Returns True if edited."""
+        now = time.monotonic()
+        if text == self._text or now < self._blocked_until:
+            return False
+        if now - self._last_edit < self._interval:
+            return False
+        return await self._edit(text)
+
+    async def finish(self, text: str, reply_markup: InlineKeyboardMarkup | None = None) -> None:
+        """Write the final layout regardless of throttling."""
+        if text == self._text and reply_markup is None:
+            return
+        await self._edit(text, reply_markup, final=True)
+
+    async def _edit(
+        self,
+        text: str,
+        reply_markup: InlineKeyboardMarkup | None = None,
+        final: bool = False,
+    ) -> bool:
+        try:
+            try:
+                await self._message.edit_text(text, reply_markup=reply_markup)
+            except TelegramRetryAfter as e:
+                if not final:
+                    self._blocked_until = time.monotonic() + e.retry_after
+                    return False
+                # The final layout gets one retry; a second RetryAfter gives up
+                await asyncio.sleep(e.retry_after)
+                await self._message.edit_text(text, reply_markup=reply_markup)
+        except TelegramRetryAfter as e:
+            self._blocked_until = time.monotonic() + e.retry_after
+            logger.warning("Final live message edit rate limited twice, giving up")
+            return False
+        except TelegramBadRequest as e:
+            # "message is not modified" is harmless; anything else is worth a log line
+            if "not modified" not in str(e):
+                logger.warning("Live message edit failed: %s", e)
+            return False
+        self._text = text
+        self._last_edit = time.monotonic()
+        return True
@@ -1,27 +1,154 @@
-"""Rate limiting middleware -- token bucket per user.
+"""Rate limiting middleware -- GCRA per user.
 
-Allows max 15 requests per 60 seconds per user.
+Allows max 15 requests per 60 seconds per user (RATE_LIMIT_MAX_REQUESTS /
+RATE_LIMIT_WINDOW), with bursts up to the full 15.
+
+GCRA (generic cell rate algorithm) is a token bucket stored as one number:
+the user's "theoretical arrival time" (TAT). Each request pushes the TAT
+forward by window / max_requests; a request is refused if that would put
+the TAT more than one window ahead of now. A TAT in the past means the user
+is idle, and forgetting it changes nothing.
+
+Times are integers (ns in memory, ms in Redis): with float seconds the sum
+of max_requests emission intervals can land a hair over the window, and
+the last request of a full burst gets refused.
+
+- InMemoryRateLimiter: one int per active user; idle users are swept out
+  by a background task.
+- RedisRateLimiter: the same check as an atomic Lua script, so the limit
+  holds across uvicorn workers; keys expire on their own.
 """
 
 from __future__ import annotations
 
+import asyncio
+import logging
 import time
+from abc import ABC, abstractmethod
 from collections.abc import Awaitable, Callable
+from itertools import islice
 from typing import Any
 
 from aiogram import BaseMiddleware
 from aiogram.types import Message
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.cache.client import get_redis
+from src.config import get_settings
+from src.monitoring.metrics import MIDDLEWARE_REJECTIONS
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ratelimit:v1:"
+SWEEP_CHUNK = 10_000
+
+_REJECTED = MIDDLEWARE_REJECTIONS.labels(reason="rate_limit")
+
+# KEYS[1] = user key; ARGV = emission interval ms, window ms. Returns 1 if allowed.
+# Uses the Redis clock so all workers agree on "now".
+_GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local emission = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then tat = now end
+local new_tat = tat + emission
+if new_tat - now > window then return 0 end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return 1
+"""
+
+
+class RateLimiter(ABC):
+    """Decides whether a user may make another request right now."""
+
+    def __init__(self, max_requests: int, window: float) -> None:
+        self.max_requests = max_requests
+        self.window = window
+
+    @abstractmethod
+    async def allow(self, user_id: int) -> bool:
+        """Count one request for user_id; False if it exceeds the limit."""
+
 
-MAX_REQUESTS = 15
-WINDOW_SECONDS = 60.0
+class InMemoryRateLimiter(RateLimiter):
+    """Process-local GCRA: user_id -> TAT in ns, idle users swept every sweep_interval."""
+
+    def __init__(self, max_requests: int, window: float, sweep_interval: float) -> None:
+        super().__init__(max_requests, window)
+        self._window_ns = int(window * 1e9)
+        self._emission_ns = self._window_ns // max_requests
+        self._sweep_interval_ns = int(sweep_interval * 1e9)
+        self._tat: dict[int, int] = {}
+        self._next_sweep = time.monotonic_ns() + self._sweep_interval_ns
+        self._sweeper: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+    async def allow(self, user_id: int) -> bool:
+        now = time.monotonic_ns()
+        if now >= self._next_sweep and self._sweeper is None:
+            self._next_sweep = now + self._sweep_interval_ns
+            self._sweeper = asyncio.create_task(self._sweep())
+            self._sweeper.add_done_callback(self._sweep_done)
+
+        new_tat = max(self._tat.get(user_id, now), now) + self._emission_ns
+        if new_tat - now > self._window_ns:
+            return False
+        self._tat[user_id] = new_tat
+        return True
+
+    async def _sweep(self) -> None:
+        """Drop users whose TAT has passed, a chunk at a time so the loop stays responsive."""
+        users = iter(list(self._tat))
+        while chunk := list(islice(users, SWEEP_CHUNK)):
+            now = time.monotonic_ns()
+            for user_id in chunk:
+                tat = self._tat.get(user_id)
+                if tat is not None and tat <= now:
+                    del self._tat[user_id]
+            await asyncio.sleep(0)
+
+    def _sweep_done(self, task: asyncio.Task[None]) -> None:
+        self._sweeper = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Rate limiter sweep failed: %s", task.exception())
+
+
+class RedisRateLimiter(RateLimiter):
+    """Shared GCRA: one key per recently active user, checked and updated atomically."""
+
+    def __init__(self, redis: Redis, max_requests: int, window: float) -> None:
+        super().__init__(max_requests, window)
+        self._script = redis.register_script(_GCRA_SCRIPT)
+        window_ms = int(window * 1000)
+        self._args = (window_ms // max_requests, window_ms)
+
+    async def allow(self, user_id: int) -> bool:
+        try:
+            return bool(await self._script(keys=[f"{KEY_PREFIX}{user_id}"], args=self._args))
+        except RedisError:
+            # Fail open: a Redis outage should not lock every user out of the bot
+            logger.warning("Rate limit check failed for user %s", user_id, exc_info=True)
+            return True
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Build the limiter selected by RATE_LIMIT_BACKEND (memory | redis)."""
+    settings = get_settings().rate_limit
+    if settings.backend == "redis":
+        return RedisRateLimiter(get_redis(), settings.max_requests, settings.window)
+    return InMemoryRateLimiter(settings.max_requests, settings.window, settings.sweep_interval)
 
 
 class RateLimitMiddleware(BaseMiddleware):
     """Outer middleware: reject messages if user exceeds rate limit."""
 
-    def __init__(self) -> None:
-        # {user_id: list of timestamps}
-        self._requests: dict[int, list[float]] = {}
+    def __init__(self, limiter: RateLimiter | None = None) -> None:
+        self._limiter = limiter if limiter is not None else create_rate_limiter()
 
     async def __call__(
         self,
@@ -35,22 +162,11 @@ class RateLimitMiddleware(BaseMiddleware):
         if event.text and event.text.startswith("/"):
             return await handler(event, data)
 
-        now = time.monotonic()
-
-        # Clean old entries
-        if user_id in self._requests:
-            self._requests[user_id] = [
-                t for t in self._requests[user_id]
-                if now - t < WINDOW_SECONDS
-            ]
-        else:
-            self._requests[user_id] = []
-
-        if len(self._requests[user_id]) >= MAX_REQUESTS:
+        if not await self._limiter.allow(user_id):
+            _REJECTED.inc()
             await event.answer(
-                f"נא להמתין - ניתן לבצע עד {MAX_REQUESTS} חיפושים בדקה."
+                f"נא להמתין - ניתן לבצע עד {self._limiter.max_requests} חיפושים בדקה."
             )
             return None
 
-        self._requests[user_id].append(now)
         return await handler(event, data)
@@ -0,0 +1,40 @@
+"""Bot API request middleware -- latency and errors of every outgoing call.
+
+Registered on the bot session, so it sees sendMessage, editMessageText,
+answerCallbackQuery, ... from every handler, the outbox and the live
+message editor alike.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import Response, TelegramMethod
+
+from src.monitoring.metrics import TELEGRAM_API_ERRORS, TELEGRAM_API_SECONDS
+
+
+class RequestMetricsMiddleware(BaseRequestMiddleware):
+    """Observe each Bot API call in smartshopper_telegram_api_seconds{method}."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Bot,
+        method: TelegramMethod[Any],
+    ) -> Response[Any]:
+        name = method.__api_method__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            TELEGRAM_API_ERRORS.labels(name, type(e).__name__).inc()
+            raise
+        finally:
+            TELEGRAM_API_SECONDS.labels(name).observe(time.perf_counter() - started)
@@ -1,24 +1,255 @@
 """Per-user lock middleware -- one search at a time per user.
 
 Prevents users from flooding the system with concurrent searches.
-Uses in-memory asyncio.Lock per user_id.
+
+- InMemoryLockRegistry: asyncio.Lock per user_id, created on demand and
+  dropped as soon as it is released with nobody waiting, so the registry
+  only holds users with a message in flight.
+- RedisLockRegistry: a lease key per user (SET NX PX) shared by all
+  uvicorn workers. The lease carries a fencing token from a global counter
+  and is renewed while held; if a worker stalls past the TTL, the lease
+  passes on and the stale holder can tell via still_held().
+
+The middleware hands the handler a HeldLock (data["user_lock"]); the
+search handler checks it before its side effects (saving the session,
+sending results), so a holder whose lease lapsed doesn't overwrite what
+the new holder did.
+
+With USER_LOCK_QUEUE_NEXT on, one extra message per user waits for the
+lock instead of being rejected; any further message is still rejected.
+In webhook fast-ack mode a user's updates already run one at a time per
+process (telegram/update_queue.py), so there the busy reply only fires
+for messages handled by different workers.
 """
 
 from __future__ import annotations
 
 import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
 from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from itertools import count
 from typing import Any
 
 from aiogram import BaseMiddleware
 from aiogram.types import Message
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 
+from src.cache.client import get_redis
+from src.config import get_settings
+from src.monitoring.metrics import MIDDLEWARE_REJECTIONS
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "userlock:v1:"
+FENCE_KEY = f"{KEY_PREFIX}fence"
+POLL_INTERVAL = 0.05
+MAX_POLL_INTERVAL = 0.5
+
+_REJECTED = MIDDLEWARE_REJECTIONS.labels(reason="lock")
+
+# KEYS[1] = lease key; ARGV[1] = token. Delete only if we still own it.
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+"""
+# KEYS[1] = lease key; ARGV = token, ttl ms. Extend only if we still own it.
+_RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('PEXPIRE', KEYS[1], ARGV[2]) end
+return 0
+"""
+
+
+@dataclass(frozen=True)
+class Lease:
+    """Proof of holding a user's lock. token increases with every acquisition."""
+
+    user_id: int
+    token: int
 
-class UserLockMiddleware(BaseMiddleware):
-    """Outer middleware: skip handler if user already has a search running."""
+
+class LockRegistry(ABC):
+    """Hands out per-user locks."""
+
+    @abstractmethod
+    async def acquire(self, user_id: int, wait: bool) -> Lease | None:
+        """Take the user's lock. None if it is held and wait is False (or a waiter is queued)."""
+
+    @abstractmethod
+    async def release(self, lease: Lease) -> None:
+        """Give the lock back."""
+
+    async def still_held(self, lease: Lease) -> bool:
+        """True if lease is still the user's current one. Local locks can't lapse."""
+        return True
+
+
+@dataclass(frozen=True)
+class HeldLock:
+    """The lease a handler runs under, with a way to check it is still current."""
+
+    registry: LockRegistry
+    lease: Lease
+
+    async def still_held(self) -> bool:
+        return await self.registry.still_held(self.lease)
+
+
+class InMemoryLockRegistry(LockRegistry):
+    """Process-local locks; an entry lives only while the lock is held or awaited."""
 
     def __init__(self) -> None:
-        self._locks: dict[int, asyncio.Lock] = {}
+        # user_id -> (lock, holder + waiters)
+        self._locks: dict[int, tuple[asyncio.Lock, int]] = {}
+        self._tokens = count(1)
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    async def acquire(self, user_id: int, wait: bool) -> Lease | None:
+        entry = self._locks.get(user_id)
+        if entry is None:
+            entry = (asyncio.Lock(), 0)
+        elif not wait or entry[1] > 1:
+            return None  # held; and either no queueing or the one queue slot is taken
+
+        lock, refs = entry
+        self._locks[user_id] = (lock, refs + 1)
+        try:
+            await lock.acquire()
+        except BaseException:
+            self._unref(user_id)
+            raise
+        return Lease(user_id, next(self._tokens))
+
+    async def release(self, lease: Lease) -> None:
+        self._locks[lease.user_id][0].release()
+        self._unref(lease.user_id)
+
+    def _unref(self, user_id: int) -> None:
+        lock, refs = self._locks[user_id]
+        if refs == 1:
+            del self._locks[user_id]
+        else:
+            self._locks[user_id] = (lock, refs - 1)
+
+
+class RedisLockRegistry(LockRegistry):
+    """Cross-worker leases: userlock:v1:{user_id} = fencing token, renewed while held."""
+
+    def __init__(self, redis: Redis, lease_ttl: float, wait_timeout: float) -> None:
+        self._redis = redis
+        self._ttl_ms = int(lease_ttl * 1000)
+        self._wait_timeout = wait_timeout
+        self._release = redis.register_script(_RELEASE_SCRIPT)
+        self._renew = redis.register_script(_RENEW_SCRIPT)
+        self._renewers: dict[Lease, asyncio.Task[None]] = {}
+
+    async def acquire(self, user_id: int, wait: bool) -> Lease | None:
+        try:
+            return await self._acquire(user_id, wait)
+        except RedisError:
+            # Fail open: token 0 marks a lease that holds no lock and fences nothing
+            logger.warning("User lock unavailable for user %s", user_id, exc_info=True)
+            return Lease(user_id, 0)
+
+    async def _acquire(self, user_id: int, wait: bool) -> Lease | None:
+        key = f"{KEY_PREFIX}{user_id}"
+        token = await self._redis.incr(FENCE_KEY)
+        if await self._redis.set(key, token, nx=True, px=self._ttl_ms):
+            return self._held(user_id, token)
+        if not wait:
+            return None
+
+        # One queued message per user: claim the waiter slot or give up
+        waiter_key = f"{key}:next"
+        if not await self._redis.set(waiter_key, token, nx=True, px=self._ttl_ms):
+            return None
+        try:
+            deadline = time.monotonic() + self._wait_timeout
+            delay = POLL_INTERVAL
+            while time.monotonic() < deadline:
+                await asyncio.sleep(delay)
+                if await self._redis.set(key, token, nx=True, px=self._ttl_ms):
+                    return self._held(user_id, token)
+                delay = min(delay * 2, MAX_POLL_INTERVAL)
+            return None
+        finally:
+            await self._release_waiter(user_id, waiter_key, token)
+
+    async def _release_waiter(self, user_id: int, waiter_key: str, token: int) -> None:
+        # Must not raise: the lease may already be held, and a RedisError here
+        # would turn it into a fail-open lease while its renewer keeps it alive
+        try:
+            await self._release(keys=[waiter_key], args=[token])
+        except RedisError:
+            logger.warning(
+                "User lock waiter release failed for user %s; it expires on its own", user_id
+            )
+
+    async def release(self, lease: Lease) -> None:
+        renewer = self._renewers.pop(lease, None)
+        if renewer is None:
+            return  # fail-open lease, nothing was taken
+        renewer.cancel()
+        try:
+            await self._release(keys=[f"{KEY_PREFIX}{lease.user_id}"], args=[lease.token])
+        except RedisError:
+            logger.warning(
+                "User lock release failed for user %s; it expires on its own", lease.user_id
+            )
+
+    async def still_held(self, lease: Lease) -> bool:
+        """True if the lease has not expired and passed to another worker."""
+        if not lease.token:
+            return True  # fail-open lease: there was no lock to lose
+        try:
+            current = await self._redis.get(f"{KEY_PREFIX}{lease.user_id}")
+        except RedisError:
+            logger.warning("User lock check failed for user %s", lease.user_id, exc_info=True)
+            return True
+        return current is not None and int(current) == lease.token
+
+    def _held(self, user_id: int, token: int) -> Lease:
+        lease = Lease(user_id, token)
+        self._renewers[lease] = asyncio.create_task(self._keep_alive(lease))
+        return lease
+
+    async def _keep_alive(self, lease: Lease) -> None:
+        key = f"{KEY_PREFIX}{lease.user_id}"
+        while True:
+            await asyncio.sleep(self._ttl_ms / 3000)
+            try:
+                if not await self._renew(keys=[key], args=[lease.token, self._ttl_ms]):
+                    logger.warning("Lock lease for user %s was lost", lease.user_id)
+                    return
+            except RedisError:
+                logger.warning("Lock lease renewal failed for user %s", lease.user_id)
+
+
+def create_lock_registry() -> LockRegistry:
+    """Build the registry selected by USER_LOCK_BACKEND (memory | redis)."""
+    settings = get_settings().user_lock
+    if settings.backend == "redis":
+        return RedisLockRegistry(
+            get_redis(), lease_ttl=settings.lease_ttl, wait_timeout=settings.wait_timeout
+        )
+    return InMemoryLockRegistry()
+
+
+class UserLockMiddleware(BaseMiddleware):
+    """Outer middleware: skip (or queue) the handler if user already has a search running."""
+
+    def __init__(
+        self, registry: LockRegistry | None = None, queue_next: bool | None = None
+    ) -> None:
+        self._registry = registry if registry is not None else create_lock_registry()
+        self._queue_next = (
+            get_settings().user_lock.queue_next if queue_next is None else queue_next
+        )
 
     async def __call__(
         self,
@@ -32,15 +263,15 @@ class UserLockMiddleware(BaseMiddleware):
         if event.text and event.text.startswith("/"):
             return await handler(event, data)
 
-        # Get or create lock for this user
-        if user_id not in self._locks:
-            self._locks[user_id] = asyncio.Lock()
-
-        lock = self._locks[user_id]
-
-        if lock.locked():
+        lease = await self._registry.acquire(user_id, wait=self._queue_next)
+        if lease is None:
+            _REJECTED.inc()
             await event.answer("חיפוש קודם עדיין בתהליך, נא להמתין...")
             return None
 
-        async with lock:
+        try:
+            # Handlers check it before writing shared state (see HeldLock)
+            data["user_lock"] = HeldLock(self._registry, lease)
             return await handler(event, data)
+        finally:
+            await self._registry.release(lease)
@@ -0,0 +1,120 @@
+"""Outbound send queue for Telegram messages.
+
+Telegram limits how fast a bot may post to one chat; a burst answers with
+429 / RetryAfter. Sends are queued per chat and drained by one worker per
+chat. A worker sends in FIFO order, keeps at least min_interval between
+sends, and on RetryAfter pauses the whole chat for retry_after seconds
+before retrying. A worker exits once its queue has been empty for one
+interval, so idle chats hold no state.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.types import InlineKeyboardMarkup, Message
+
+logger = logging.getLogger(__name__)
+
+# Telegram allows about one message per second per chat
+MIN_INTERVAL = 1.0
+MAX_RETRIES = 3
+
+Send = Callable[[], Awaitable[Any]]
+_Item = tuple[Send, "asyncio.Future[Any]"]
+
+
+@dataclass
+class OutboxStats:
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+
+
+class Outbox:
+    """Per-chat FIFO send queues with pacing and flood-wait handling."""
+
+    def __init__(self, min_interval: float = MIN_INTERVAL, max_retries: int = MAX_RETRIES) -> None:
+        self._min_interval = min_interval
+        self._max_retries = max_retries
+        self._queues: dict[int, asyncio.Queue[_Item]] = {}
+        self._workers: dict[int, asyncio.Task[None]] = {}
+        self.stats = OutboxStats()
+
+    async def answer(
+        self,
+        message: Message,
+        text: str,
+        reply_markup: InlineKeyboardMarkup | None = None,
+    ) -> Message:
+        """Queue message.answer(text) and wait until it is actually sent."""
+        sent: Message = await self.submit(
+            message.chat.id, lambda: message.answer(text, reply_markup=reply_markup)
+        )
+        return sent
+
+    async def submit(self, chat_id: int, send: Send) -> Any:
+        """Queue one API call for chat_id; returns its result once sent."""
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(chat_id)
+        if queue is None:
+            queue = self._queues[chat_id] = asyncio.Queue()
+        queue.put_nowait((send, future))
+        if chat_id not in self._workers:
+            self._workers[chat_id] = asyncio.create_task(self._drain(chat_id, queue))
+        return await future
+
+    async def _drain(self, chat_id: int, queue: asyncio.Queue[_Item]) -> None:
+        last_sent = 0.0
+        try:
+            while True:
+                wait = last_sent + self._min_interval - time.monotonic()
+                if queue.empty():
+                    if wait <= 0:
+                        break
+                    # Linger one interval so back-to-back callers stay paced
+                    await asyncio.sleep(wait)
+                    continue
+                send, future = queue.get_nowait()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                try:
+                    result = await self._send(send)
+                except Exception as e:  # noqa: BLE001 -- handed to the caller
+                    self.stats.failed += 1
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    self.stats.sent += 1
+                    if not future.done():
+                        future.set_result(result)
+                last_sent = time.monotonic()
+        finally:
+            del self._workers[chat_id]
+            del self._queues[chat_id]
+
+    async def _send(self, send: Send) -> Any:
+        attempt = 0
+        while True:
+            try:
+                return await send()
+            except TelegramRetryAfter as e:
+                if attempt >= self._max_retries:
+                    raise
+                attempt += 1
+                self.stats.retried += 1
+                logger.info("Flood wait %ss, pausing chat queue", e.retry_after)
+                await asyncio.sleep(e.retry_after)
+
+
+@lru_cache(maxsize=1)
+def get_outbox() -> Outbox:
+    """Cached singleton shared by all handlers."""
+    return Outbox()
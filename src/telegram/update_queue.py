@@ -0,0 +1,244 @@
+"""Background processing of webhook updates -- fast ack for Telegram.
+
+The webhook validates an update, hands it to UpdateQueue.submit() and
+answers 200 at once; a pool of worker tasks feeds updates to the
+dispatcher. Telegram re-sends any update that is not acknowledged quickly,
+so a slow inline handler (LLM, scraping) used to pile up duplicates.
+
+- Ordering: updates of one user are processed one at a time, in arrival
+  order. A worker that picks up an update for a user already in flight
+  hands it to the worker owning that user, so other users never wait
+  behind a slow one.
+- Per-user cap: at most max_per_user updates of one user are accepted but
+  unfinished. Further ones are acknowledged and dropped, not refused: a
+  503 would hold up Telegram's delivery of everyone's updates behind one
+  user's burst. The user is told once per burst that the previous message
+  is still being worked on, so a dropped message isn't silently lost.
+  Because a user's updates already run one at a time here,
+  UserLockMiddleware doesn't see them overlap in this mode and its "search
+  in progress" reply doesn't fire; extra messages wait in line (up to
+  the cap) instead. The lock still guards against other workers.
+- Dedup: recently seen update_ids are remembered and dropped.
+- Backpressure: at most max_backlog updates are accepted but unfinished;
+  beyond that submit() refuses and the webhook answers 503, so Telegram
+  keeps the update and retries later.
+- Shutdown: close() stops intake, waits for the backlog to drain (up to a
+  timeout), then cancels the workers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Hashable
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import CallbackQuery, Message, Update, User
+from aiogram.types.update import UpdateTypeLookupError
+
+from src.cache.lru import LRUCache
+from src.monitoring.metrics import UPDATE_BACKLOG, UPDATE_SECONDS, WEBHOOK_UPDATES
+
+logger = logging.getLogger(__name__)
+
+ACCEPTED = "accepted"
+DUPLICATE = "duplicate"
+DROPPED = "dropped"
+REJECTED = "rejected"
+
+BUSY_TEXT = "אני עדיין עובד על ההודעה הקודמת שלך, רק רגע..."
+
+_OUTCOMES = {
+    result: WEBHOOK_UPDATES.labels(result=result)
+    for result in (ACCEPTED, DUPLICATE, DROPPED, REJECTED)
+}
+
+
+@dataclass
+class UpdateQueueStats:
+    """Counters for backpressure and throughput reporting."""
+
+    received: int = 0
+    duplicates: int = 0
+    # Over the per-user cap, and how many of those users were told
+    dropped: int = 0
+    busy_notices: int = 0
+    rejected: int = 0
+    processed: int = 0
+    failed: int = 0
+    max_backlog: int = 0
+    wait_seconds: float = 0.0
+
+    def snapshot(self) -> dict[str, Any]:
+        done = self.processed + self.failed
+        return {**asdict(self), "avg_wait": self.wait_seconds / done if done else 0.0}
+
+
+class UpdateQueue:
+    """Bounded queue of webhook updates drained by a worker pool."""
+
+    def __init__(
+        self,
+        bot: Bot,
+        dp: Dispatcher,
+        *,
+        workers: int,
+        max_backlog: int,
+        dedup_size: int,
+        max_per_user: int = 3,
+    ) -> None:
+        self._bot = bot
+        self._dp = dp
+        self._workers_count = workers
+        self._max_backlog = max_backlog
+        self._max_per_user = max_per_user
+        self._seen: LRUCache[int, bool] = LRUCache(dedup_size)
+        self._queue: asyncio.Queue[tuple[Update, float]] = asyncio.Queue()
+        # user key -> updates waiting behind the one being processed
+        self._active: dict[Hashable, deque[tuple[Update, float]]] = {}
+        # user key -> accepted but unfinished updates
+        self._per_user: dict[Hashable, int] = {}
+        # Users over the cap who were already told; cleared when they catch up
+        self._notified: set[Hashable] = set()
+        self._notices: set[asyncio.Task[None]] = set()
+        self._workers: list[asyncio.Task[None]] = []
+        self._backlog = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._closing = False
+        self.stats = UpdateQueueStats()
+
+    @property
+    def backlog(self) -> int:
+        """Accepted updates not yet finished (queued, waiting or running)."""
+        return self._backlog
+
+    def start(self) -> None:
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"update-worker-{i}")
+            for i in range(self._workers_count)
+        ]
+
+    def submit(self, update: Update) -> str:
+        """Accept an update for background processing; never blocks."""
+        result = self._submit(update)
+        _OUTCOMES[result].inc()
+        return result
+
+    def _submit(self, update: Update) -> str:
+        self.stats.received += 1
+        if update.update_id in self._seen:
+            self.stats.duplicates += 1
+            return DUPLICATE
+        if self._closing or self._backlog >= self._max_backlog:
+            self.stats.rejected += 1
+            return REJECTED
+        self._seen.set(update.update_id, True)
+        key = _user_key(update)
+        pending = self._per_user.get(key, 0)
+        if pending >= self._max_per_user:
+            self.stats.dropped += 1
+            logger.info(
+                "Dropped update %d: user %s already has %d pending", update.update_id, key, pending
+            )
+            if key not in self._notified:
+                self._notified.add(key)
+                task = asyncio.create_task(self._notify_busy(update))
+                self._notices.add(task)
+                task.add_done_callback(self._notices.discard)
+            return DROPPED
+
+        self._per_user[key] = pending + 1
+        self._backlog += 1
+        UPDATE_BACKLOG.inc()
+        self.stats.max_backlog = max(self.stats.max_backlog, self._backlog)
+        self._idle.clear()
+        self._queue.put_nowait((update, time.monotonic()))
+        return ACCEPTED
+
+    async def close(self, timeout: float) -> None:
+        """Stop intake, let the backlog drain, then stop the workers."""
+        self._closing = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except TimeoutError:
+            logger.warning("Update queue drain timed out, dropping %d updates", self._backlog)
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._notices, return_exceptions=True)
+        logger.info("Update queue closed: %s", self.stats.snapshot())
+
+    async def _worker(self) -> None:
+        while True:
+            update, enqueued_at = await self._queue.get()
+            key = _user_key(update)
+            waiting = self._active.get(key)
+            if waiting is not None:
+                # Same user already in flight: its worker picks this up next
+                waiting.append((update, enqueued_at))
+                continue
+
+            waiting = self._active[key] = deque()
+            try:
+                await self._process(key, update, enqueued_at)
+                while waiting:
+                    await self._process(key, *waiting.popleft())
+            finally:
+                del self._active[key]
+
+    async def _process(self, key: Hashable, update: Update, enqueued_at: float) -> None:
+        started = time.monotonic()
+        self.stats.wait_seconds += started - enqueued_at
+        try:
+            await self._dp.feed_update(self._bot, update)
+        except Exception:
+            self.stats.failed += 1
+            logger.exception("Update %d failed", update.update_id)
+        else:
+            self.stats.processed += 1
+        finally:
+            UPDATE_SECONDS.observe(time.monotonic() - started)
+            UPDATE_BACKLOG.dec()
+            self._backlog -= 1
+            if self._per_user[key] > 1:
+                self._per_user[key] -= 1
+            else:
+                del self._per_user[key]
+                self._notified.discard(key)
+            if not self._backlog:
+                self._idle.set()
+
+
+    async def _notify_busy(self, update: Update) -> None:
+        """Tell the user a dropped update wasn't lost on us: they're still being served."""
+        event = update.event
+        try:
+            if isinstance(event, Message):
+                await self._bot.send_message(event.chat.id, BUSY_TEXT)
+            elif isinstance(event, CallbackQuery):
+                await self._bot.answer_callback_query(event.id, BUSY_TEXT)
+            else:
+                return
+        except Exception as e:  # noqa: BLE001 -- best effort, the update is dropped anyway
+            logger.warning("Busy notice for update %d failed: %s", update.update_id, e)
+            return
+        self.stats.busy_notices += 1
+
+
+def _user_key(update: Update) -> Hashable:
+    """Who the update belongs to; updates without a user are not ordered."""
+    try:
+        event = update.event
+    except UpdateTypeLookupError:
+        return ("update", update.update_id)
+    user: User | None = getattr(event, "from_user", None)
+    if user is not None:
+        return user.id
+    chat = getattr(event, "chat", None)
+    if chat is not None:
+        return ("chat", chat.id)
+    return ("update", update.update_id)
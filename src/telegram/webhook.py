@@ -1,6 +1,9 @@
 """FastAPI webhook endpoint for Telegram updates.
 
 Pattern from tg-bot-fastapi-aiogram: feed_webhook_update().
+
+With telegram.fast_ack on, the update is only validated and queued here
+(see update_queue.py), so Telegram gets its 200 before any handler runs.
 """
 
 from __future__ import annotations
@@ -10,9 +13,14 @@ from aiogram.types import Update
 from fastapi import APIRouter, Header, HTTPException, Request
 
 from src.config import get_settings
+from src.monitoring.metrics import WEBHOOK_SECONDS
+from src.telegram.update_queue import REJECTED, UpdateQueue
 
 webhook_router = APIRouter()
 
+_INLINE = WEBHOOK_SECONDS.labels(mode="inline")
+_QUEUED = WEBHOOK_SECONDS.labels(mode="queued")
+
 
 @webhook_router.post(get_settings().telegram.webhook_path)
 async def telegram_webhook(
@@ -31,6 +39,16 @@ async def telegram_webhook(
     dp: Dispatcher = request.app.state.dp
 
     update = Update.model_validate(await request.json(), context={"bot": bot})
-    await dp.feed_webhook_update(bot, update)
+
+    updates: UpdateQueue | None = getattr(request.app.state, "updates", None)
+    if updates is None:
+        with _INLINE.time():
+            await dp.feed_webhook_update(bot, update)
+    else:
+        with _QUEUED.time():
+            accepted = updates.submit(update) != REJECTED
+        if not accepted:
+            # Not acknowledged: Telegram keeps the update and retries later
+            raise HTTPException(status_code=503, detail="Update queue full")
 
     return {"ok": True}
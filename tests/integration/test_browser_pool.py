@@ -0,0 +1,110 @@
+"""BrowserPool against local static pages; skipped where Chromium isn't installed."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import AsyncIterator, Iterator
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+import pytest
+from playwright.sync_api import sync_playwright
+
+from src.scrapers.utils.browser import BrowserPool
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _chromium_installed() -> bool:
+    try:
+        with sync_playwright() as playwright:
+            return Path(playwright.chromium.executable_path).exists()
+    except Exception:
+        return False
+
+
+pytestmark = pytest.mark.skipif(
+    not _chromium_installed(), reason="Chromium not installed (playwright install chromium)"
+)
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture(scope="module")
+def site() -> Iterator[str]:
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), partial(_QuietHandler, directory=str(FIXTURES))
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+async def pool() -> AsyncIterator[BrowserPool]:
+    pool = BrowserPool(
+        browsers=1,
+        contexts_per_browser=2,
+        pages_per_context=2,
+        queue_timeout=0.5,
+        block_resources=["image", "media", "font"],
+        block_hosts=["google-analytics.com"],
+    )
+    yield pool
+    await pool.close()
+
+
+async def test_contexts_are_reused_per_store(pool: BrowserPool, site: str) -> None:
+    html = await pool.render("ksp", f"{site}/store.html", wait_for=".product")
+    assert "AirPods Pro" in html
+    # Second page in the same context sees the cookie set by the first
+    html = await pool.render("ksp", f"{site}/store.html")
+    assert "branch=tlv" in html
+    await pool.render("ivory", f"{site}/store.html")
+
+    assert pool.stats.launched == 1
+    assert pool.stats.contexts_created == 2
+    assert pool.stats.pages == 3
+
+
+async def test_context_recycled_after_pages_per_context_keeps_cookies(
+    pool: BrowserPool, site: str
+) -> None:
+    for _ in range(2):
+        await pool.render("ksp", f"{site}/store.html")
+    assert pool.stats.contexts_recycled == 1
+
+    html = await pool.render("ksp", f"{site}/store.html")
+    assert pool.stats.contexts_created == 2
+    assert "branch=tlv" in html
+
+
+async def test_images_and_blocked_hosts_are_aborted(pool: BrowserPool, site: str) -> None:
+    await pool.render("ksp", f"{site}/store.html")
+
+    # logo.png (image) and analytics.js (blocked host)
+    assert pool.stats.blocked_requests == 2
+
+
+async def test_waiters_give_up_after_queue_timeout(site: str) -> None:
+    pool = BrowserPool(
+        browsers=1, contexts_per_browser=1, pages_per_context=10, queue_timeout=0.2
+    )
+    try:
+        async with pool.page("ksp"):
+            with pytest.raises(TimeoutError):
+                await pool.render("ivory", f"{site}/store.html")
+        assert pool.stats.queue_timeouts == 1
+        # The slot is free again once the first page is done
+        assert "AirPods Pro" in await asyncio.wait_for(
+            pool.render("ivory", f"{site}/store.html"), 10
+        )
+    finally:
+        await pool.close()
@@ -0,0 +1,61 @@
+"""BrowserPool startup failure handling, without a real Chromium."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from src.scrapers.utils import browser as browser_module
+from src.scrapers.utils.browser import BrowserPool
+
+
+class FakeBrowser:
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakePlaywright:
+    """Launches `working` browsers, then fails like a missing executable."""
+
+    def __init__(self, working: int) -> None:
+        self.launched: list[FakeBrowser] = []
+        self.stopped = False
+        self.chromium = SimpleNamespace(launch=self._launch)
+        self._working = working
+
+    async def _launch(self, **kwargs: Any) -> FakeBrowser:
+        if len(self.launched) == self._working:
+            raise RuntimeError("Executable doesn't exist")
+        self.launched.append(FakeBrowser())
+        return self.launched[-1]
+
+    async def start(self) -> FakePlaywright:
+        return self
+
+    async def stop(self) -> None:
+        self.stopped = True
+
+
+async def test_failed_launch_cleans_up_and_can_retry(monkeypatch: pytest.MonkeyPatch) -> None:
+    playwright = FakePlaywright(working=2)
+    monkeypatch.setattr(browser_module, "async_playwright", lambda: playwright)
+    pool = BrowserPool(browsers=3, contexts_per_browser=1, pages_per_context=1, queue_timeout=1)
+
+    with pytest.raises(RuntimeError):
+        async with pool.page("ksp"):
+            pass
+
+    assert [b.closed for b in playwright.launched] == [True, True]
+    assert playwright.stopped
+    # Nothing half-started is kept; the next render starts over
+    retry = FakePlaywright(working=3)
+    monkeypatch.setattr(browser_module, "async_playwright", lambda: retry)
+    await pool._start()
+    assert len(retry.launched) == 3
+    await pool.close()
+    assert retry.stopped
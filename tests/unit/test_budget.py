@@ -0,0 +1,167 @@
+"""BudgetGovernor: thresholds and alerts, concurrency slots, the daily roll, Redis sync."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+from langchain_core.messages import AIMessage
+
+from src.agents import budget
+from src.agents.budget import KEY_PREFIX, BudgetGovernor, BudgetLevel
+
+MODEL = "claude-haiku-4-5"  # $1 / $5 per 1M tokens
+
+
+def response(output_tokens: int, input_tokens: int = 0) -> AIMessage:
+    return AIMessage(
+        content="",
+        usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        },
+    )
+
+
+def dollars(amount: float) -> AIMessage:
+    return response(int(amount * 200_000))
+
+
+def governor(**kwargs: Any) -> BudgetGovernor:
+    options: dict[str, Any] = {
+        "daily_budget_usd": 1.0,
+        "warning_threshold": 0.8,
+        "block_threshold": 1.0,
+        "max_concurrency": 2,
+        "queue_timeout": 0.05,
+    } | kwargs
+    return BudgetGovernor(**options)
+
+
+@pytest.fixture
+def alerts(monkeypatch: pytest.MonkeyPatch) -> list[tuple[str, float, float]]:
+    sent: list[tuple[str, float, float]] = []
+
+    async def log_budget_alert(level: str, spent_usd: float, budget_usd: float) -> None:
+        sent.append((level, spent_usd, budget_usd))
+
+    monkeypatch.setattr(budget, "log_budget_alert", log_budget_alert)
+    return sent
+
+
+@pytest.fixture
+def today(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    day = ["2026-03-01"]
+    monkeypatch.setattr(budget, "_today", lambda: day[0])
+    return day
+
+
+async def test_record_prices_tokens_by_model(alerts: list[Any], today: list[str]) -> None:
+    llm = governor()
+    await llm.record(response(100_000, input_tokens=200_000), MODEL)
+    await llm.record(response(1_000_000), "unknown-model")  # priced as Sonnet
+
+    usage = llm.usage
+    assert (usage.calls, usage.input_tokens, usage.output_tokens) == (2, 200_000, 1_100_000)
+    assert usage.cost_usd == pytest.approx(0.2 + 0.5 + 15.0)
+
+
+async def test_thresholds_degrade_then_block_and_alert_once_each(
+    alerts: list[Any], today: list[str]
+) -> None:
+    llm = governor()
+    await llm.record(dollars(0.5), MODEL)
+    assert llm.level() is BudgetLevel.OK
+    assert await llm.allows(essential=False)
+    assert alerts == []
+
+    await llm.record(dollars(0.3), MODEL)
+    await llm.record(dollars(0.1), MODEL)
+    assert llm.level() is BudgetLevel.WARNING
+    # Past the warning threshold only essential turns get the LLM
+    assert await llm.allows(essential=True)
+    assert not await llm.allows(essential=False)
+
+    await llm.record(dollars(0.1), MODEL)
+    await llm.record(dollars(0.1), MODEL)
+    assert llm.level() is BudgetLevel.BLOCKED
+    assert not await llm.allows(essential=True)
+
+    assert [level for level, _, _ in alerts] == ["warning", "blocked"]
+    assert alerts[0][1:] == (pytest.approx(0.8), 1.0)
+
+
+async def test_new_day_starts_from_zero(alerts: list[Any], today: list[str]) -> None:
+    llm = governor()
+    await llm.record(dollars(1.0), MODEL)
+    assert llm.level() is BudgetLevel.BLOCKED
+
+    today[0] = "2026-03-02"
+    assert llm.level() is BudgetLevel.OK
+    assert llm.usage.day == "2026-03-02"
+    assert llm.usage.calls == 0
+
+    # Alerts re-arm with the new day
+    await llm.record(dollars(0.9), MODEL)
+    assert [level for level, _, _ in alerts] == ["blocked", "warning"]
+
+
+async def test_slot_caps_concurrency_and_gives_up_after_queue_timeout() -> None:
+    llm = governor(max_concurrency=1)
+    release = asyncio.Event()
+    got: list[bool] = []
+
+    async def hold() -> None:
+        async with llm.slot() as ok:
+            got.append(ok)
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    async with llm.slot() as ok:
+        assert not ok
+
+    release.set()
+    await holder
+    async with llm.slot() as ok:
+        assert ok
+    assert got == [True]
+
+
+async def test_workers_share_spend_through_redis(
+    monkeypatch: pytest.MonkeyPatch, alerts: list[Any], today: list[str]
+) -> None:
+    monkeypatch.setattr(budget, "SYNC_INTERVAL", 0.0)
+    redis = FakeAsyncRedis()
+    first, second = governor(redis=redis), governor(redis=redis)
+
+    await first.record(dollars(0.5), MODEL)
+    await second.record(dollars(0.35), MODEL)
+
+    # The writer sees the shared total right away; the other worker on its next sync
+    assert second.spent_usd == pytest.approx(0.85)
+    assert first.spent_usd == pytest.approx(0.5)
+    assert not await first.allows(essential=False)
+    assert first.spent_usd == pytest.approx(0.85)
+
+    stored = await redis.hgetall(f"{KEY_PREFIX}2026-03-01")
+    assert int(stored[b"calls"]) == 2
+    assert float(stored[b"cost_usd"]) == pytest.approx(0.85)
+    assert 0 < await redis.ttl(f"{KEY_PREFIX}2026-03-01") <= 2 * 86400
+
+
+async def test_redis_outage_falls_back_to_local_spend(
+    monkeypatch: pytest.MonkeyPatch, alerts: list[Any], today: list[str]
+) -> None:
+    monkeypatch.setattr(budget, "SYNC_INTERVAL", 0.0)
+    server = FakeServer()
+    server.connected = False
+    llm = governor(redis=FakeAsyncRedis(server=server))
+
+    await llm.record(dollars(0.5), MODEL)
+
+    assert await llm.allows(essential=False)
+    assert llm.spent_usd == pytest.approx(0.5)
@@ -0,0 +1,125 @@
+"""DiscordSink over httpx.MockTransport: batching, 429 handling, sampling and drops."""
+
+from __future__ import annotations
+
+import json
+
+import httpx
+import pytest
+
+from src.monitoring.discord_logger import DiscordSink, _retry_after
+
+URL = "https://discord.com/api/webhooks/1/token"
+
+
+class Webhook:
+    """Records posted batches; replies with the queued statuses, then 204."""
+
+    def __init__(self, *responses: httpx.Response) -> None:
+        self.batches: list[list[dict]] = []
+        self._responses = list(responses)
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.batches.append(json.loads(request.content)["embeds"])
+        return self._responses.pop(0) if self._responses else httpx.Response(204)
+
+
+def sink(webhook: Webhook, **kwargs: float) -> DiscordSink:
+    options: dict[str, float] = {
+        "max_queue": 100,
+        "batch_size": 10,
+        "flush_interval": 0.01,
+        "high_watermark": 0.8,
+        "sample_every": 5,
+    } | kwargs
+    client = httpx.AsyncClient(transport=httpx.MockTransport(webhook))
+    return DiscordSink(URL, client=client, **options)  # type: ignore[arg-type]
+
+
+def embed(i: int) -> dict:
+    return {"title": f"event {i}"}
+
+
+async def test_embeds_are_batched_up_to_discords_limit() -> None:
+    webhook = Webhook()
+    discord = sink(webhook, batch_size=25)
+
+    for i in range(23):
+        discord.emit(embed(i))
+    await discord.aclose()
+
+    assert [len(batch) for batch in webhook.batches] == [10, 10, 3]
+    assert [e["title"] for batch in webhook.batches for e in batch][-1] == "event 22"
+    assert (discord.stats.sent, discord.stats.batches) == (23, 3)
+
+
+async def test_429_waits_retry_after_and_resends_the_batch() -> None:
+    webhook = Webhook(httpx.Response(429, json={"retry_after": 0.01}))
+    discord = sink(webhook)
+
+    discord.emit(embed(1))
+    discord.emit(embed(2))
+    await discord.aclose()
+
+    assert len(webhook.batches) == 2
+    assert webhook.batches[0] == webhook.batches[1]
+    assert (discord.stats.rate_limited, discord.stats.sent, discord.stats.failed) == (1, 2, 0)
+
+
+async def test_batch_fails_after_max_retries() -> None:
+    limited = [httpx.Response(429, json={"retry_after": 0}) for _ in range(10)]
+    webhook = Webhook(*limited)
+    discord = sink(webhook)
+    discord._max_retries = 2
+
+    discord.emit(embed(1))
+    await discord.aclose()
+
+    assert len(webhook.batches) == 3
+    assert (discord.stats.sent, discord.stats.failed) == (0, 1)
+
+
+@pytest.mark.parametrize(
+    ("response", "seconds"),
+    [
+        (httpx.Response(429, json={"retry_after": 2.5}), 2.5),
+        (httpx.Response(429, headers={"Retry-After": "3"}), 3.0),
+        (httpx.Response(429, headers={"Retry-After": "Wed, 21 Oct 2026 07:28:00 GMT"}), 1.0),
+        (httpx.Response(429, json={"retry_after": "soon"}, headers={"Retry-After": "x"}), 1.0),
+        (httpx.Response(429, json={"retry_after": "inf"}), 1.0),
+        (httpx.Response(429, text="<html>rate limited</html>"), 1.0),
+    ],
+)
+def test_retry_after_falls_back_to_one_second(response: httpx.Response, seconds: float) -> None:
+    assert _retry_after(response) == seconds
+
+
+async def test_routine_embeds_are_sampled_past_the_high_watermark() -> None:
+    webhook = Webhook()
+    discord = sink(webhook, max_queue=10, high_watermark=0.5, sample_every=3)
+
+    for i in range(5):
+        discord.emit(embed(i))
+    # Past the watermark: one routine embed in 3 is kept, every important one
+    for i in range(6):
+        discord.emit(embed(i))
+    discord.emit(embed(100), important=True)
+    assert (len(discord._buffer), discord.stats.sampled_out) == (8, 4)
+
+    # Full: everything is dropped, important or not
+    discord.emit(embed(101), important=True)
+    discord.emit(embed(102), important=True)
+    discord.emit(embed(103), important=True)
+    assert (len(discord._buffer), discord.stats.dropped) == (10, 1)
+
+    await discord.aclose()
+    assert discord.stats.sent == 10
+
+
+async def test_embeds_after_close_are_dropped() -> None:
+    discord = sink(Webhook())
+    await discord.aclose()
+
+    discord.emit(embed(1))
+
+    assert discord.stats.dropped == 1
@@ -0,0 +1,188 @@
+"""GeocodeCache write-behind, DistanceProvider negative caching, geocoder failures."""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import googlemaps
+import numpy as np
+import pytest
+
+from src.cache import lru
+from src.logistics.distance import DistanceMatrix, DistanceProvider, GeocodeCache
+from src.logistics.geocoding import (
+    GeocodingBackend,
+    GeocodingError,
+    GoogleMapsGeocoder,
+    LatLon,
+    StubGeocoder,
+)
+
+HERZLIYA = (32.1663, 34.8436)
+
+
+def rows(path: Path) -> dict[str, float]:
+    with sqlite3.connect(path) as db:
+        return dict(db.execute("SELECT address, last_used FROM geocode"))
+
+
+async def test_writes_are_batched_off_the_loop(tmp_path: Path) -> None:
+    cache = GeocodeCache(tmp_path / "geo.sqlite3", max_entries=100)
+    for i in range(10):
+        cache.set(f"Address {i}", HERZLIYA)
+    # Queued, not yet committed
+    assert rows(tmp_path / "geo.sqlite3") == {}
+    assert cache.get("address 3") == HERZLIYA
+
+    await cache.flush()
+    assert len(rows(tmp_path / "geo.sqlite3")) == 10
+    await cache.aclose()
+
+
+async def test_reads_survive_a_restart_and_touch_last_used(tmp_path: Path) -> None:
+    path = tmp_path / "geo.sqlite3"
+    cache = GeocodeCache(path, max_entries=100)
+    cache.set("Herzliya Pituach", HERZLIYA)
+    await cache.aclose()
+    written = rows(path)["herzliya pituach"]
+
+    cache = GeocodeCache(path, max_entries=100)
+    assert cache.get("herzliya  pituach") == HERZLIYA
+    await cache.aclose()
+    assert rows(path)["herzliya pituach"] > written
+
+
+async def test_prunes_least_recently_used_past_capacity(tmp_path: Path) -> None:
+    path = tmp_path / "geo.sqlite3"
+    cache = GeocodeCache(path, max_entries=3)
+    for i in range(5):
+        cache.set(f"address {i}", HERZLIYA)
+        await cache.flush()
+
+    assert sorted(rows(path)) == ["address 2", "address 3", "address 4"]
+    await cache.aclose()
+
+
+def make_provider(tmp_path: Path, geocoder: GeocodingBackend) -> DistanceProvider:
+    return DistanceProvider(
+        DistanceMatrix.build(road_factor=1.25),
+        geocoder,
+        GeocodeCache(tmp_path / "geo.sqlite3", max_entries=100, negative_ttl=3600),
+        road_factor=1.25,
+        fallback_location="מרכז",
+        retry_ttl=60,
+    )
+
+
+async def drain(provider: DistanceProvider) -> None:
+    await asyncio.gather(*provider._pending.values())
+
+
+async def test_unknown_address_geocoded_in_background(tmp_path: Path) -> None:
+    geocoder = StubGeocoder({"רחוב הנשיא 5": HERZLIYA})
+    provider = make_provider(tmp_path, geocoder)
+
+    fallback = provider.distances("רחוב הנשיא 5", ["Bug"])
+    await drain(provider)
+    exact = provider.distances("רחוב הנשיא 5", ["Bug"])
+
+    assert geocoder.calls == 1
+    assert not np.array_equal(fallback, exact)
+    await provider.aclose()
+
+
+async def test_unresolvable_address_is_not_retried(tmp_path: Path) -> None:
+    geocoder = StubGeocoder()
+    provider = make_provider(tmp_path, geocoder)
+
+    for _ in range(3):
+        provider.distances("כתובת שלא קיימת", ["Bug"])
+        await drain(provider)
+
+    assert geocoder.calls == 1
+    await provider.aclose()
+
+
+class FlakyGeocoder(GeocodingBackend):
+    """Fails with GeocodingError `failures` times, then resolves every address."""
+
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.calls = 0
+
+    async def geocode(self, address: str) -> LatLon | None:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise GeocodingError("503 Service Unavailable")
+        return HERZLIYA
+
+
+async def test_transient_failure_is_retried_after_retry_ttl(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    now = [1_000_000.0]
+    monkeypatch.setattr(lru, "time", SimpleNamespace(time=lambda: now[0]))
+    geocoder = FlakyGeocoder(failures=1)
+    provider = make_provider(tmp_path, geocoder)
+
+    provider.distances("רחוב הנשיא 5", ["Bug"])
+    await drain(provider)
+    # Within retry_ttl: still on the fallback, no new call
+    now[0] += 30
+    provider.distances("רחוב הנשיא 5", ["Bug"])
+    await drain(provider)
+    assert geocoder.calls == 1
+
+    # Long before negative_ttl, the address gets another chance
+    now[0] += 31
+    provider.distances("רחוב הנשיא 5", ["Bug"])
+    await drain(provider)
+    assert geocoder.calls == 2
+    assert provider._cache.get("רחוב הנשיא 5") == HERZLIYA
+    await provider.aclose()
+
+
+class GoogleClient:
+    """googlemaps.Client stand-in: raises or returns the given outcome."""
+
+    def __init__(self, outcome: Any) -> None:
+        self.outcome = outcome
+
+    def geocode(self, address: str, **kwargs: Any) -> Any:
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+
+def google(outcome: Any) -> GoogleMapsGeocoder:
+    geocoder = GoogleMapsGeocoder("AIza-test-key")
+    geocoder._client = GoogleClient(outcome)  # type: ignore[assignment]
+    return geocoder
+
+
+async def test_google_resolves_and_reports_no_match() -> None:
+    location = {"geometry": {"location": {"lat": HERZLIYA[0], "lng": HERZLIYA[1]}}}
+
+    assert await google([location]).geocode("הרצליה") == HERZLIYA
+    assert await google([]).geocode("כתובת שלא קיימת") is None
+    invalid = googlemaps.exceptions.ApiError("INVALID_REQUEST")
+    assert await google(invalid).geocode("") is None
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        googlemaps.exceptions.Timeout(),
+        googlemaps.exceptions.HTTPError(503),
+        googlemaps.exceptions.TransportError(ConnectionError("reset")),
+        googlemaps.exceptions.ApiError("OVER_QUERY_LIMIT"),
+        googlemaps.exceptions.ApiError("UNKNOWN_ERROR"),
+    ],
+)
+async def test_google_service_failures_are_transient(error: Exception) -> None:
+    with pytest.raises(GeocodingError):
+        await google(error).geocode("רחוב הנשיא 5")
@@ -0,0 +1,205 @@
+"""SearchEngine: deadline and partial results, concurrency caps, stream() close, on_offers."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.scrapers.engine import (
+    STATUS_ERROR,
+    STATUS_OK,
+    STATUS_TIMEOUT,
+    SearchEngine,
+    StoreAdapter,
+)
+from src.scrapers.spiders.fixture import FIXTURE_STORES, build_fixture_adapters
+
+SLOW = ("Amazon IL", "Home Center")
+
+
+class Store(StoreAdapter):
+    def __init__(self, name: str, price: float, delay: float = 0.0, fail: bool = False) -> None:
+        self.name = name
+        self._price = price
+        self._delay = delay
+        self._fail = fail
+
+    async def search(self, query: str) -> list[dict]:
+        await asyncio.sleep(self._delay)
+        if self._fail:
+            raise RuntimeError("store down")
+        return [
+            {
+                "id": f"{self.name}-1",
+                "name": query,
+                "source": self.name,
+                "price": self._price,
+                "url": f"https://{self.name}/1",
+                "distance_km": 10.0,
+                "size": "S",
+            }
+        ]
+
+
+def engine(*stores: Store, recorded: list[list[dict]]) -> SearchEngine:
+    return SearchEngine(
+        stores,
+        global_concurrency=8,
+        per_store_concurrency=2,
+        store_timeout=1.0,
+        deadline=0.2,
+        on_offers=recorded.append,
+    )
+
+
+async def test_fresh_offers_are_recorded_per_store() -> None:
+    recorded: list[list[dict]] = []
+    search = engine(
+        Store("ksp", 899),
+        Store("ivory", 949),
+        Store("bug", 0, fail=True),
+        Store("slow", 799, delay=1.0),
+        recorded=recorded,
+    )
+
+    result = await search.search("airpods pro")
+
+    assert sorted(offers[0]["source"] for offers in recorded) == ["ivory", "ksp"]
+    assert result.failed == ["bug"]
+    assert result.timed_out == ["slow"]
+    assert {r.store: r.status for r in result.stores}["bug"] == STATUS_ERROR
+    assert {r.store: r.status for r in result.stores}["slow"] == STATUS_TIMEOUT
+
+
+async def test_single_store_refresh_is_recorded() -> None:
+    recorded: list[list[dict]] = []
+    search = engine(Store("ksp", 899), Store("ivory", 949), recorded=recorded)
+
+    await search.search_store("ksp", "airpods pro")
+
+    assert [offers[0]["source"] for offers in recorded] == ["ksp"]
+    # Priced before they are handed over
+    assert "total_cost" in recorded[0][0]
+
+
+def fixture_engine(**kwargs: Any) -> SearchEngine:
+    """Fixture stores answering in ~10ms, except SLOW which take seconds."""
+    latencies = {name: 5.0 if name in SLOW else 0.01 for name, _, _ in FIXTURE_STORES}
+    options: dict[str, Any] = {
+        "global_concurrency": 32,
+        "per_store_concurrency": 2,
+        "store_timeout": 10.0,
+        "deadline": 0.3,
+    } | kwargs
+    return SearchEngine(build_fixture_adapters(latency_overrides=latencies), **options)
+
+
+async def test_deadline_returns_what_arrived_and_reports_the_rest() -> None:
+    search = fixture_engine()
+
+    result = await search.search("אוזניות sony")
+
+    assert sorted(result.timed_out) == sorted(SLOW)
+    answered = {r.store for r in result.stores if r.status == STATUS_OK}
+    assert answered == {name for name, _, _ in FIXTURE_STORES} - set(SLOW)
+    assert result.offers
+    assert all(offer["source"] in answered for offer in result.offers)
+    assert all("total_cost" in offer for offer in result.offers)
+    assert 0.3 <= result.elapsed < 1.0
+
+
+async def test_store_timeout_applies_inside_the_deadline() -> None:
+    search = fixture_engine(store_timeout=0.05, deadline=5.0)
+
+    result = await search.search("dyson")
+
+    assert sorted(result.timed_out) == sorted(SLOW)
+    assert result.elapsed < 1.0
+
+
+@dataclass
+class Tracker:
+    """Peak in-flight adapter calls, globally and per store, and cancelled calls."""
+
+    in_flight: int = 0
+    peak: int = 0
+    running: Counter[str] = field(default_factory=Counter)
+    store_peaks: Counter[str] = field(default_factory=Counter)
+    cancelled: list[str] = field(default_factory=list)
+
+
+class Tracked(StoreAdapter):
+    def __init__(self, adapter: StoreAdapter, tracker: Tracker) -> None:
+        self.name = adapter.name
+        self._adapter = adapter
+        self._tracker = tracker
+
+    async def search(self, query: str) -> list[dict[str, Any]]:
+        t = self._tracker
+        t.in_flight += 1
+        t.peak = max(t.peak, t.in_flight)
+        t.running[self.name] += 1
+        t.store_peaks[self.name] = max(t.store_peaks[self.name], t.running[self.name])
+        try:
+            return await self._adapter.search(query)
+        except asyncio.CancelledError:
+            t.cancelled.append(self.name)
+            raise
+        finally:
+            t.in_flight -= 1
+            t.running[self.name] -= 1
+
+
+def tracked_engine(
+    tracker: Tracker, latencies: dict[str, float], **kwargs: Any
+) -> SearchEngine:
+    adapters = build_fixture_adapters(latency_overrides=latencies)
+    options: dict[str, Any] = {
+        "global_concurrency": 32,
+        "per_store_concurrency": 2,
+        "store_timeout": 10.0,
+        "deadline": 10.0,
+    } | kwargs
+    return SearchEngine([Tracked(adapter, tracker) for adapter in adapters], **options)
+
+
+FAST = {name: 0.02 for name, _, _ in FIXTURE_STORES}
+
+
+async def test_concurrency_never_exceeds_the_caps() -> None:
+    tracker = Tracker()
+    search = tracked_engine(tracker, FAST, global_concurrency=4, per_store_concurrency=2)
+
+    results = await asyncio.gather(*(search.search("airpods") for _ in range(5)))
+
+    assert all(not r.timed_out for r in results)
+    assert tracker.peak == 4
+    assert max(tracker.store_peaks.values()) <= 2
+
+
+async def test_per_store_cap_queues_one_stores_calls() -> None:
+    tracker = Tracker()
+    search = tracked_engine(tracker, FAST, per_store_concurrency=1)
+
+    await asyncio.gather(*(search.search_store("KSP", "airpods") for _ in range(4)))
+
+    assert tracker.store_peaks["KSP"] == 1
+
+
+async def test_closing_the_stream_early_cancels_the_remaining_stores() -> None:
+    tracker = Tracker()
+    latencies = {name: 0.01 if name == "Bug" else 5.0 for name, _, _ in FIXTURE_STORES}
+    search = tracked_engine(tracker, latencies)
+
+    stream = search.stream("airpods")
+    first = await anext(stream)
+    await stream.aclose()
+    await asyncio.sleep(0.05)
+
+    assert first.store == "Bug"
+    assert tracker.in_flight == 0
+    assert sorted(tracker.cancelled) == sorted(
+        name for name, _, _ in FIXTURE_STORES if name != "Bug"
+    )
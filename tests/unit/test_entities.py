@@ -0,0 +1,95 @@
+"""KeywordAutomaton and extract_entities: whole words, Hebrew prefixes, finals, plurals."""
+
+from __future__ import annotations
+
+import pytest
+
+from src.agents.entities import (
+    BRAND,
+    CATEGORY,
+    CITY,
+    KeywordAutomaton,
+    Match,
+    extract_entities,
+)
+
+
+def found(text: str, kind: str) -> list[str]:
+    return [m.keyword for m in extract_entities(text).matches if m.kind == kind]
+
+
+def test_longest_keyword_wins_then_leftmost() -> None:
+    entities = extract_entities("apple airpods או iphone")
+
+    assert found("apple airpods או iphone", BRAND) == ["apple", "airpods", "iphone"]
+    assert entities.brand == "airpods"
+    assert extract_entities("sony או dell").brand == "sony"
+    assert extract_entities("jbl או lg").brand == "jbl"
+
+
+def test_overlapping_keywords_all_reported_with_spans() -> None:
+    automaton = KeywordAutomaton({"a": ["he", "she", "hers"], "b": ["his"]})
+
+    # Only whole words count: "she" is the word here, not "he" or "hers" inside it
+    assert automaton.scan("she said") == [Match("a", "she", 0, 3)]
+    assert automaton.scan("hers his") == [Match("a", "hers", 0, 4), Match("b", "his", 5, 8)]
+
+
+@pytest.mark.parametrize("prefix", ["ו", "ה", "ב", "ל", "מ", "ש"])
+def test_single_prefix_letter(prefix: str) -> None:
+    assert found(f"מחפש {prefix}חיפה", CITY) == ["חיפה"]
+
+
+@pytest.mark.parametrize("stack", ["וב", "ושב", "ומה", "שמה", "ולה"])
+def test_prefix_stacks_up_to_three(stack: str) -> None:
+    assert found(f"משהו {stack}תל אביב", CITY) == ["תל אביב"]
+
+
+def test_four_prefix_letters_or_other_letters_do_not_match() -> None:
+    assert found("ושמבתל אביב", CITY) == []
+    assert found("גתל אביב", CITY) == []
+
+
+def test_final_letters_fold_in_both_keyword_and_text() -> None:
+    # "מסך" ends in a final kaf; in the plural it is a regular kaf mid-word
+    assert found("מסכים זולים", CATEGORY) == ["מסך"]
+    assert found("שני מסך", CATEGORY) == ["מסך"]
+    # A final letter typed mid-word still folds to the same form
+    assert found("מסךים", CATEGORY) == ["מסך"]
+
+
+@pytest.mark.parametrize(
+    ("text", "keyword"),
+    [("טלפונים", "טלפון"), ("מקררים", "מקרר"), ("לפטופים", "לפטופ"), ("בקורקינטים", "קורקינט")],
+)
+def test_category_plurals(text: str, keyword: str) -> None:
+    assert found(text, CATEGORY) == [keyword]
+
+
+def test_plural_suffix_only_for_categories() -> None:
+    assert found("סמסונגים", BRAND) == []
+    assert found("בחיפהות", CITY) == []
+
+
+@pytest.mark.parametrize(
+    "text", ["דלת חדשה", "algorithm", "php", "הלוואה", "sonya", "mpoco", "ערדל"]
+)
+def test_no_matches_inside_words(text: str) -> None:
+    assert extract_entities(text).matches == ()
+
+
+def test_digits_are_a_word_boundary() -> None:
+    entities = extract_entities("iphone15")
+
+    assert entities.brand == "iphone"
+    assert entities.is_specific_product
+    assert extract_entities("עד 3,500 לאייפון").budget == "3500"
+
+
+def test_entities_flags() -> None:
+    entities = extract_entities("אוזניות sony ultra בחיפה")
+
+    assert entities.is_generic_product
+    assert entities.is_specific_product
+    assert entities.location == "חיפה"
+    assert not extract_entities("שלום").is_generic_product
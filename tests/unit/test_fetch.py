@@ -0,0 +1,155 @@
+"""StoreFetcher over httpx.MockTransport: AIMD limits, circuit breaker, conditional GETs."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+import httpx
+import pytest
+
+from src.scrapers.utils.fetch import BlockedError, CircuitOpenError, StoreFetcher
+
+URL = "https://www.ksp.co.il/search?q=airpods"
+Handler = Callable[[httpx.Request], Awaitable[httpx.Response]]
+
+
+def fetcher(handler: Handler, **kwargs: float) -> StoreFetcher:
+    options: dict[str, float] = {
+        "initial_concurrency": 4,
+        "min_concurrency": 1,
+        "max_concurrency": 16,
+        # Mock latencies are noise; keep the latency backoff out of the way
+        "latency_factor": 1e9,
+        "failure_threshold": 3,
+        "open_seconds": 30.0,
+    } | kwargs
+    return StoreFetcher(http2=False, transport=httpx.MockTransport(handler), **options)  # type: ignore[arg-type]
+
+
+async def ok(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, text="<html></html>")
+
+
+async def test_limit_grows_by_one_per_window_of_successes() -> None:
+    store = fetcher(ok)
+
+    for _ in range(5):
+        await store.get(URL)
+
+    # 4 + 1/4 + 1/4.25 + ... crosses 5 on the fifth success
+    assert store.limit("ksp.co.il") == 5
+
+
+async def test_429_halves_the_limit_and_is_raised() -> None:
+    status = 200
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(status)
+
+    store = fetcher(handler, initial_concurrency=8)
+    await store.get(URL)
+    status = 429
+
+    with pytest.raises(BlockedError) as raised:
+        await store.get(URL)
+
+    assert raised.value.status_code == 429
+    assert store.limit("ksp.co.il") == 4
+    assert store.stats()["ksp.co.il"].blocked == 1
+
+
+async def test_in_flight_requests_stay_under_the_limit() -> None:
+    in_flight = peak = 0
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await release.wait()
+        in_flight -= 1
+        return httpx.Response(200)
+
+    store = fetcher(handler, initial_concurrency=2)
+    requests = [asyncio.create_task(store.get(URL)) for _ in range(6)]
+    await asyncio.sleep(0.05)
+    assert peak == 2
+    release.set()
+    await asyncio.gather(*requests)
+    assert peak == 2
+
+
+async def test_breaker_opens_after_threshold_and_lets_one_probe_through() -> None:
+    status = 500
+    calls = 0
+    probe_started = asyncio.Event()
+    release_probe = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if status == 200:
+            probe_started.set()
+            await release_probe.wait()
+        return httpx.Response(status)
+
+    store = fetcher(handler, failure_threshold=3, open_seconds=0.05)
+    for _ in range(3):
+        assert (await store.get(URL)).status_code == 500
+    assert store.degraded(URL)
+
+    # Open: no request reaches the store
+    with pytest.raises(CircuitOpenError):
+        await store.get(URL)
+    assert calls == 3
+    assert store.stats()["ksp.co.il"].skipped == 1
+
+    # After open_seconds, exactly one probe goes out; the others are still refused
+    await asyncio.sleep(0.06)
+    status = 200
+    probe = asyncio.create_task(store.get(URL))
+    await probe_started.wait()
+    for _ in range(3):
+        with pytest.raises(CircuitOpenError):
+            await store.get(URL)
+    assert calls == 4
+
+    release_probe.set()
+    assert (await probe).status_code == 200
+    assert not store.degraded(URL)
+    await store.get(URL)
+    assert calls == 5
+
+
+async def test_failed_probe_reopens_the_breaker() -> None:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503)
+
+    store = fetcher(handler, failure_threshold=2, open_seconds=0.05)
+    for _ in range(2):
+        await store.get(URL)
+    await asyncio.sleep(0.06)
+
+    assert (await store.get(URL)).status_code == 503
+    with pytest.raises(CircuitOpenError):
+        await store.get(URL)
+
+
+async def test_304_returns_the_cached_200() -> None:
+    seen: list[str | None] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="<ul>offers</ul>", headers={"ETag": '"v1"'})
+
+    store = fetcher(handler)
+    first = await store.get(URL)
+    second = await store.get(URL)
+
+    assert seen == [None, '"v1"']
+    assert second.status_code == 200
+    assert second.text == first.text == "<ul>offers</ul>"
+    assert store.stats()["ksp.co.il"].not_modified == 1
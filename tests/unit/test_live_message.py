@@ -0,0 +1,149 @@
+"""LiveMessage: edit throttling, skipped no-op edits, and the final edit's single retry."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.methods import EditMessageText
+
+from src.telegram import live_message
+from src.telegram.live_message import LiveMessage
+
+METHOD = EditMessageText(text="", chat_id=1, message_id=1)
+
+
+@dataclass
+class FakeMessage:
+    """Message stand-in; each queued error is raised by one edit_text call."""
+
+    text: str = "מחפש..."
+    edits: list[str] = field(default_factory=list)
+    errors: list[Exception] = field(default_factory=list)
+
+    async def edit_text(self, text: str, reply_markup: Any = None) -> None:
+        if self.errors:
+            raise self.errors.pop(0)
+        self.edits.append(text)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(live_message, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def sleeps(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    slept: list[float] = []
+
+    async def sleep(seconds: float) -> None:
+        slept.append(seconds)
+
+    monkeypatch.setattr(live_message, "asyncio", SimpleNamespace(sleep=sleep))
+    return slept
+
+
+def retry_after(seconds: int) -> TelegramRetryAfter:
+    return TelegramRetryAfter(METHOD, "Too Many Requests", retry_after=seconds)
+
+
+async def test_updates_are_throttled_to_one_edit_per_interval(clock: Clock) -> None:
+    message = FakeMessage()
+    live = LiveMessage(message, interval=1.0, just_sent=True)  # type: ignore[arg-type]
+
+    # Just sent: the first edit waits out the interval too
+    assert not await live.update("1 result")
+    clock.now += 1.0
+    assert await live.update("1 result")
+    clock.now += 0.5
+    assert not await live.update("2 results")
+    clock.now += 0.5
+    assert await live.update("3 results")
+
+    assert message.edits == ["1 result", "3 results"]
+
+
+async def test_placeholder_is_replaced_right_away(clock: Clock) -> None:
+    message = FakeMessage()
+    live = LiveMessage(message, interval=1.0)  # type: ignore[arg-type]
+
+    assert await live.update("1 result")
+    assert message.edits == ["1 result"]
+
+
+async def test_identical_text_is_never_sent(clock: Clock) -> None:
+    message = FakeMessage(text="same")
+    live = LiveMessage(message)  # type: ignore[arg-type]
+
+    assert not await live.update("same")
+    await live.finish("same")
+    assert message.edits == []
+
+    # A keyboard is new content even with the same text
+    await live.finish("same", reply_markup=object())  # type: ignore[arg-type]
+    assert message.edits == ["same"]
+
+
+async def test_retry_after_blocks_updates_until_it_passes(clock: Clock) -> None:
+    message = FakeMessage(errors=[retry_after(5)])
+    live = LiveMessage(message, interval=1.0)  # type: ignore[arg-type]
+
+    assert not await live.update("1 result")
+    clock.now += 4.0
+    assert not await live.update("2 results")
+    clock.now += 1.0
+    assert await live.update("2 results")
+    assert message.edits == ["2 results"]
+
+
+async def test_finish_ignores_the_throttle(clock: Clock) -> None:
+    message = FakeMessage()
+    live = LiveMessage(message, interval=10.0, just_sent=True)  # type: ignore[arg-type]
+
+    assert not await live.update("partial")
+    await live.finish("final")
+    assert message.edits == ["final"]
+
+
+async def test_finish_retries_once_after_retry_after(clock: Clock, sleeps: list[float]) -> None:
+    message = FakeMessage(errors=[retry_after(3)])
+    live = LiveMessage(message)  # type: ignore[arg-type]
+
+    await live.finish("final")
+
+    assert sleeps == [3]
+    assert message.edits == ["final"]
+
+
+async def test_finish_gives_up_on_a_second_retry_after(clock: Clock, sleeps: list[float]) -> None:
+    message = FakeMessage(errors=[retry_after(3), retry_after(7)])
+    live = LiveMessage(message)  # type: ignore[arg-type]
+
+    await live.finish("final")
+
+    assert sleeps == [3]
+    assert message.edits == []
+    # Later updates respect the second wait
+    clock.now += 6.0
+    assert not await live.update("again")
+
+
+async def test_bad_request_is_swallowed(clock: Clock) -> None:
+    message = FakeMessage(errors=[TelegramBadRequest(METHOD, "message is not modified")])
+    live = LiveMessage(message)  # type: ignore[arg-type]
+
+    assert not await live.update("1 result")
+    assert await live.update("1 result")
@@ -0,0 +1,143 @@
+"""Outbox pacing and flood-wait retries, and the results keyboard layout."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from src.telegram.keyboards import build_results_keyboard
+from src.telegram.outbox import Outbox
+
+INTERVAL = 0.05
+
+
+def retry_after(seconds: int = 0) -> TelegramRetryAfter:
+    return TelegramRetryAfter(SendMessage(chat_id=1, text=""), "Too Many Requests", seconds)
+
+
+class Recorder:
+    """Builds send callables that log (label, send time)."""
+
+    def __init__(self) -> None:
+        self.sent: list[tuple[str, float]] = []
+
+    def send(self, label: str, failures: int = 0) -> Any:
+        attempts = 0
+
+        async def call() -> str:
+            nonlocal attempts
+            attempts += 1
+            if attempts <= failures:
+                raise retry_after()
+            self.sent.append((label, time.monotonic()))
+            return label
+
+        return call
+
+    def labels(self) -> list[str]:
+        return [label for label, _ in self.sent]
+
+
+async def test_chat_sends_are_fifo_and_paced() -> None:
+    outbox, recorder = Outbox(min_interval=INTERVAL), Recorder()
+
+    results = await asyncio.gather(*(outbox.submit(1, recorder.send(str(i))) for i in range(4)))
+
+    assert results == ["0", "1", "2", "3"]
+    assert recorder.labels() == ["0", "1", "2", "3"]
+    times = [at for _, at in recorder.sent]
+    assert all(b - a >= INTERVAL * 0.95 for a, b in zip(times, times[1:]))
+    assert outbox.stats.sent == 4
+
+
+async def test_chats_do_not_wait_for_each_other() -> None:
+    outbox, recorder = Outbox(min_interval=1.0), Recorder()
+
+    started = time.monotonic()
+    await asyncio.gather(*(outbox.submit(chat, recorder.send(str(chat))) for chat in range(5)))
+
+    assert sorted(recorder.labels()) == ["0", "1", "2", "3", "4"]
+    assert time.monotonic() - started < 0.5
+
+
+async def test_back_to_back_callers_stay_paced() -> None:
+    outbox, recorder = Outbox(min_interval=INTERVAL), Recorder()
+
+    await outbox.submit(1, recorder.send("first"))
+    await outbox.submit(1, recorder.send("second"))
+
+    (_, first), (_, second) = recorder.sent
+    assert second - first >= INTERVAL * 0.95
+
+
+async def test_idle_worker_exits() -> None:
+    outbox, recorder = Outbox(min_interval=INTERVAL), Recorder()
+    await outbox.submit(1, recorder.send("only"))
+
+    await asyncio.sleep(INTERVAL * 2)
+    assert outbox._workers == {}
+    assert outbox._queues == {}
+
+
+async def test_retry_after_is_retried_in_order() -> None:
+    outbox, recorder = Outbox(min_interval=0.0), Recorder()
+
+    await asyncio.gather(
+        outbox.submit(1, recorder.send("flooded", failures=2)),
+        outbox.submit(1, recorder.send("next")),
+    )
+
+    # The whole chat waits: "next" is not sent ahead of the retried message
+    assert recorder.labels() == ["flooded", "next"]
+    assert outbox.stats.retried == 2
+
+
+async def test_gives_up_after_three_retries() -> None:
+    outbox, recorder = Outbox(min_interval=0.0), Recorder()
+
+    with pytest.raises(TelegramRetryAfter):
+        await outbox.submit(1, recorder.send("hopeless", failures=4))
+    assert await outbox.submit(1, recorder.send("fine", failures=3)) == "fine"
+
+    assert (outbox.stats.retried, outbox.stats.failed, outbox.stats.sent) == (6, 1, 1)
+
+
+async def test_other_errors_reach_the_caller_and_the_queue_goes_on() -> None:
+    outbox, recorder = Outbox(min_interval=0.0), Recorder()
+
+    async def broken() -> None:
+        raise RuntimeError("boom")
+
+    failed, sent = await asyncio.gather(
+        outbox.submit(1, broken), outbox.submit(1, recorder.send("after")), return_exceptions=True
+    )
+
+    assert isinstance(failed, RuntimeError)
+    assert sent == "after"
+
+
+def test_results_keyboard_has_one_numbered_row_per_product() -> None:
+    keyboard = build_results_keyboard(
+        [{"id": 11, "url": "https://ksp.co.il/1"}, {"id": 22, "url": "https://ivory.co.il/2"}]
+    )
+
+    rows = keyboard.inline_keyboard
+    assert len(rows) == 2
+    assert [len(row) for row in rows] == [2, 2]
+    assert [(b.text, b.url) for b in (rows[0][0], rows[1][0])] == [
+        ("1. קנייה ישירה", "https://ksp.co.il/1"),
+        ("2. קנייה ישירה", "https://ivory.co.il/2"),
+    ]
+    assert [(b.text, b.callback_data) for b in (rows[0][1], rows[1][1])] == [
+        ("1. הזמן שיליחויות", "deliver_11"),
+        ("2. הזמן שיליחויות", "deliver_22"),
+    ]
+
+
+def test_results_keyboard_for_no_products_is_empty() -> None:
+    assert build_results_keyboard([]).inline_keyboard == []
@@ -0,0 +1,84 @@
+"""ResponsePolicy: when a turn needs the LLM and when a template will do."""
+
+from __future__ import annotations
+
+import pytest
+
+from src.agents.entities import extract_entities
+from src.agents.policy import (
+    AUTO,
+    LLM,
+    MAX_SLOT_WORDS,
+    TEMPLATE,
+    ResponsePolicy,
+    create_response_policy,
+)
+from src.agents.session import ConvState
+from src.config import get_settings
+
+STATE = ConvState.ASKING_BRAND
+
+
+def needs_llm(text: str, filled: bool, policy: ResponsePolicy | None = None) -> bool:
+    return (policy or ResponsePolicy()).needs_llm(STATE, extract_entities(text), filled)
+
+
+@pytest.mark.parametrize("text", ["סמסונג", "עד 2000", "בחיפה", "אוזניות sony"])
+def test_filled_slot_uses_the_template(text: str) -> None:
+    assert not needs_llm(text, filled=True)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "איזה עדיף?",  # a question
+        "יקר לי",  # a price objection
+        "מה דעתך על הבחירות",  # off topic
+    ],
+)
+def test_questions_objections_and_off_topic_use_the_llm(text: str) -> None:
+    assert needs_llm(text, filled=True)
+
+
+def test_nothing_understood_uses_the_llm() -> None:
+    assert needs_llm("לא יודע", filled=False)
+
+
+def test_bare_greeting_uses_the_template() -> None:
+    assert not needs_llm("שלום", filled=False)
+    assert needs_llm("שלום, יש לכם מבצעים?", filled=False)
+
+
+def test_long_answers_are_free_form() -> None:
+    words = ["סמסונג"] * MAX_SLOT_WORDS
+
+    assert not needs_llm(" ".join(words), filled=True)
+    assert needs_llm(" ".join([*words, "בבקשה"]), filled=True)
+
+
+def test_forced_modes_override_the_per_turn_decision() -> None:
+    policy = ResponsePolicy({STATE: LLM, ConvState.ASKING_BUDGET: TEMPLATE})
+
+    assert needs_llm("סמסונג", filled=True, policy=policy)
+    assert not policy.needs_llm(ConvState.ASKING_BUDGET, extract_entities("יקר?"), False)
+    # States without an override stay on auto
+    assert not policy.needs_llm(ConvState.ASKING_LOCATION, extract_entities("חיפה"), True)
+
+
+def test_policy_from_settings(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("LLM_REPLY_MODES", f'{{"ASKING_BRAND": "{LLM}", "IDLE": "{AUTO}"}}')
+    get_settings.cache_clear()
+    try:
+        policy = create_response_policy()
+        monkeypatch.setenv("LLM_REPLY_MODES", '{"ASKING_BRAND": "sometimes"}')
+        get_settings.cache_clear()
+        with pytest.raises(ValueError, match="unknown mode"):
+            create_response_policy()
+        monkeypatch.setenv("LLM_REPLY_MODES", '{"ASKING_COLOR": "llm"}')
+        get_settings.cache_clear()
+        with pytest.raises(ValueError, match="unknown state"):
+            create_response_policy()
+    finally:
+        get_settings.cache_clear()
+
+    assert policy.modes == {ConvState.ASKING_BRAND: LLM, ConvState.IDLE: AUTO}
@@ -0,0 +1,72 @@
+"""Shipping prices: the vectorized batch path agrees with the scalar formula."""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from src.logistics.pricing import (
+    DEFAULT_SIZE,
+    SIZE_CLASSES,
+    price_offers,
+    shipping_cost,
+)
+
+
+def test_batch_matches_scalar_on_random_offers() -> None:
+    rng = random.Random(7)
+    offers = [
+        {
+            "price": round(rng.uniform(10, 5000), 2),
+            "distance_km": round(rng.uniform(0, 300), rng.choice([0, 1, 2, 3])),
+            "size": rng.choice(SIZE_CLASSES),
+        }
+        for _ in range(2000)
+    ]
+
+    for offer in price_offers(offers):
+        expected = shipping_cost(offer["distance_km"], offer["size"])
+        assert offer["shipping_cost"] == expected
+        assert isinstance(offer["shipping_cost"], int)
+        assert offer["total_cost"] == pytest.approx(offer["price"] + expected)
+
+
+@pytest.mark.parametrize(
+    ("distance_km", "size", "expected"),
+    [
+        (3.0, "M", 89),  # 88.5: half-to-even would give 88
+        (1.0, "M", 80),  # 79.5
+        (0.5, "S", 52),  # 51.5
+        (12.5, "XL", 350),  # exact
+        (0.0, "L", 125),
+    ],
+)
+def test_rounds_half_up_on_both_paths(distance_km: float, size: str, expected: int) -> None:
+    [offer] = price_offers([{"price": 100.0, "distance_km": distance_km, "size": size}])
+
+    assert shipping_cost(distance_km, size) == expected
+    assert offer["shipping_cost"] == expected
+    assert offer["total_cost"] == 100.0 + expected
+
+
+def test_missing_size_uses_the_default() -> None:
+    [offer] = price_offers([{"price": 10.0, "distance_km": 7.0}])
+
+    assert DEFAULT_SIZE == "M"
+    assert offer["shipping_cost"] == shipping_cost(7.0) == 107  # 71 * 1.5 = 106.5
+
+
+def test_empty_batch() -> None:
+    assert price_offers([]) == []
+
+
+def test_invalid_input_is_rejected_on_both_paths() -> None:
+    with pytest.raises(ValueError, match="size class"):
+        price_offers([{"price": 1.0, "distance_km": 1.0, "size": "XXL"}])
+    with pytest.raises(ValueError, match="size class"):
+        shipping_cost(1.0, "XXL")
+    with pytest.raises(ValueError, match="non-negative"):
+        price_offers([{"price": 1.0, "distance_km": -1.0}])
+    with pytest.raises(ValueError, match="non-negative"):
+        shipping_cost(-1.0)
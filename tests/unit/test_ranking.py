@@ -0,0 +1,124 @@
+"""TopK: dedupe keys, tie-breaks, and when add()/extend() report a change."""
+
+from __future__ import annotations
+
+import random
+from typing import Any
+
+from src.scrapers.ranking import TopK, model_key, offer_key, rank_key, top_k
+
+
+def offer(
+    name: str, total: float, source: str = "KSP", days: str = "2-3", distance: float = 5.0
+) -> dict[str, Any]:
+    return {
+        "name": name,
+        "source": source,
+        "total_cost": total,
+        "delivery_days": days,
+        "distance_km": distance,
+    }
+
+
+def names(offers: list[dict[str, Any]]) -> list[str]:
+    return [o["name"] for o in offers]
+
+
+def test_model_key_normalizes_case_and_punctuation() -> None:
+    assert model_key(offer("Sony WH-1000XM4", 1)) == model_key(offer("sony  wh 1000xm4!", 1))
+    assert offer_key(offer("Sony WH-1000XM4", 1, "KSP")) != offer_key(
+        offer("sony wh 1000xm4", 1, "Ivory")
+    )
+
+
+def test_model_key_keeps_the_cheapest_copy_of_a_model() -> None:
+    ranked = top_k(
+        [
+            offer("AirPods Pro", 900, "KSP"),
+            offer("airpods pro", 850, "Ivory"),
+            offer("AIRPODS-PRO", 950, "Bug"),
+            offer("Galaxy Buds", 500),
+        ]
+    )
+
+    assert [(o["name"], o["source"]) for o in ranked] == [
+        ("Galaxy Buds", "KSP"),
+        ("airpods pro", "Ivory"),
+    ]
+
+
+def test_offer_key_keeps_one_copy_per_store() -> None:
+    ranked = top_k(
+        [
+            offer("AirPods Pro", 900, "KSP"),
+            offer("airpods pro", 880, "KSP"),  # same store via an aggregator
+            offer("AirPods Pro", 850, "Ivory"),
+        ],
+        dedupe_key=offer_key,
+    )
+
+    assert [(o["source"], o["total_cost"]) for o in ranked] == [("Ivory", 850), ("KSP", 880)]
+
+
+def test_ties_go_to_faster_delivery_then_nearer_store_then_first_seen() -> None:
+    ranked = top_k(
+        [
+            offer("far", 100, days="1", distance=30.0),
+            offer("slow", 100, days="5-7", distance=1.0),
+            offer("unknown days", 100, days="", distance=0.0),
+            offer("near", 100, days="1-2", distance=2.0),
+            offer("near twin", 100, days="1", distance=2.0),
+            offer("cheaper", 99, days="14", distance=90.0),
+        ],
+        k=6,
+    )
+
+    assert names(ranked) == ["cheaper", "near", "near twin", "far", "slow", "unknown days"]
+    assert rank_key(offer("x", 1, days="")) == (1.0, 99, 5.0)
+
+
+def test_add_reports_whether_the_visible_top_k_changed() -> None:
+    ranker = TopK(k=2)
+
+    assert ranker.add(offer("a", 300))
+    assert ranker.add(offer("b", 200))
+    assert not ranker.add(offer("c", 400))  # worse than the worst kept
+    assert not ranker.add(offer("d", 300))  # ties the worst: first seen stays
+    assert ranker.add(offer("e", 100))  # evicts a
+    assert not ranker.add(offer("E", 150))  # duplicate of e, not cheaper
+    assert ranker.add(offer("B", 50))  # cheaper copy of b replaces it
+
+    assert names(ranker.results()) == ["B", "e"]
+    assert len(ranker) == 2
+
+
+def test_extend_is_true_if_any_offer_changed_the_top_k() -> None:
+    ranker = TopK(k=2)
+    ranker.extend([offer("a", 100), offer("b", 200)])
+
+    assert not ranker.extend([offer("c", 300), offer("d", 400)])
+    assert ranker.extend([offer("c", 300), offer("e", 150), offer("f", 500)])
+    assert names(ranker.results()) == ["a", "e"]
+
+
+def test_matches_a_full_sort() -> None:
+    rng = random.Random(3)
+    offers = [
+        offer(
+            f"model {rng.randrange(40)}",
+            rng.randrange(100, 120),
+            rng.choice(["KSP", "Ivory", "Bug"]),
+            str(rng.randrange(1, 5)),
+            float(rng.randrange(3)),
+        )
+        for _ in range(500)
+    ]
+
+    best: dict[str, tuple[Any, int, dict[str, Any]]] = {}
+    for seq, o in enumerate(offers):
+        key = model_key(o)
+        if key not in best or rank_key(o) < best[key][0]:
+            best[key] = (rank_key(o), seq, o)
+    expected = [o for _, _, o in sorted(best.values(), key=lambda e: (e[0], e[1]))][:5]
+
+    assert top_k(offers) == expected
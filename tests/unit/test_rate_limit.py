@@ -0,0 +1,155 @@
+"""GCRA rate limiters: bursts, steady rate, the idle sweep, Redis Lua and fail-open."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from src.telegram.middleware.rate_limit import (
+    KEY_PREFIX,
+    InMemoryRateLimiter,
+    RateLimitMiddleware,
+    RedisRateLimiter,
+)
+
+SECOND = 1_000_000_000
+
+
+class Clock:
+    """time.monotonic_ns stand-in that only moves when told to."""
+
+    def __init__(self) -> None:
+        self.now = 1_000 * SECOND
+
+    def __call__(self) -> int:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += int(seconds * SECOND)
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic_ns", clock)
+    return clock
+
+
+@dataclass
+class FakeMessage:
+    text: str
+    from_user: SimpleNamespace = field(default_factory=lambda: SimpleNamespace(id=7))
+    answers: list[str] = field(default_factory=list)
+
+    async def answer(self, text: str) -> None:
+        self.answers.append(text)
+
+
+async def burst(limiter: Any, user_id: int = 1, attempts: int = 100) -> int:
+    allowed = 0
+    for _ in range(attempts):
+        if not await limiter.allow(user_id):
+            break
+        allowed += 1
+    return allowed
+
+
+@pytest.mark.parametrize(("max_requests", "window"), [(15, 60.0), (7, 60.0), (3, 10.0), (10, 1.0)])
+async def test_full_burst_is_allowed_then_refused(
+    clock: Clock, max_requests: int, window: float
+) -> None:
+    # Float seconds refused the last request of these bursts
+    limiter = InMemoryRateLimiter(max_requests, window, sweep_interval=3600.0)
+
+    assert await burst(limiter) == max_requests
+    assert not await limiter.allow(1)
+    assert await limiter.allow(2)
+
+
+async def test_steady_rate_after_the_burst(clock: Clock) -> None:
+    limiter = InMemoryRateLimiter(15, 60.0, sweep_interval=3600.0)
+    await burst(limiter)
+
+    # One request per emission interval (4s), no more
+    for _ in range(5):
+        clock.advance(3.9)
+        assert not await limiter.allow(1)
+        clock.advance(0.1)
+        assert await limiter.allow(1)
+
+    # A full window of quiet gives the whole burst back
+    clock.advance(60.0)
+    assert await burst(limiter) == 15
+
+
+async def test_sweep_evicts_idle_users_only(clock: Clock) -> None:
+    limiter = InMemoryRateLimiter(15, 60.0, sweep_interval=10.0)
+    await limiter.allow(1)
+    await limiter.allow(2)
+    clock.advance(5.0)
+    await burst(limiter, user_id=3)
+    assert len(limiter) == 3
+
+    # User 1 and 2's TATs (4s) have passed; user 3 is a minute ahead
+    clock.advance(6.0)
+    await limiter.allow(4)
+    assert limiter._sweeper is not None
+    await limiter._sweeper
+
+    assert sorted(limiter._tat) == [3, 4]
+    assert limiter._sweeper is None
+    # User 3 kept its TAT: 6s refilled one request, not a fresh burst
+    assert await burst(limiter, user_id=3) == 1
+
+
+async def test_redis_limiter_burst_and_refill() -> None:
+    redis = FakeAsyncRedis()
+    limiter = RedisRateLimiter(redis, 5, 0.5)
+
+    assert await burst(limiter) == 5
+    assert not await limiter.allow(1)
+    assert await limiter.allow(2)
+    # The key expires with its TAT, so idle users cost nothing
+    ttl = await redis.pttl(f"{KEY_PREFIX}1")
+    assert 0 < ttl <= 500
+
+    # Redis TIME is the real clock: one emission interval (100ms) frees one request
+    await asyncio.sleep(0.12)
+    assert await limiter.allow(1)
+    assert not await limiter.allow(1)
+
+
+async def test_redis_limiter_boundary_burst() -> None:
+    limiter = RedisRateLimiter(FakeAsyncRedis(), 7, 60.0)
+
+    assert await burst(limiter) == 7
+
+
+async def test_redis_limiter_fails_open() -> None:
+    server = FakeServer()
+    server.connected = False
+    limiter = RedisRateLimiter(FakeAsyncRedis(server=server), 1, 60.0)
+
+    assert await limiter.allow(1)
+    assert await limiter.allow(1)
+
+
+async def test_middleware_rejects_over_the_limit_but_passes_commands(clock: Clock) -> None:
+    middleware = RateLimitMiddleware(InMemoryRateLimiter(1, 60.0, sweep_interval=3600.0))
+    handled: list[str] = []
+
+    async def handler(event: Any, data: dict[str, Any]) -> None:
+        handled.append(event.text)
+
+    first, second, command = FakeMessage("airpods"), FakeMessage("galaxy"), FakeMessage("/start")
+    for message in (first, second, command):
+        await middleware(handler, message, {})  # type: ignore[arg-type]
+
+    assert handled == ["airpods", "/start"]
+    assert second.answers and not first.answers
@@ -0,0 +1,171 @@
+"""PriceRefresher: decayed popularity, due times and jitter, budgets, the missing-entry path."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import pytest
+
+from src.cache.refresher import PriceRefresher, SearchPopularity
+from src.scrapers.engine import STATUS_ERROR, StoreResult
+
+STORES = ["KSP", "Ivory", "Bug", "Zap"]
+INTERVAL = 100.0
+
+
+@dataclass
+class Engine:
+    """search_store() stand-in that records which stores were scraped."""
+
+    stores: list[str] = field(default_factory=lambda: list(STORES))
+    failing: set[str] = field(default_factory=set)
+    scraped: list[str] = field(default_factory=list)
+
+    async def search_store(self, store: str, query: str, location: str = "") -> StoreResult:
+        self.scraped.append(store)
+        if store in self.failing:
+            return StoreResult(store=store, status=STATUS_ERROR)
+        return StoreResult(store=store, offers=[{"source": store, "price": 1.0}])
+
+
+@dataclass
+class Cache:
+    """SearchCache stand-in: one set of cached keys, whole-key refreshes recorded."""
+
+    cached: bool = True
+    updated: list[str] = field(default_factory=list)
+    refreshes: int = 0
+
+    def ttl_for(self, store: str) -> float:
+        return INTERVAL
+
+    async def has_entry(self, query: str, location: str = "") -> bool:
+        return self.cached
+
+    async def update_store(
+        self, query: str, location: str, store: str, offers: list[dict[str, Any]]
+    ) -> bool:
+        if self.cached:
+            self.updated.append(store)
+        return self.cached
+
+    def refresh(self, query: str, location: str = "") -> bool:
+        # Like SearchCache: one background fetch per key at a time
+        self.refreshes += 1
+        return self.refreshes == 1
+
+
+def refresher(cache: Cache, engine: Engine, **kwargs: Any) -> PriceRefresher:
+    options: dict[str, Any] = {
+        "tick_seconds": 0.01,  # refreshes start within 5ms
+        "jitter": 0.2,
+        "min_score": 2.0,
+        "refresh_at": 1.0,
+        "store_budget": 600.0,
+    } | kwargs
+    return PriceRefresher(cache, engine, **options)  # type: ignore[arg-type]
+
+
+def popular(refresher: PriceRefresher, query: str = "airpods", times: int = 3) -> None:
+    for _ in range(times):
+        refresher.record(query)
+
+
+async def settle(refresher: PriceRefresher) -> None:
+    await asyncio.gather(*list(refresher._running.values()))
+
+
+def test_popularity_halves_every_half_life() -> None:
+    popularity = SearchPopularity(half_life=60.0, max_entries=100)
+    for _ in range(4):
+        popularity.record("airpods", now=0.0)
+    popularity.record("galaxy", now=0.0)
+
+    [(score, _, query, _), *_] = popularity.top(5, now=60.0)
+    assert (query, score) == ("airpods", pytest.approx(2.0))
+    # galaxy decayed to 0.5, under the cut-off
+    assert [q for _, _, q, _ in popularity.top(5, min_score=1.0, now=60.0)] == ["airpods"]
+
+
+def test_popularity_prunes_the_least_searched() -> None:
+    popularity = SearchPopularity(half_life=60.0, max_entries=10)
+    for i in range(10):
+        popularity.record(f"query {i}", now=0.0)
+    popularity.record("query 0", now=0.0)
+    popularity.record("one more", now=0.0)
+
+    assert len(popularity) == 9
+    assert popularity.top(1, now=0.0)[0][2] == "query 0"
+
+
+async def test_popular_key_refreshes_every_store_then_waits_its_interval() -> None:
+    cache, engine = Cache(), Engine()
+    prices = refresher(cache, engine)
+    popular(prices)
+    popular(prices, "rare", times=1)
+
+    started_at = time.monotonic()
+    assert await prices.tick() == len(STORES)
+    await settle(prices)
+
+    assert sorted(engine.scraped) == sorted(STORES)
+    assert sorted(cache.updated) == sorted(STORES)
+    assert prices.stats.refreshed == len(STORES)
+    for (_, store), due in prices._due.items():
+        # Due after its interval, pulled in by at most jitter x interval
+        assert started_at + INTERVAL * 0.8 <= due <= time.monotonic() + INTERVAL
+    # Nothing is due again yet
+    assert await prices.tick() == 0
+
+
+async def test_failed_store_is_retried_sooner() -> None:
+    cache, engine = Cache(), Engine(failing={"Bug"})
+    prices = refresher(cache, engine)
+    popular(prices)
+
+    await prices.tick()
+    await settle(prices)
+
+    now = time.monotonic()
+    due = {store: at - now for (_, store), at in prices._due.items()}
+    assert prices.stats.failed == 1
+    assert due["Bug"] <= INTERVAL * 0.25
+    assert min(due[store] for store in STORES if store != "Bug") >= INTERVAL * 0.7
+
+
+async def test_store_over_its_budget_is_deferred() -> None:
+    cache, engine = Cache(), Engine()
+    # 60/min with a 10ms tick: one token each
+    prices = refresher(cache, engine, store_budget=60.0, store_budgets={"KSP": 600_000.0})
+    popular(prices, "airpods", times=4)
+    popular(prices, "galaxy")
+
+    started = await prices.tick()
+    await settle(prices)
+
+    # The most searched key gets each store's token; only KSP can afford the second
+    assert started == len(STORES) + 1
+    assert prices.stats.deferred == len(STORES) - 1
+    assert engine.scraped.count("KSP") == 2
+
+
+async def test_missing_entry_refetches_the_key_once_without_scraping() -> None:
+    cache, engine = Cache(cached=False), Engine()
+    prices = refresher(cache, engine, store_budget=60.0)
+    popular(prices)
+
+    await prices.tick()
+    await settle(prices)
+
+    assert engine.scraped == []
+    assert cache.refreshes == 1
+    assert prices.stats.missing == 1
+    # Every store took its own token; the whole-key fetch charged the others once more
+    tokens = {store: prices._budget(store)._tokens for store in STORES}
+    assert sorted(tokens.values()) == pytest.approx([-1.0] * 3 + [0.0], abs=0.05)
+    # All of the key's stores wait a full interval for the new entry
+    assert len(prices._due) == len(STORES)
+    assert min(prices._due.values()) > time.monotonic() + INTERVAL * 0.7
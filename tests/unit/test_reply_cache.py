@@ -0,0 +1,132 @@
+"""ReplyCache: variant pools, TTL and LRU eviction, and warming it through SalesAgent."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage
+
+from src.agents.budget import BudgetGovernor
+from src.agents.policy import ResponsePolicy
+from src.agents.reply_cache import ReplyCache, normalize_text
+from src.agents.sales_agent import SalesAgent
+from src.agents.session import InMemorySessionStore
+from src.cache import lru
+
+
+@pytest.fixture
+def now(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    clock = [1_000_000.0]
+    monkeypatch.setattr(lru, "time", SimpleNamespace(time=lambda: clock[0]))
+    return clock
+
+
+def test_normalize_text_ignores_case_spacing_and_trailing_punctuation() -> None:
+    assert normalize_text("  מה אתה   יודע לעשות?! ") == "מה אתה יודע לעשות"
+    assert normalize_text("Hi JBL.") == normalize_text("hi jbl")
+
+
+def test_get_is_none_until_the_pool_is_full(now: list[float]) -> None:
+    cache = ReplyCache(max_entries=10, ttl=60.0, variants=3)
+
+    for reply in ("a", "b"):
+        assert cache.get("key") is None
+        cache.add("key", reply)
+    assert cache.get("key") is None
+
+    cache.add("key", "c")
+    cache.add("key", "d")  # the pool is full; extras are dropped
+    assert {cache.get("key") for _ in range(50)} == {"a", "b", "c"}
+    assert (cache.stats.stored, cache.stats.misses, cache.stats.hits) == (3, 3, 50)
+
+
+def test_pool_expires_after_ttl(now: list[float]) -> None:
+    cache = ReplyCache(max_entries=10, ttl=60.0, variants=1)
+    cache.add("key", "a")
+
+    now[0] += 59.0
+    assert cache.get("key") == "a"
+    now[0] += 1.0
+    assert cache.get("key") is None
+
+    # Refilled from scratch
+    cache.add("key", "b")
+    assert cache.get("key") == "b"
+
+
+def test_least_recently_used_key_is_evicted(now: list[float]) -> None:
+    cache = ReplyCache(max_entries=2, ttl=60.0, variants=1)
+    cache.add("a", "reply a")
+    cache.add("b", "reply b")
+    cache.get("a")
+    cache.add("c", "reply c")
+
+    assert cache.get("a") == "reply a"
+    assert cache.get("b") is None
+    assert cache.get("c") == "reply c"
+
+
+@dataclass
+class FakeLLM:
+    """ChatAnthropic stand-in: numbered replies, every call recorded."""
+
+    calls: list[str] = field(default_factory=list)
+
+    async def ainvoke(self, messages: list[BaseMessage]) -> AIMessage:
+        self.calls.append(str(messages[-1].content))
+        return AIMessage(content=f"reply {len(self.calls)}")
+
+
+def agent(llm: FakeLLM, variants: int = 2) -> SalesAgent:
+    shufi = SalesAgent(
+        sessions=InMemorySessionStore(idle_ttl=60.0, max_entries=100),
+        governor=BudgetGovernor(
+            daily_budget_usd=100.0,
+            warning_threshold=0.8,
+            block_threshold=1.0,
+            max_concurrency=4,
+            queue_timeout=1.0,
+        ),
+        policy=ResponsePolicy(),
+        replies=ReplyCache(max_entries=100, ttl=3600.0, variants=variants),
+    )
+    shufi._llm = llm  # type: ignore[assignment]
+    return shufi
+
+
+async def test_warm_replies_fills_pools_for_llm_openings_only() -> None:
+    llm = FakeLLM()
+    shufi = agent(llm)
+
+    # A greeting gets the template; the question needs the LLM
+    await shufi.warm_replies(["שלום", "מה אתה יודע לעשות?"], variants=2)
+
+    assert llm.calls == ["מה אתה יודע לעשות?"] * 2
+    assert shufi.pop_search_request(-1) is None
+
+    # A real user's first turn is served from the pool, whatever the punctuation
+    reply, _ = await shufi.handle_message(1, "מה אתה יודע לעשות")
+    assert reply in {"reply 1", "reply 2"}
+    assert len(llm.calls) == 2
+
+
+async def test_turns_with_history_are_not_cached() -> None:
+    llm = FakeLLM()
+    shufi = agent(llm, variants=1)
+
+    await shufi.handle_message(1, "מה אתה יודע לעשות?")
+    await shufi.handle_message(1, "מה אתה יודע לעשות?")
+    # User 2 has no history, so the first reply is reused
+    await shufi.handle_message(2, "מה אתה יודע לעשות?")
+
+    assert len(llm.calls) == 2
+
+
+async def test_warm_replies_without_an_llm_is_a_no_op() -> None:
+    shufi = agent(FakeLLM())
+    shufi._llm = None
+
+    await shufi.warm_replies(["מה אתה יודע לעשות?"], variants=2)
+    assert shufi._replies.stats.stored == 0
@@ -0,0 +1,154 @@
+"""Repositories and the offer writer on the SQLite (aiosqlite) stand-in."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from src.config import get_settings
+from src.database.ingest import OfferRecorder
+from src.database.models import PriceHistory, StoreOffer
+from src.database.repositories.base import batched
+from src.database.repositories.events import (
+    KIND_CONVERSION,
+    KIND_SEARCH,
+    EventRepository,
+)
+from src.database.repositories.offers import OfferRepository, save_offers
+from src.database.repositories.prices import PriceHistoryRepository
+from src.database.repositories.products import ProductRepository
+from src.database.session import close_db_engine, create_db_engine, create_schema
+
+T0 = datetime(2026, 1, 1, 12, tzinfo=UTC)
+
+
+def offer(name: str, store: str, price: float) -> dict:
+    return {"name": name, "source": store, "price": price, "url": f"https://{store}/p"}
+
+
+@pytest.fixture
+async def engine(tmp_path: Path) -> AsyncIterator[AsyncEngine]:
+    engine = create_db_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.sqlite3'}")
+    await create_schema(engine)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def sessions(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+def test_batched() -> None:
+    assert [list(b) for b in batched([1, 2, 3, 4, 5], 2)] == [[1, 2], [3, 4], [5]]
+    assert list(batched([], 2)) == []
+
+
+async def test_ensure_products_is_idempotent(sessions: async_sessionmaker[AsyncSession]) -> None:
+    async with sessions() as session, session.begin():
+        products = ProductRepository(session, batch_size=1)
+        first = await products.ensure(
+            [{"model_key": "airpods pro", "name": "AirPods Pro", "size": "S"}]
+        )
+        again = await products.ensure(
+            [
+                {"model_key": "airpods pro", "name": "renamed", "size": "S"},
+                {"model_key": "galaxy s24", "name": "Galaxy S24", "size": "S"},
+            ]
+        )
+        stored = await products.get("airpods pro")
+
+    assert again["airpods pro"] == first["airpods pro"]
+    assert set(again) == {"airpods pro", "galaxy s24"}
+    assert stored is not None and stored.name == "AirPods Pro"
+
+
+async def test_save_offers_writes_history_only_for_price_changes(
+    sessions: async_sessionmaker[AsyncSession],
+) -> None:
+    search = [offer("AirPods Pro", "ksp", 899), offer("AirPods Pro", "ivory", 949)]
+    async with sessions() as session, session.begin():
+        assert await save_offers(session, search, seen_at=T0, batch_size=1) == 2
+    async with sessions() as session, session.begin():
+        # Same prices: offers refreshed, no history
+        assert await save_offers(session, search, seen_at=T0 + timedelta(hours=1)) == 0
+    async with sessions() as session, session.begin():
+        changed = [offer("AirPods Pro", "ksp", 849), offer("AirPods Pro", "ivory", 949)]
+        assert await save_offers(session, changed, seen_at=T0 + timedelta(hours=2)) == 1
+
+    async with sessions() as session:
+        offers = await OfferRepository(session).for_product("airpods pro")
+        history = await PriceHistoryRepository(session).history("airpods pro", store="ksp")
+        recent = await OfferRepository(session).for_store("ksp", since=T0 + timedelta(hours=2))
+
+    assert [(o.store, o.price) for o in offers] == [("ksp", 849), ("ivory", 949)]
+    assert [h.price for h in history] == [899, 849]
+    assert len(recent) == 1
+
+
+async def test_upsert_keeps_the_cheapest_duplicate(
+    sessions: async_sessionmaker[AsyncSession],
+) -> None:
+    async with sessions() as session, session.begin():
+        duplicates = [offer("AirPods Pro", "ksp", 899), offer("airpods  pro", "ksp", 879)]
+        assert await save_offers(session, duplicates, seen_at=T0) == 1
+        count = await session.scalar(select(func.count()).select_from(StoreOffer))
+        price = await session.scalar(select(StoreOffer.price))
+
+    assert count == 1
+    assert price == 879
+
+
+async def test_save_offers_without_offers(sessions: async_sessionmaker[AsyncSession]) -> None:
+    async with sessions() as session, session.begin():
+        assert await save_offers(session, []) == 0
+
+
+async def test_event_summary(sessions: async_sessionmaker[AsyncSession]) -> None:
+    rows = [
+        (KIND_SEARCH, 1, "AirPods", 5, None, T0),
+        (KIND_SEARCH, 2, "airpods", 5, None, T0 + timedelta(minutes=1)),
+        (KIND_SEARCH, 3, "Galaxy S24", 3, None, T0 + timedelta(minutes=2)),
+        (KIND_CONVERSION, 1, None, None, "p1", T0 + timedelta(minutes=3)),
+        # Outside the window
+        (KIND_SEARCH, 4, "old", 1, None, T0 - timedelta(days=1)),
+    ]
+    async with sessions() as session, session.begin():
+        await EventRepository(session).append(rows)
+    async with sessions() as session:
+        summary = await EventRepository(session).summary(T0, T0 + timedelta(days=1))
+
+    assert (summary.searches, summary.conversions) == (3, 1)
+    assert summary.top_queries[0] == ("airpods", 2)
+    assert summary.conversion_rate == pytest.approx(1 / 3)
+
+
+async def test_offer_recorder_saves_results_in_the_background(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("POSTGRES_DSN", f"sqlite+aiosqlite:///{tmp_path / 'ingest.sqlite3'}")
+    get_settings.cache_clear()
+    try:
+        recorder = OfferRecorder(batch_size=10, flush_interval=0.01)
+        recorder.emit(([offer("AirPods Pro", "ksp", 899)], T0))
+        recorder.emit(([offer("AirPods Pro", "ksp", 879)], T0 + timedelta(minutes=1)))
+        await recorder.aclose()
+
+        engine = create_db_engine()
+        async with async_sessionmaker(engine)() as session:
+            history = await session.scalars(select(PriceHistory.price))
+            offers = await OfferRepository(session).for_product("airpods pro")
+        await engine.dispose()
+    finally:
+        await close_db_engine()
+        get_settings.cache_clear()
+
+    assert recorder.stats.written == 2
+    # Applied in arrival order: the later price is the current one
+    assert list(history) == [899, 879]
+    assert [o.price for o in offers] == [879]
@@ -0,0 +1,257 @@
+"""SearchCache on fakeredis: coalescing, SWR, per-store TTLs, partial results, fail-open."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from src.cache.search_cache import SearchCache, cache_key
+from src.scrapers.engine import STATUS_TIMEOUT, SearchResult, StoreResult
+
+
+class Clock:
+    """Stands in for time.time so TTLs can be crossed without sleeping."""
+
+    def __init__(self) -> None:
+        self.now = time.time()
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Loader:
+    """Counts calls and returns the offers it is currently set to, one store result each."""
+
+    def __init__(self, offers: list[dict], timed_out: tuple[str, ...] = ()) -> None:
+        self.offers = offers
+        self.timed_out = timed_out
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, query: str, location: str) -> SearchResult:
+        self.calls += 1
+        await self.release.wait()
+        stores = [StoreResult(store=o["source"], offers=[o]) for o in self.offers]
+        stores += [StoreResult(store=store, status=STATUS_TIMEOUT) for store in self.timed_out]
+        return SearchResult(query=query, stores=stores)
+
+
+def offer(store: str, price: float) -> dict:
+    return {"name": f"{store} item", "source": store, "price": price}
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def redis() -> FakeAsyncRedis:
+    return FakeAsyncRedis()
+
+
+async def settle(cache: SearchCache) -> None:
+    """Let background revalidations finish."""
+    while cache._refreshing:
+        await asyncio.gather(*cache._refreshing.values(), return_exceptions=True)
+
+
+async def test_concurrent_misses_share_one_fetch(redis: FakeAsyncRedis) -> None:
+    loader = Loader([offer("ksp", 100)])
+    loader.release.clear()
+    cache = SearchCache(redis, loader)
+
+    waiters = [asyncio.create_task(cache.get_or_fetch("AirPods Pro", "Tel Aviv")) for _ in range(5)]
+    await asyncio.sleep(0)
+    loader.release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert loader.calls == 1
+    assert all(result == [offer("ksp", 100)] for result in results)
+    assert cache.stats.misses == 1
+    assert cache.stats.coalesced == 4
+
+
+async def test_normalized_queries_share_a_key(redis: FakeAsyncRedis) -> None:
+    loader = Loader([offer("ksp", 100)])
+    cache = SearchCache(redis, loader)
+
+    await cache.get_or_fetch("AirPods  Pro", "Tel Aviv")
+    await cache.get_or_fetch("airpods pro", "tel aviv")
+
+    assert loader.calls == 1
+    assert cache.stats.local_hits == 1
+
+
+async def test_stale_entry_served_while_revalidating(redis: FakeAsyncRedis, clock: Clock) -> None:
+    loader = Loader([offer("ksp", 100)])
+    cache = SearchCache(redis, loader, ttl=60, stale_ttl=600)
+    await cache.get_or_fetch("airpods")
+
+    clock.now += 61
+    loader.offers = [offer("ksp", 90)]
+    loader.release.clear()
+    # Stale offers come back right away; the refresh runs behind them
+    assert await cache.get_or_fetch("airpods") == [offer("ksp", 100)]
+    assert cache.stats.stale_hits == 1
+    # A second stale read doesn't start another refresh
+    assert await cache.get_or_fetch("airpods") == [offer("ksp", 100)]
+
+    loader.release.set()
+    await settle(cache)
+    assert loader.calls == 2
+    assert await cache.get_or_fetch("airpods") == [offer("ksp", 90)]
+
+
+async def test_expired_past_stale_window_fetches_again(
+    redis: FakeAsyncRedis, clock: Clock
+) -> None:
+    loader = Loader([offer("ksp", 100)])
+    cache = SearchCache(redis, loader, ttl=60, stale_ttl=600)
+    await cache.get_or_fetch("airpods")
+
+    clock.now += 661
+    await redis.delete(cache_key("airpods"))  # fakeredis expiry follows its own clock
+    loader.offers = [offer("ksp", 90)]
+
+    assert await cache.get_or_fetch("airpods") == [offer("ksp", 90)]
+    assert cache.stats.misses == 2
+
+
+async def test_entry_freshness_follows_shortest_store_ttl(
+    redis: FakeAsyncRedis, clock: Clock
+) -> None:
+    loader = Loader([offer("ksp", 100), offer("ivory", 110)])
+    cache = SearchCache(redis, loader, ttl=600, stale_ttl=1800, store_ttls={"ksp": 60})
+    await cache.get_or_fetch("airpods")
+
+    raw = await redis.get(cache_key("airpods"))
+    entry = json.loads(raw)
+    assert entry["fresh_until"] == pytest.approx(clock.now + 60)
+    assert entry["stale_until"] == pytest.approx(clock.now + 60 + 1800)
+    assert await redis.pttl(cache_key("airpods")) == pytest.approx(1860 * 1000, abs=1000)
+
+    clock.now += 61
+    await cache.get_or_fetch("airpods")
+    assert cache.stats.stale_hits == 1
+
+
+async def test_update_store_restarts_only_that_stores_ttl(
+    redis: FakeAsyncRedis, clock: Clock
+) -> None:
+    loader = Loader([offer("ksp", 100), offer("ivory", 110)])
+    cache = SearchCache(redis, loader, ttl=600, store_ttls={"ksp": 60})
+    await cache.get_or_fetch("airpods")
+    started = clock.now
+
+    clock.now += 50
+    assert await cache.update_store("airpods", "", "ksp", [offer("ksp", 95)])
+
+    entry = json.loads(await redis.get(cache_key("airpods")))
+    assert sorted(o["price"] for o in entry["offers"]) == [95, 110]
+    assert entry["fetched_at"]["ksp"] == pytest.approx(clock.now)
+    assert entry["fetched_at"]["ivory"] == pytest.approx(started)
+    # ksp again limits freshness, now counted from its refresh
+    assert entry["fresh_until"] == pytest.approx(clock.now + 60)
+
+
+async def test_partial_result_is_fresh_for_partial_ttl_only(
+    redis: FakeAsyncRedis, clock: Clock
+) -> None:
+    loader = Loader([offer("ksp", 100)], timed_out=("ivory",))
+    cache = SearchCache(redis, loader, ttl=600, stale_ttl=1800, partial_ttl=30)
+    await cache.get_or_fetch("airpods")
+
+    entry = json.loads(await redis.get(cache_key("airpods")))
+    assert entry["fresh_until"] == pytest.approx(clock.now + 30)
+    assert cache.stats.partial == 1
+
+    # Served stale past partial_ttl while the whole key is fetched again
+    clock.now += 31
+    loader.offers, loader.timed_out = [offer("ksp", 100), offer("ivory", 90)], ()
+    assert await cache.get_or_fetch("airpods") == [offer("ksp", 100)]
+    await settle(cache)
+
+    entry = json.loads(await redis.get(cache_key("airpods")))
+    assert sorted(o["source"] for o in entry["offers"]) == ["ivory", "ksp"]
+    assert entry["fresh_until"] == pytest.approx(clock.now + 600)
+
+
+async def test_refreshing_the_timed_out_store_completes_a_partial_entry(
+    redis: FakeAsyncRedis, clock: Clock
+) -> None:
+    cache = SearchCache(
+        redis, Loader([offer("ksp", 100)], timed_out=("ivory",)), ttl=600, partial_ttl=30
+    )
+    await cache.get_or_fetch("airpods")
+
+    assert await cache.update_store("airpods", "", "ivory", [offer("ivory", 90)])
+
+    entry = json.loads(await redis.get(cache_key("airpods")))
+    assert entry["fresh_until"] == pytest.approx(clock.now + 600)
+
+
+async def test_update_store_without_entry_returns_false(redis: FakeAsyncRedis) -> None:
+    cache = SearchCache(redis, Loader([]))
+
+    assert not await cache.update_store("airpods", "", "ksp", [offer("ksp", 95)])
+    assert await redis.get(cache_key("airpods")) is None
+    assert await cache.update_store("airpods", "", "ksp", []) is False
+
+
+async def test_entry_shared_through_redis(redis: FakeAsyncRedis) -> None:
+    loader = Loader([offer("ksp", 100)])
+    await SearchCache(redis, loader).get_or_fetch("airpods")
+
+    other_worker = SearchCache(redis, loader)
+    assert await other_worker.get_or_fetch("airpods") == [offer("ksp", 100)]
+    assert loader.calls == 1
+    assert other_worker.stats.redis_hits == 1
+
+
+async def test_empty_results_are_not_cached(redis: FakeAsyncRedis) -> None:
+    loader = Loader([])
+    cache = SearchCache(redis, loader)
+
+    await cache.get_or_fetch("airpods")
+    await cache.get_or_fetch("airpods")
+
+    assert loader.calls == 2
+    assert await redis.get(cache_key("airpods")) is None
+
+
+async def test_redis_errors_fail_open() -> None:
+    server = FakeServer()
+    server.connected = False
+    loader = Loader([offer("ksp", 100)])
+    cache = SearchCache(FakeAsyncRedis(server=server), loader)
+
+    assert await cache.get_or_fetch("airpods") == [offer("ksp", 100)]
+    # Still cached in process
+    assert await cache.get_or_fetch("airpods") == [offer("ksp", 100)]
+    assert loader.calls == 1
+    assert await cache.update_store("airpods", "", "ksp", [offer("ksp", 90)])
+    await cache.invalidate("airpods")
+    assert await cache.get_or_fetch("airpods") == [offer("ksp", 100)]
+    assert loader.calls == 2
+
+
+async def test_fetch_error_reaches_every_waiter(redis: FakeAsyncRedis) -> None:
+    async def failing(query: str, location: str) -> SearchResult:
+        await asyncio.sleep(0)
+        raise RuntimeError("all stores down")
+
+    cache = SearchCache(redis, failing)
+    results = await asyncio.gather(
+        cache.get_or_fetch("airpods"), cache.get_or_fetch("airpods"), return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.stats.fetch_errors == 1
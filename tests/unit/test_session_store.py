@@ -0,0 +1,134 @@
+"""Session stores: in-memory TTL, eviction and compression; Redis on fakeredis."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from src.agents.session import (
+    AI,
+    HUMAN,
+    KEY_PREFIX,
+    MAX_HISTORY,
+    ConvState,
+    InMemorySessionStore,
+    RedisSessionStore,
+    UserSession,
+    dump_session,
+)
+from src.cache import lru
+
+
+@pytest.fixture
+def now(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    clock = [1_000_000.0]
+    monkeypatch.setattr(lru, "time", SimpleNamespace(time=lambda: clock[0]))
+    return clock
+
+
+def full_session() -> UserSession:
+    session = UserSession(
+        state=ConvState.ASKING_PRIORITY,
+        product_query="אוזניות",
+        brand="sony",
+        budget="1500",
+        location="חיפה",
+        is_specific=True,
+    )
+    for i in range(MAX_HISTORY + 5):
+        session.add_message(HUMAN if i % 2 else AI, f"הודעה מספר {i} על אוזניות sony")
+    return session
+
+
+async def test_history_is_bounded() -> None:
+    session = full_session()
+
+    assert len(session.history) == MAX_HISTORY
+    assert session.history[-1][1] == f"הודעה מספר {MAX_HISTORY + 4} על אוזניות sony"
+
+
+@pytest.mark.parametrize("compress", [False, True])
+async def test_in_memory_round_trip(compress: bool) -> None:
+    store = InMemorySessionStore(idle_ttl=60.0, max_entries=10, compress=compress)
+    session = full_session()
+
+    await store.save(1, session)
+
+    assert await store.get(1) == session
+    assert await store.get(2) == UserSession()
+    await store.delete(1)
+    await store.delete(1)
+    assert await store.get(1) == UserSession()
+
+
+async def test_compressed_sessions_are_stored_as_small_bytes() -> None:
+    store = InMemorySessionStore(idle_ttl=60.0, max_entries=10, compress=True)
+    session = full_session()
+
+    await store.save(1, session)
+
+    stored = store._sessions.get(1)
+    assert isinstance(stored, bytes)
+    assert len(stored) < len(dump_session(session))
+    # A stored session is a snapshot: later edits need another save
+    session.add_message(HUMAN, "עוד משהו")
+    assert await store.get(1) != session
+
+
+async def test_idle_sessions_expire_and_saves_restart_the_clock(now: list[float]) -> None:
+    store = InMemorySessionStore(idle_ttl=60.0, max_entries=10)
+    await store.save(1, UserSession(product_query="airpods"))
+    await store.save(2, UserSession(product_query="galaxy"))
+
+    now[0] += 50.0
+    await store.save(1, await store.get(1))
+    now[0] += 20.0
+
+    assert (await store.get(1)).product_query == "airpods"
+    assert await store.get(2) == UserSession()
+
+
+async def test_least_recent_sessions_are_evicted(now: list[float]) -> None:
+    store = InMemorySessionStore(idle_ttl=60.0, max_entries=2, compress=True)
+    for user_id in (1, 2):
+        await store.save(user_id, UserSession(product_query=f"query {user_id}"))
+    await store.get(1)
+    await store.save(3, UserSession(product_query="query 3"))
+
+    assert len(store) == 2
+    assert await store.get(2) == UserSession()
+    assert (await store.get(1)).product_query == "query 1"
+
+
+async def test_redis_round_trip() -> None:
+    store = RedisSessionStore(FakeAsyncRedis(), idle_ttl=60)
+    session = UserSession(state=ConvState.ASKING_BUDGET, product_query="airpods")
+    session.add_message(HUMAN, "airpods pro")
+
+    await store.save(1, session)
+    assert await store.get(1) == session
+
+    await store.delete(1)
+    assert await store.get(1) == UserSession()
+
+
+async def test_redis_down_starts_a_fresh_session() -> None:
+    server = FakeServer()
+    server.connected = False
+    store = RedisSessionStore(FakeAsyncRedis(server=server), idle_ttl=60)
+
+    assert await store.get(1) == UserSession()
+    await store.save(1, UserSession(product_query="airpods"))
+    await store.delete(1)
+
+
+async def test_idle_ttl_is_kept_to_the_millisecond() -> None:
+    redis = FakeAsyncRedis()
+    store = RedisSessionStore(redis, idle_ttl=0.25)
+
+    await store.save(1, UserSession(product_query="airpods"))
+
+    assert 0 < await redis.pttl(f"{KEY_PREFIX}1") <= 250
+    assert (await store.get(1)).product_query == "airpods"
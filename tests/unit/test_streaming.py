@@ -0,0 +1,154 @@
+"""Streamed Shufi replies: SalesAgent._stream deltas and the _ShufiReply message."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from langchain_core.messages import AIMessageChunk, BaseMessage
+
+from src.agents.budget import BudgetGovernor
+from src.agents.policy import ResponsePolicy
+from src.agents.reply_cache import ReplyCache
+from src.agents.sales_agent import SalesAgent
+from src.agents.session import InMemorySessionStore
+from src.telegram.handlers import search
+from src.telegram.handlers.search import _ShufiReply
+
+QUESTION = "מה אתה יודע לעשות?"
+
+
+@dataclass
+class FakeLLM:
+    """astream() stand-in: yields the given chunks, then optionally fails."""
+
+    chunks: list[AIMessageChunk]
+    fail_after: int | None = None
+
+    async def astream(self, messages: list[BaseMessage]) -> AsyncIterator[AIMessageChunk]:
+        for i, chunk in enumerate(self.chunks):
+            if i == self.fail_after:
+                raise RuntimeError("connection reset")
+            yield chunk
+
+
+def chunks(*texts: str) -> list[AIMessageChunk]:
+    usage = {"input_tokens": 100, "output_tokens": 20, "total_tokens": 120}
+    # Like Anthropic: usage arrives on a final chunk with no text
+    return [AIMessageChunk(content=text) for text in texts] + [
+        AIMessageChunk(content="", usage_metadata=usage)  # type: ignore[arg-type]
+    ]
+
+
+def agent(llm: FakeLLM) -> SalesAgent:
+    shufi = SalesAgent(
+        sessions=InMemorySessionStore(idle_ttl=60.0, max_entries=100),
+        governor=BudgetGovernor(
+            daily_budget_usd=100.0,
+            warning_threshold=0.8,
+            block_threshold=1.0,
+            max_concurrency=4,
+            queue_timeout=1.0,
+        ),
+        policy=ResponsePolicy(),
+        replies=ReplyCache(max_entries=100, ttl=3600.0, variants=2),
+    )
+    shufi._llm = llm  # type: ignore[assignment]
+    return shufi
+
+
+async def test_deltas_carry_the_text_so_far() -> None:
+    shufi = agent(FakeLLM(chunks("אני ", "מוצא ", "מחירים")))
+    deltas: list[str] = []
+
+    async def on_delta(text: str) -> None:
+        deltas.append(text)
+
+    reply, should_search = await shufi.handle_message(1, QUESTION, on_delta)
+
+    assert deltas == ["אני ", "אני מוצא ", "אני מוצא מחירים"]
+    assert (reply, should_search) == ("אני מוצא מחירים", False)
+    # The summed chunks keep the usage for the budget
+    assert shufi._governor.usage.output_tokens == 20
+
+
+async def test_failed_stream_falls_back_to_the_template() -> None:
+    shufi = agent(FakeLLM(chunks("אני ", "מוצא "), fail_after=1))
+    deltas: list[str] = []
+
+    async def on_delta(text: str) -> None:
+        deltas.append(text)
+
+    reply, _ = await shufi.handle_message(1, QUESTION, on_delta)
+
+    assert deltas == ["אני "]
+    assert reply and reply != "אני "
+    assert shufi._governor.usage.calls == 0
+    # A failed reply is not memoized
+    assert shufi._replies.stats.stored == 0
+
+
+@dataclass
+class FakeMessage:
+    """Incoming message whose answer() returns a sent message that records edits."""
+
+    sent: list[Any] = field(default_factory=list)
+
+    async def answer(self, text: str) -> Any:
+        message = SentMessage(text)
+        self.sent.append(message)
+        return message
+
+
+@dataclass
+class SentMessage:
+    text: str
+    edits: list[str] = field(default_factory=list)
+
+    async def edit_text(self, text: str, reply_markup: Any = None) -> None:
+        self.edits.append(text)
+        self.text = text
+
+
+@pytest.fixture(autouse=True)
+def no_edit_interval(monkeypatch: pytest.MonkeyPatch) -> None:
+    settings = SimpleNamespace(telegram=SimpleNamespace(edit_interval=0.0))
+    monkeypatch.setattr(search, "get_settings", lambda: settings)
+
+
+async def test_reply_is_sent_at_the_first_token_then_edited() -> None:
+    message = FakeMessage()
+    reply = _ShufiReply(message)  # type: ignore[arg-type]
+
+    await reply.update("אני ")
+    await reply.update("אני מוצא")
+    await reply.finish("אני מוצא מחירים")
+
+    [sent] = message.sent
+    assert sent.text == "<b>שופי:</b> אני מוצא מחירים"
+    assert sent.edits == ["<b>שופי:</b> אני מוצא", "<b>שופי:</b> אני מוצא מחירים"]
+
+
+async def test_template_reply_is_sent_once() -> None:
+    message = FakeMessage()
+    reply = _ShufiReply(message)  # type: ignore[arg-type]
+
+    await reply.finish("באיזה אזור אתה נמצא?")
+
+    [sent] = message.sent
+    assert sent.text == "<b>שופי:</b> באיזה אזור אתה נמצא?"
+    assert sent.edits == []
+
+
+async def test_fallback_replaces_a_partial_stream() -> None:
+    message = FakeMessage()
+    reply = _ShufiReply(message)  # type: ignore[arg-type]
+
+    await reply.update("אני ")
+    await reply.finish("ספר לי מה אתה מחפש?")
+
+    [sent] = message.sent
+    assert sent.edits == ["<b>שופי:</b> ספר לי מה אתה מחפש?"]
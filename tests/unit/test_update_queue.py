@@ -0,0 +1,167 @@
+"""UpdateQueue: per-user ordering, cap and busy notice, dedup, backpressure."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from aiogram.types import Update
+
+from src.telegram.update_queue import (
+    ACCEPTED,
+    BUSY_TEXT,
+    DROPPED,
+    DUPLICATE,
+    REJECTED,
+    UpdateQueue,
+)
+
+
+def message(update_id: int, user_id: int) -> Update:
+    return Update.model_validate(
+        {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": 0,
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": "user"},
+                "text": f"message {update_id}",
+            },
+        }
+    )
+
+
+def callback(update_id: int, user_id: int) -> Update:
+    return Update.model_validate(
+        {
+            "update_id": update_id,
+            "callback_query": {
+                "id": f"query {update_id}",
+                "chat_instance": "1",
+                "from": {"id": user_id, "is_bot": False, "first_name": "user"},
+                "data": "deliver_1",
+            },
+        }
+    )
+
+
+class Bot:
+    """Records the busy notices sent through it."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.sent: list[tuple[str, Any, str]] = []
+        self.fail = fail
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        if self.fail:
+            raise RuntimeError("Telegram is down")
+        self.sent.append(("message", chat_id, text))
+
+    async def answer_callback_query(self, callback_query_id: str, text: str) -> None:
+        self.sent.append(("callback", callback_query_id, text))
+
+
+class Dispatcher:
+    """Records the updates fed to it; blocks until released."""
+
+    def __init__(self) -> None:
+        self.fed: list[int] = []
+        self.release = asyncio.Event()
+
+    async def feed_update(self, bot: Any, update: Update) -> None:
+        await self.release.wait()
+        self.fed.append(update.update_id)
+
+
+def make_queue(dp: Dispatcher, bot: Bot | None = None, **kwargs: Any) -> UpdateQueue:
+    options = {"workers": 4, "max_backlog": 100, "dedup_size": 100, "max_per_user": 3}
+    queue = UpdateQueue(bot or Bot(), dp, **(options | kwargs))  # type: ignore[arg-type]
+    queue.start()
+    return queue
+
+
+async def test_one_users_updates_run_in_order() -> None:
+    dp = Dispatcher()
+    queue = make_queue(dp)
+    for update_id in (1, 2, 3):
+        assert queue.submit(message(update_id, user_id=7)) == ACCEPTED
+
+    dp.release.set()
+    await queue.close(timeout=1)
+
+    assert dp.fed == [1, 2, 3]
+
+
+async def test_updates_past_the_per_user_cap_are_dropped() -> None:
+    dp = Dispatcher()
+    queue = make_queue(dp, max_per_user=2)
+
+    results = [queue.submit(message(update_id, user_id=7)) for update_id in range(1, 5)]
+    # Other users aren't affected by one user's burst
+    assert queue.submit(message(10, user_id=8)) == ACCEPTED
+
+    assert results == [ACCEPTED, ACCEPTED, DROPPED, DROPPED]
+    assert queue.stats.dropped == 2
+    dp.release.set()
+    while queue.backlog:
+        await asyncio.sleep(0.01)
+
+    # Finished updates free the user's slots
+    assert queue.submit(message(20, user_id=7)) == ACCEPTED
+    await queue.close(timeout=1)
+    assert sorted(dp.fed) == [1, 2, 10, 20]
+
+
+async def test_duplicates_and_backlog_limit() -> None:
+    dp = Dispatcher()
+    queue = make_queue(dp, max_backlog=2)
+
+    assert queue.submit(message(1, user_id=1)) == ACCEPTED
+    assert queue.submit(message(1, user_id=1)) == DUPLICATE
+    assert queue.submit(message(2, user_id=2)) == ACCEPTED
+    assert queue.submit(message(3, user_id=3)) == REJECTED
+
+    dp.release.set()
+    await queue.close(timeout=1)
+    assert queue.backlog == 0
+
+
+async def test_dropped_user_is_told_once_per_burst() -> None:
+    dp, bot = Dispatcher(), Bot()
+    queue = make_queue(dp, bot, max_per_user=1)
+
+    results = [queue.submit(message(update_id, user_id=7)) for update_id in range(1, 5)]
+    queue.submit(callback(5, user_id=8))
+    assert queue.submit(callback(6, user_id=8)) == DROPPED
+    await asyncio.sleep(0)
+
+    assert results == [ACCEPTED, DROPPED, DROPPED, DROPPED]
+    assert bot.sent == [("message", 7, BUSY_TEXT), ("callback", "query 6", BUSY_TEXT)]
+    assert (queue.stats.dropped, queue.stats.busy_notices) == (4, 2)
+
+    dp.release.set()
+    while queue.backlog:
+        await asyncio.sleep(0.01)
+    dp.release.clear()
+
+    # Caught up: the next burst gets its own notice
+    queue.submit(message(10, user_id=7))
+    assert queue.submit(message(11, user_id=7)) == DROPPED
+    dp.release.set()
+    await queue.close(timeout=1)
+    assert bot.sent[-1] == ("message", 7, BUSY_TEXT)
+    assert queue.stats.busy_notices == 3
+
+
+async def test_failed_busy_notice_is_only_logged() -> None:
+    dp = Dispatcher()
+    queue = make_queue(dp, Bot(fail=True), max_per_user=1)
+
+    queue.submit(message(1, user_id=7))
+    assert queue.submit(message(2, user_id=7)) == DROPPED
+
+    dp.release.set()
+    await queue.close(timeout=1)
+    assert dp.fed == [1]
+    assert queue.stats.busy_notices == 0
@@ -0,0 +1,93 @@
+"""UserLockMiddleware and the fencing check handlers run under."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any
+
+from fakeredis import FakeAsyncRedis
+from redis.exceptions import RedisError
+
+from src.telegram.middleware.user_lock import (
+    KEY_PREFIX,
+    HeldLock,
+    InMemoryLockRegistry,
+    Lease,
+    RedisLockRegistry,
+    UserLockMiddleware,
+)
+
+
+@dataclass
+class FakeMessage:
+    text: str
+    from_user: SimpleNamespace = field(default_factory=lambda: SimpleNamespace(id=7))
+    answers: list[str] = field(default_factory=list)
+
+    async def answer(self, text: str) -> None:
+        self.answers.append(text)
+
+
+async def test_handler_gets_a_held_lock_and_overlap_is_rejected() -> None:
+    middleware = UserLockMiddleware(InMemoryLockRegistry(), queue_next=False)
+    release = asyncio.Event()
+    seen: list[HeldLock] = []
+
+    async def handler(event: Any, data: dict[str, Any]) -> None:
+        seen.append(data["user_lock"])
+        await release.wait()
+
+    first = asyncio.create_task(middleware(handler, FakeMessage("airpods"), {}))  # type: ignore[arg-type]
+    await asyncio.sleep(0)
+    second = FakeMessage("airpods pro")
+    await middleware(handler, second, {})  # type: ignore[arg-type]
+    release.set()
+    await first
+
+    assert len(seen) == 1
+    assert await seen[0].still_held()
+    assert len(second.answers) == 1
+
+
+async def test_redis_lease_lost_to_another_holder() -> None:
+    redis = FakeAsyncRedis()
+    registry = RedisLockRegistry(redis, lease_ttl=5, wait_timeout=1)
+    lease = await registry.acquire(7, wait=False)
+    assert lease is not None
+    held = HeldLock(registry, lease)
+    assert await held.still_held()
+
+    # The lease expired and another worker took the lock
+    await redis.set(f"{KEY_PREFIX}7", lease.token + 1)
+    assert not await held.still_held()
+    registry._renewers.pop(lease).cancel()
+
+
+async def test_fail_open_lease_is_never_lost() -> None:
+    registry = RedisLockRegistry(FakeAsyncRedis(), lease_ttl=5, wait_timeout=1)
+    assert await registry.still_held(Lease(7, 0))
+
+
+async def test_waiter_release_error_keeps_the_acquired_lease() -> None:
+    redis = FakeAsyncRedis()
+    registry = RedisLockRegistry(redis, lease_ttl=5, wait_timeout=1)
+    await redis.set(f"{KEY_PREFIX}7", 1)
+    release = registry._release
+
+    async def failing_waiter_release(keys: list[str], args: list[Any]) -> Any:
+        if keys[0].endswith(":next"):
+            raise RedisError("connection reset")
+        return await release(keys=keys, args=args)
+
+    registry._release = failing_waiter_release  # type: ignore[assignment]
+    waiting = asyncio.create_task(registry.acquire(7, wait=True))
+    await asyncio.sleep(0.01)
+    await redis.delete(f"{KEY_PREFIX}7")
+    lease = await waiting
+
+    assert lease is not None and lease.token
+    assert await registry.still_held(lease)
+    await registry.release(lease)
+    assert await redis.get(f"{KEY_PREFIX}7") is None